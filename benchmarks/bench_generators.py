@@ -0,0 +1,289 @@
+"""生成器性能基准
+
+在临时目录中创建cookiecutter-seatools-python结构的项目, 按不同规模(生成的制品数量)计时各生成器, 结果可保存为基准JSON,
+并与已有基准对比标记性能回退.
+
+基准耗时与机器的CPU、磁盘及Python版本强相关, 基准JSON需在执行对比的同一台机器(或同规格的CI机器)上生成, 不随仓库提交.
+对比使用多次执行的耗时中位数, 耗时增长同时超过比例阈值与绝对阈值时才判定为回退, 避免毫秒级的小规模基准受噪声影响误报.
+
+示例:
+    # 在改动前的代码上运行并保存基准
+    python benchmarks/bench_generators.py --save benchmarks/baseline.json
+    # 在改动后的代码上与基准对比, 耗时增长超过阈值时以非0退出码退出
+    python benchmarks/bench_generators.py --compare benchmarks/baseline.json --threshold 0.2 --min_delta_ms 5
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import click
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seatools.codegen.ioc.plan import file_plan  # noqa: E402
+
+_BASELINE_VERSION = 2
+DEFAULT_SCALES = (1, 10, 100, 1000)
+
+_PYPROJECT_TOML = """[tool.poetry]
+name = "bench"
+version = "0.1.0"
+description = ""
+authors = ["bench"]
+packages = [{ include = "bench", from = "src" }]
+
+[tool.poetry.dependencies]
+python = "^3.9"
+
+[tool.poetry.scripts]
+bench = "bench.cmd.main:main"
+
+[tool.coverage.run]
+source = ["bench"]
+
+[build-system]
+requires = ["poetry-core"]
+build-backend = "poetry.core.masonry.api"
+"""
+
+_COMMON_PROTO = """syntax = "proto3";
+package bench;
+message Empty {}
+"""
+
+_SERVICE_PROTO = """syntax = "proto3";
+package bench;
+import "proto/common.proto";
+message Service${index}Request { string name = 1; }
+service Service${index} { rpc Call (Service${index}Request) returns (Empty); }
+"""
+
+
+class BenchProject:
+    """基准测试用的临时项目"""
+
+    def __init__(self, root: str):
+        self.project_dir = root + os.sep + 'bench'
+        self.package_dir = self.project_dir + os.sep + 'src' + os.sep + 'bench'
+        os.makedirs(self.package_dir)
+        with open(self.project_dir + os.sep + 'pyproject.toml', 'w', encoding='utf-8') as f:
+            f.write(_PYPROJECT_TOML)
+        with open(self.package_dir + os.sep + '__init__.py', 'w', encoding='utf-8') as f:
+            f.write('')
+
+    def app_dir(self, app: str) -> str:
+        return os.path.dirname(self.package_dir) + os.sep + app
+
+    def write_protos(self, scale: int) -> List[str]:
+        proto_dir = self.project_dir + os.sep + 'src' + os.sep + 'proto'
+        os.makedirs(proto_dir, exist_ok=True)
+        with open(proto_dir + os.sep + 'common.proto', 'w', encoding='utf-8') as f:
+            f.write(_COMMON_PROTO)
+        names = ['common']
+        for i in range(scale):
+            with open(proto_dir + os.sep + 'service{}.proto'.format(i), 'w', encoding='utf-8') as f:
+                f.write(_SERVICE_PROTO.replace('${index}', str(i)))
+            names.append('service{}'.format(i))
+        return names
+
+
+def _bench_app(project: BenchProject, scale: int) -> Callable[[], None]:
+    from seatools.codegen.ioc import generate_app
+
+    def run():
+        for i in range(scale):
+            generate_app(project.project_dir, project.package_dir, 'app{}'.format(i))
+    return run
+
+
+def _bench_cmd(project: BenchProject, scale: int) -> Callable[[], None]:
+    from seatools.codegen.ioc import generate_cmd
+
+    def run():
+        for i in range(scale):
+            generate_cmd(project.project_dir, project.package_dir, command='cmd{}'.format(i))
+    return run
+
+
+def _bench_task(project: BenchProject, scale: int) -> Callable[[], None]:
+    from seatools.codegen.ioc import generate_task
+
+    def run():
+        for i in range(scale):
+            generate_task(project.project_dir, project.package_dir, task_class='Bench{}Task'.format(i),
+                          task_name='任务{}'.format(i))
+    return run
+
+
+def _bench_web(generator_name: str) -> Callable[[BenchProject, int], Callable[[], None]]:
+    """web生成器每个应用仅生成一份, 按应用数量计算规模"""
+    def prepare(project: BenchProject, scale: int) -> Callable[[], None]:
+        import seatools.codegen.ioc as ioc
+        generator = getattr(ioc, generator_name)
+
+        def run():
+            for i in range(scale):
+                app = 'app{}'.format(i)
+                generator(project.project_dir, project.app_dir(app), docker=True, docker_compose=True, app=app)
+        return run
+    return prepare
+
+
+def _bench_scrapy_spider(project: BenchProject, scale: int) -> Callable[[], None]:
+    from seatools.codegen.ioc import generate_scrapy, generate_scrapy_spider
+    with file_plan():
+        generate_scrapy(project.project_dir, project.package_dir)
+
+    def run():
+        for i in range(scale):
+            generate_scrapy_spider(project.project_dir, project.package_dir, name='spider{}'.format(i),
+                                   domain='spider{}.com'.format(i))
+    return run
+
+
+def _bench_grpc(project: BenchProject, scale: int) -> Callable[[], None]:
+    from seatools.codegen.ioc import generate_grpc_batch
+    names = project.write_protos(scale)
+
+    def run():
+        generate_grpc_batch(project.project_dir, project.package_dir, names=names)
+    return run
+
+
+# key: 基准名称, value: 准备函数, 在计时外准备项目并返回计时执行的函数
+BENCHMARKS: Dict[str, Callable[[BenchProject, int], Callable[[], None]]] = {
+    'generate_app': _bench_app,
+    'generate_cmd': _bench_cmd,
+    'generate_task': _bench_task,
+    'generate_fastapi': _bench_web('generate_fastapi'),
+    'generate_flask': _bench_web('generate_flask'),
+    'generate_django': _bench_web('generate_django'),
+    'generate_scrapy_spider': _bench_scrapy_spider,
+    'generate_grpc': _bench_grpc,
+}
+
+
+def _grpc_available() -> bool:
+    try:
+        import grpc_tools  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_benchmark(name: str, scale: int, repeat: int) -> List[float]:
+    """在全新的临时项目中执行基准, 与命令行一致在文件生成计划中生成, 返回每次执行的耗时(秒)"""
+    timings = []
+    for _ in range(repeat):
+        root = tempfile.mkdtemp(prefix='seatools-codegen-bench-')
+        try:
+            project = BenchProject(root)
+            run = BENCHMARKS[name](project, scale)
+            start = time.perf_counter()
+            with file_plan():
+                run()
+            timings.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return timings
+
+
+def run_benchmarks(names: List[str], scales: List[int], repeat: int) -> dict:
+    results = {}
+    for name in names:
+        results[name] = {}
+        for scale in scales:
+            timings = run_benchmark(name, scale, repeat)
+            seconds = statistics.median(timings)
+            results[name][str(scale)] = {'seconds': round(seconds, 6),
+                                         'min_seconds': round(min(timings), 6),
+                                         'per_artifact_ms': round(seconds * 1000 / scale, 4)}
+            click.echo('{:<24}{:>6}{:>14.3f}ms{:>12.4f}ms/个'.format(name, scale, seconds * 1000,
+                                                                     seconds * 1000 / scale))
+    return {
+        'version': _BASELINE_VERSION,
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 5.0) -> List[str]:
+    """对比当前结果与基准的耗时中位数, 返回耗时增长比例超过threshold且增长量超过min_delta_ms毫秒的回退说明"""
+    if baseline.get('version') != _BASELINE_VERSION:
+        click.echo('基准文件版本[{}]与当前版本[{}]不一致, 请重新生成基准'.format(baseline.get('version'), _BASELINE_VERSION),
+                   err=True)
+    base_meta, meta = baseline.get('meta', {}), current['meta']
+    for key in ('python', 'platform', 'cpu_count'):
+        if base_meta.get(key) != meta[key]:
+            click.echo('基准的{}[{}]与当前[{}]不一致, 对比结果仅供参考, 建议在本机重新生成基准'.format(
+                key, base_meta.get(key), meta[key]), err=True)
+    regressions = []
+    for name, scales in current['results'].items():
+        for scale, result in scales.items():
+            base = baseline.get('results', {}).get(name, {}).get(scale)
+            if not base or not base['seconds']:
+                continue
+            ratio = result['seconds'] / base['seconds'] - 1
+            delta_ms = (result['seconds'] - base['seconds']) * 1000
+            flag = ''
+            if ratio > threshold and delta_ms > min_delta_ms:
+                flag = '  <-- 性能回退'
+                regressions.append('{}[{}]: {:.3f}ms -> {:.3f}ms ({:+.1%})'.format(
+                    name, scale, base['seconds'] * 1000, result['seconds'] * 1000, ratio))
+            click.echo('{:<24}{:>6}{:>14.3f}ms{:>14.3f}ms{:>+10.1%}{}'.format(
+                name, scale, base['seconds'] * 1000, result['seconds'] * 1000, ratio, flag))
+    return regressions
+
+
+@click.command()
+@click.option('--benchmark', '-b', 'names', multiple=True, type=click.Choice(list(BENCHMARKS)),
+              help='执行的基准, 可多次指定, 默认全部')
+@click.option('--scales', default=','.join(str(scale) for scale in DEFAULT_SCALES),
+              help='生成规模(制品数量)列表, 逗号分隔, 默认1,10,100,1000')
+@click.option('--repeat', default=5, type=int, help='每个规模重复执行次数, 取耗时中位数, 默认5')
+@click.option('--save', default=None, help='保存结果为基准JSON文件')
+@click.option('--compare', 'compare_file', default=None, help='与基准JSON文件对比, 存在性能回退时以退出码1退出')
+@click.option('--threshold', default=0.2, type=float, help='判定性能回退的耗时增长比例, 默认0.2')
+@click.option('--min_delta_ms', default=5.0, type=float,
+              help='判定性能回退的最小耗时增长(毫秒), 增长量不超过该值时视为噪声, 默认5')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(names: List[str], scales: str, repeat: int, save: Optional[str], compare_file: Optional[str],
+         threshold: float, min_delta_ms: float):
+    """生成器性能基准"""
+    logger.remove()
+    names = list(names) or list(BENCHMARKS)
+    if 'generate_grpc' in names and not _grpc_available():
+        click.echo('未安装grpcio-tools, 跳过generate_grpc', err=True)
+        names.remove('generate_grpc')
+    current = run_benchmarks(names, [int(scale) for scale in scales.split(',') if scale.strip()], repeat)
+    if save:
+        with open(save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        click.echo('基准已保存: {}'.format(save))
+    if compare_file:
+        with open(compare_file, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        click.echo('{:<24}{:>6}{:>16}{:>16}{:>10}'.format('benchmark', 'scale', 'baseline', 'current', 'change'))
+        regressions = compare(current, baseline, threshold, min_delta_ms)
+        if regressions:
+            click.echo('存在性能回退:\n' + '\n'.join(regressions), err=True)
+            sys.exit(1)
+        click.echo('未发现性能回退')
+
+
+if __name__ == '__main__':
+    main()
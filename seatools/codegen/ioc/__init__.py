@@ -1,8 +1,27 @@
-from .cmd import generate_cmd
-from .django import generate_django
-from .fastapi import generate_fastapi
-from .flask import generate_flask
-from .grpc import generate_grpc
-from .scrapy import generate_scrapy, generate_scrapy_spider
-from .task import generate_task
-from .app import generate_app
+import importlib
+
+# 生成器按需导入, 避免导入包时加载全部生成器模块, key: 生成器名称, value: 所在模块
+_GENERATORS = {
+    'generate_cmd': '.cmd',
+    'generate_django': '.django',
+    'generate_fastapi': '.fastapi',
+    'generate_flask': '.flask',
+    'generate_grpc': '.grpc',
+    'generate_grpc_batch': '.grpc',
+    'generate_scrapy': '.scrapy',
+    'generate_scrapy_spider': '.scrapy',
+    'generate_task': '.task',
+    'generate_app': '.app',
+}
+
+__all__ = list(_GENERATORS)
+
+
+def __getattr__(name: str):
+    if name in _GENERATORS:
+        return getattr(importlib.import_module(_GENERATORS[name], __name__), name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,31 @@
+"""命令行子命令, 每个子命令独立模块, 由main中的LazyGroup在首次调用时按需导入"""
+import os
+from os.path import dirname
+
+from loguru import logger
+
+from ..common import extract_names
+from ..profile import phase
+from ...utils import find_project_dir, find_package_dir
+
+
+def extract_project_package_dir(project_dir, package_dir):
+    with phase('discovery'):
+        project_dir = project_dir or find_project_dir(os.getcwd())
+        if project_dir:
+            package_dir = package_dir or find_package_dir(project_dir)
+    if not project_dir:
+        logger.error('无法找到项目目录')
+        exit(1)
+    if not package_dir:
+        logger.error('无法找到包目录')
+        exit(1)
+    logger.info("项目目录: {}", project_dir)
+    logger.info("包目录: {}", package_dir)
+    return project_dir, package_dir
+
+
+def extract_package_app_dir(package_dir, app):
+    if not app:
+        return package_dir
+    return dirname(package_dir) + os.sep + '_'.join(extract_names(app))
@@ -0,0 +1,27 @@
+import click
+from loguru import logger
+from typing import Optional
+
+from . import extract_project_package_dir
+from ..app import generate_app
+from ..plan import log_applied
+
+
+@click.command()
+@click.argument('app')
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='主包目录, 若不传则基于项目目录自动检索')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def startapp(app: str,
+             project_dir: Optional[str] = None,
+             package_dir: Optional[str] = None,
+             override: Optional[bool] = False) -> None:
+    """创建新应用"""
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    logger.info("开始生成应用[{}]模板代码", app)
+    generate_app(project_dir=project_dir, package_dir=package_dir, override=override,
+                 app_name=app)
+    log_applied("生成应用[{}]模板代码完成", app, level='INFO')
@@ -0,0 +1,34 @@
+import click
+from loguru import logger
+from typing import Optional
+
+from . import extract_project_package_dir
+from ..manifest import load_manifest, apply_manifest, manifest_dirs
+from ..plan import log_applied
+
+
+@click.command()
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.option('--project_dir', default=None, help='项目目录, 优先级高于清单配置, 默认从项目内的任意位置执行能够自动检索')
+@click.option('--package_dir', default=None, help='主包目录, 优先级高于清单配置, 若不传则基于项目目录自动检索')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 清单内单项配置的override优先, 不建议覆盖, 默认false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def apply(manifest: str,
+          project_dir: Optional[str] = None,
+          package_dir: Optional[str] = None,
+          override: Optional[bool] = False) -> None:
+    """按清单批量生成代码"""
+    try:
+        config = load_manifest(manifest)
+    except ValueError as e:
+        logger.error(str(e))
+        exit(1)
+    manifest_project_dir, manifest_package_dir = manifest_dirs(config, manifest)
+    project_dir, package_dir = extract_project_package_dir(project_dir or manifest_project_dir,
+                                                           package_dir or manifest_package_dir)
+    logger.info('开始按清单[{}]生成代码', manifest)
+    count = apply_manifest(config, project_dir=project_dir, package_dir=package_dir,
+                           override=override or config.get('override', False))
+    log_applied('按清单[{}]生成代码完成, 共{}项', manifest, count)
@@ -0,0 +1,40 @@
+import click
+from loguru import logger
+from typing import Optional
+
+from . import extract_project_package_dir, extract_package_app_dir
+from ..cmd import generate_cmd
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option('--name', default=None, help='cmd命令名称, 使用poetry run {name} 执行生成的命令, 必填')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
+@click.option('--docker_compose', is_flag=True, default=False,
+              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def cmd(name: str,
+        project_dir: Optional[str] = None,
+        package_dir: Optional[str] = None,
+        app: Optional[str] = None,
+        override: Optional[bool] = False,
+        docker: Optional[bool] = False,
+        docker_compose: Optional[bool] = False):
+    """生成CMD命令行工具"""
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    if not name:
+        logger.error('[--name]参数不能为空')
+        return
+    generate_cmd(project_dir=project_dir,
+                 package_dir=package_dir,
+                 override=override,
+                 command=name,
+                 docker=docker,
+                 docker_compose=docker_compose,
+                 app=app)
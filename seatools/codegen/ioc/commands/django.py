@@ -0,0 +1,43 @@
+import click
+from typing import Optional
+
+from . import extract_project_package_dir, extract_package_app_dir
+from ..django import generate_django
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
+@click.option('--docker_compose', is_flag=True, default=False,
+              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
+@click.option('--metrics', is_flag=True, default=False,
+              help='是否生成请求指标, 基于prometheus_client多进程模式记录各路由耗时直方图、状态码、处理中的请求数及工作进程常驻内存, '
+                   '通过/metrics获取, 默认: false')
+@click.option('--compress', is_flag=True, default=False,
+              help='是否生成响应压缩, 响应体不小于最小压缩大小且为文本、JSON等类型时按客户端支持选择zstd、br或gzip压缩, '
+                   '跳过流式及已编码响应, 压缩级别可按运行环境配置, 默认: false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def django(project_dir: Optional[str] = None,
+           package_dir: Optional[str] = None,
+           override: Optional[bool] = False,
+           app: Optional[str] = None,
+           docker: Optional[bool] = False,
+           docker_compose: Optional[bool] = False,
+           metrics: Optional[bool] = False,
+           compress: Optional[bool] = False):
+    """生成Django模板代码"""
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    generate_django(project_dir=project_dir,
+                    package_dir=package_dir,
+                    override=override,
+                    docker=docker,
+                    docker_compose=docker_compose,
+                    app=app,
+                    metrics=metrics,
+                    compress=compress)
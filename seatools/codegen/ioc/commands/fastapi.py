@@ -0,0 +1,73 @@
+import click
+from loguru import logger
+from typing import List, Optional
+
+from . import extract_project_package_dir, extract_package_app_dir
+from ..fastapi import generate_fastapi, BOOT_MODES, JSON_LIBRARIES, POOLS
+from ..plan import log_applied
+from ..web import SERVERS, CACHE_BACKENDS
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
+@click.option('--docker_compose', is_flag=True, default=False,
+              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
+@click.option('--starter', is_flag=True, default=False, help='是否生成基于starter的代码')
+@click.option('--boot', type=click.Choice(list(BOOT_MODES)), default='default',
+              help='项目依赖启动模式, default: 命令与应用导入时各启动一次, single: 每个进程仅启动一次, '
+                   'prefork: 主进程启动一次后fork工作进程(写时复制共享, 仅linux与mac), starter模式下忽略, 默认: default')
+@click.option('--server', type=click.Choice(SERVERS), default='uvicorn',
+              help='运行方式, uvicorn: 基于uvicorn运行, gunicorn: 基于gunicorn + UvicornWorker运行, 主进程预加载应用, '
+                   '支持工作进程监控与kill -HUP平滑重启, 忽略--boot, 不支持starter, 默认: uvicorn')
+@click.option('--json', 'json_library', type=click.Choice(JSON_LIBRARIES), default=None,
+              help='高性能JSON序列化库, 生成基于该库的fastapi/responses.py并作为应用的默认响应类, 不支持starter, 默认不使用')
+@click.option('--pool', 'pools', type=click.Choice(list(POOLS)), multiple=True,
+              help='由应用lifespan管理的连接池, 可多次指定, 每个工作进程创建一次并在退出时释放, 连接池大小在config/application.yml中配置, '
+                   '不支持starter')
+@click.option('--cache', type=click.Choice(CACHE_BACKENDS), default=None,
+              help='响应缓存, memory: 进程内TTL + LRU缓存, redis: 进程内缓存 + Redis二级缓存(自动添加redis连接池), '
+                   '生成fastapi/cache.py的cached装饰器(单飞、ETag与304), 不支持starter, 默认不使用')
+@click.option('--metrics', is_flag=True, default=False,
+              help='是否生成请求指标, 基于prometheus_client多进程模式记录各路由耗时直方图、状态码、处理中的请求数及工作进程常驻内存, '
+                   '通过/metrics获取, 不支持starter, 默认: false')
+@click.option('--compress', is_flag=True, default=False,
+              help='是否生成响应压缩, 响应体不小于最小压缩大小且为文本、JSON等类型时按客户端支持选择zstd、br或gzip压缩, '
+                   '跳过流式及已编码响应, 压缩级别可按运行环境配置, 不支持starter, 默认: false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def fastapi(project_dir: Optional[str] = None,
+            package_dir: Optional[str] = None,
+            override: Optional[bool] = False,
+            app: Optional[str] = None,
+            docker: Optional[bool] = False,
+            docker_compose: Optional[bool] = False,
+            starter: Optional[bool] = False,
+            boot: Optional[str] = 'default',
+            server: Optional[str] = 'uvicorn',
+            json_library: Optional[str] = None,
+            pools: Optional[List[str]] = None,
+            cache: Optional[str] = None,
+            metrics: Optional[bool] = False,
+            compress: Optional[bool] = False) -> None:
+    """生成FastAPI模板代码"""
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    logger.info('开始生成[fastapi]模板代码')
+    generate_fastapi(project_dir=project_dir, package_dir=package_dir, override=override,
+                     docker=docker,
+                     docker_compose=docker_compose,
+                     app=app,
+                     starter=starter,
+                     boot=boot,
+                     server=server,
+                     json_library=json_library,
+                     pools=list(pools or []),
+                     cache=cache,
+                     metrics=metrics,
+                     compress=compress)
+    log_applied('生成[fastapi]模板代码完成')
@@ -0,0 +1,64 @@
+import click
+from loguru import logger
+from typing import Optional
+
+from . import extract_project_package_dir, extract_package_app_dir
+from ..flask import generate_flask, FLASK_SERVERS, WSGI_WORKER_CLASSES
+from ..plan import log_applied
+from ..web import CACHE_BACKENDS
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
+@click.option('--docker_compose', is_flag=True, default=False,
+              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
+@click.option('--starter', is_flag=True, default=False, help='是否生成基于starter的代码')
+@click.option('--server', type=click.Choice(FLASK_SERVERS), default='uvicorn',
+              help='运行方式, uvicorn: 基于uvicorn运行(wsgi转asgi), gunicorn: 基于gunicorn原生wsgi工作进程运行, '
+                   '支持工作进程监控与kill -HUP平滑重启, waitress: 基于waitress单进程多线程原生wsgi运行, '
+                   '原生wsgi运行方式额外生成与wsgi转asgi对比的微基准flask/benchmark.py, 不支持starter, 默认: uvicorn')
+@click.option('--worker_class', type=click.Choice(list(WSGI_WORKER_CLASSES)), default='gthread',
+              help='gunicorn工作进程类型, gthread: 多线程, gevent: 协程, 默认: gthread')
+@click.option('--cache', type=click.Choice(CACHE_BACKENDS), default=None,
+              help='响应缓存, memory: 进程内TTL + LRU缓存, redis: 进程内缓存 + Redis二级缓存, '
+                   '生成flask/cache.py的cached装饰器(单飞、ETag与304), 不支持starter, 默认不使用')
+@click.option('--metrics', is_flag=True, default=False,
+              help='是否生成请求指标, 基于prometheus_client多进程模式记录各路由耗时直方图、状态码、处理中的请求数及工作进程常驻内存, '
+                   '通过/metrics获取, 不支持starter, 默认: false')
+@click.option('--compress', is_flag=True, default=False,
+              help='是否生成响应压缩, 响应体不小于最小压缩大小且为文本、JSON等类型时按客户端支持选择zstd、br或gzip压缩, '
+                   '跳过流式及已编码响应, 压缩级别可按运行环境配置, 不支持starter, 默认: false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def flask(project_dir: Optional[str] = None,
+          package_dir: Optional[str] = None,
+          override: Optional[bool] = False,
+          app: Optional[str] = None,
+          docker: Optional[bool] = False,
+          docker_compose: Optional[bool] = False,
+          starter: Optional[bool] = False,
+          server: Optional[str] = 'uvicorn',
+          worker_class: Optional[str] = 'gthread',
+          cache: Optional[str] = None,
+          metrics: Optional[bool] = False,
+          compress: Optional[bool] = False):
+    """生成Flask模板代码"""
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    logger.info('开始生成[flask]模板代码')
+    generate_flask(project_dir=project_dir, package_dir=package_dir, override=override,
+                   docker=docker,
+                   docker_compose=docker_compose,
+                   app=app,
+                   starter=starter,
+                   server=server,
+                   worker_class=worker_class,
+                   cache=cache,
+                   metrics=metrics,
+                   compress=compress)
+    log_applied('生成[flask]模板代码完成')
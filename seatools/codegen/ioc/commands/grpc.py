@@ -0,0 +1,49 @@
+import os
+
+import click
+from loguru import logger
+from typing import Optional
+
+from . import extract_project_package_dir
+from ..grpc import generate_grpc_batch, scan_protos, watch_grpc
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option("--name", default=None,
+              help='protobuf文件名称, proto文件仅支持在src/proto目录下, 例如存在xxx.proto, 则name应该传递xxx, 嵌套目录使用/分隔, 例如a/xxx, 若不传递该参数, 则默认将src/proto目录下所有proto文件一起生成')
+@click.option("--pyi", is_flag=True, default=False, help='是否生成pyi文件, 默认false不生成')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option('--jobs', '-j', default=None, type=int,
+              help='proto文件较多时的并行编译进程数, 默认CPU核数, 1为不并行')
+@click.option('--force', is_flag=True, default=False,
+              help='忽略增量缓存, 强制重新生成全部proto文件, 默认false')
+@click.option('--watch', is_flag=True, default=False,
+              help='监听src/proto目录, proto文件变更时自动重新生成变更的proto及依赖它的proto, 按Ctrl+C停止, 默认false')
+@click.option('--interval', default=0.5, type=float, help='监听模式的轮询间隔(秒), 默认0.5')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def grpc(project_dir: Optional[str] = None,
+         package_dir: Optional[str] = None,
+         name: Optional[str] = None, pyi: Optional[bool] = False, override: Optional[bool] = False,
+         jobs: Optional[int] = None, force: Optional[bool] = False,
+         watch: Optional[bool] = False, interval: Optional[float] = 0.5):
+    """生成gRPC pb2代码"""
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    proto_dir = project_dir + os.sep + 'src' + os.sep + 'proto'
+    if not os.path.exists(proto_dir):
+        logger.error("proto目录[{}]不存在, 无法生成pb2代码".format(proto_dir))
+        return
+    if watch:
+        watch_grpc(project_dir, package_dir, override, pyi=pyi, jobs=jobs, interval=interval)
+        return
+    if not name:
+        # 包含嵌套目录下的proto文件, 名称为相对proto目录的路径, 例如: a/b
+        names = sorted(scan_protos(proto_dir))
+    else:
+        names = [name]
+
+    # 全部proto文件一次生成
+    generate_grpc_batch(project_dir, package_dir, override, names=names, pyi=pyi, jobs=jobs, force=force)
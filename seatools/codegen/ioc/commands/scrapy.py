@@ -0,0 +1,59 @@
+import click
+from typing import Optional
+
+from . import extract_project_package_dir, extract_package_app_dir
+from ..scrapy import generate_scrapy, generate_scrapy_spider
+
+
+@click.group()
+@click.help_option('-h', '--help', help='查看命令帮助')
+def scrapy():
+    """生成Scrapy模板代码"""
+    pass
+
+
+@scrapy.command('init')
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def scrapy_init(project_dir: Optional[str] = None,
+                package_dir: Optional[str] = None,
+                override: Optional[bool] = False,
+                app: Optional[str] = None):
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    generate_scrapy(project_dir=project_dir, package_dir=package_dir, override=override,
+                    app=app)
+
+
+@scrapy.command('genspider')
+@click.argument('name')
+@click.argument('domain')
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
+@click.option('--docker_compose', is_flag=True, default=False,
+              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def scrapy_genspider(name: str,
+                     domain: str,
+                     project_dir: Optional[str] = None,
+                     package_dir: Optional[str] = None,
+                     override: Optional[bool] = False,
+                     app: Optional[str] = None,
+                     docker: Optional[bool] = False,
+                     docker_compose: Optional[bool] = False):
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    generate_scrapy_spider(project_dir=project_dir, package_dir=package_dir,
+                           name=name, domain=domain, override=override,
+                           docker=docker,
+                           docker_compose=docker_compose,
+                           app=app)
@@ -0,0 +1,28 @@
+import socket
+
+import click
+from loguru import logger
+from typing import Optional
+
+from ..server import CodegenServer
+
+
+@click.command()
+@click.option('--socket', 'socket_path', default=None,
+              help='Unix socket路径, 不传则基于标准输入输出提供服务')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+@click.pass_context
+def serve(ctx: click.Context, socket_path: Optional[str] = None):
+    """启动常驻代码生成服务, 按JSON行协议接收请求, 每行一个请求, 每个请求返回一行响应, 包含写入的文件列表"""
+    server = CodegenServer(ctx.find_root().command)
+    if not socket_path:
+        server.serve_stdio()
+        return
+    if not hasattr(socket, 'AF_UNIX'):
+        logger.error('当前系统不支持Unix socket, 请使用标准输入输出模式')
+        exit(1)
+    try:
+        server.serve_unix(socket_path)
+    except KeyboardInterrupt:
+        logger.info('代码生成服务已停止')
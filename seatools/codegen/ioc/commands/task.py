@@ -0,0 +1,45 @@
+import click
+from loguru import logger
+from typing import Optional
+
+from . import extract_project_package_dir, extract_package_app_dir
+from ..task import generate_task
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
+@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
+@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
+@click.option('--override', is_flag=True, default=False,
+              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
+@click.option('--task_class', '--class', '--module_name', '--module', default=None,
+              help='任务类名, 支持驼峰、下划线名称解析, 生成的文件名下划线分隔, 类名驼峰, 例如: HelloWorld, 生成task模板时必填该参数')
+@click.option('--task_name', '--name', default="默认任务", help='任务名称, 中英文任务描述, 默认值: 默认任务')
+@click.option('--is_async', '--async', is_flag=True, default=False, help='是否创建异步任务, 默认false')
+@click.option('--cmd', is_flag=True, default=False, help='是否生成对应的命令行入口')
+@click.option('--docker', is_flag=True, default=False,
+              help='cmd参数为true时该参数生效, 是否生成Dockerfile文件, 默认: false')
+@click.option('--docker_compose', is_flag=True, default=False,
+              help='cmd参数为true时该参数生效, 是否生成Dockerfile文件和docker-compose配置, 默认: false')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def task(project_dir: Optional[str] = None,
+         package_dir: Optional[str] = None,
+         override: Optional[bool] = False,
+         app: Optional[str] = None,
+         task_class: Optional[str] = None,
+         task_name: Optional[str] = "默认任务",
+         is_async: Optional[bool] = False,
+         cmd: Optional[bool] = False,
+         docker: Optional[bool] = False,
+         docker_compose: Optional[bool] = False) -> None:
+    """生成任务模板代码"""
+    if not task_class:
+        logger.error('[--task_class]参数不能为空')
+        return
+    project_dir, package_dir = extract_project_package_dir(project_dir, package_dir)
+    package_dir = extract_package_app_dir(package_dir, app)
+    generate_task(project_dir=project_dir, package_dir=package_dir,
+                  task_class=task_class, task_name=task_name,
+                  override=override, is_async=is_async, cmd=cmd,
+                  docker=docker, docker_compose=docker_compose)
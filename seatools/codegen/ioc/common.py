@@ -1,68 +1,211 @@
 import os
 from loguru import logger
-from typing import List
+from typing import List, Optional
 import re
 
+from .compose import DockerComposeServices, parse_service
+from .plan import PlannedFile, current_plan, log_applied
+from .profile import count, phase
+from .pyproject import PoetryScriptRegistry
+from .template import load_template, render
+
 
 def mkdir(dir_path: str):
-    """创建目录"""
+    """创建目录, 存在生效的文件生成计划时仅记录到计划中"""
+    plan = current_plan()
+    if plan is not None:
+        plan.add_dir(dir_path)
+        return
     if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
+        with phase('fs_write'):
+            os.makedirs(dir_path)
+        count('dirs_created')
         logger.success('创建目录: {}', dir_path)
         return
     logger.warning('目录已存在: {}, 忽略', dir_path)
 
 
-def create_file(filepath: str, content='', encoding='utf-8', override=False):
-    """创建文件"""
-    exists = os.path.exists(filepath)
-    if override and exists:
-        os.remove(filepath)
-        exists = False
-        logger.info('删除文件: {}', filepath)
-    if not exists:
-        with open(filepath, 'w', encoding=encoding) as f:
-            f.write(content)
-        logger.success('创建文件: {}', filepath)
+def create_file(filepath: str, content='', encoding='utf-8', override=False, if_changed=True):
+    """创建文件, 存在生效的文件生成计划时仅记录到计划中
+
+    Args:
+        filepath: 文件路径
+        content: 文件内容
+        encoding: 文件编码
+        override: 文件已存在时是否覆盖
+        if_changed: 覆盖时是否仅在内容变化时写入, 内容未变化的文件不写入以保留修改时间, 默认true
+    """
+    _write_planned_file(PlannedFile(filepath, content=content, encoding=encoding, override=override,
+                                    if_changed=if_changed))
+
+
+def move_file(source: str, filepath: str, override=False, if_changed=True):
+    """将已生成的文件移动到目标路径, 语义与create_file一致, 适用于外部工具(例如protoc)生成的文件"""
+    _write_planned_file(PlannedFile(filepath, source=source, override=override, if_changed=if_changed))
+
+
+def _write_planned_file(planned_file: PlannedFile):
+    plan = current_plan()
+    if plan is not None:
+        plan.add_file(planned_file)
+        return
+    action = planned_file.action()
+    if action == 'exists':
+        logger.warning('文件已存在: {}, 忽略', planned_file.path)
+        return
+    if action == 'unchanged':
+        logger.info('文件内容未变化: {}, 忽略', planned_file.path)
         return
-    logger.warning('文件已存在: {}, 忽略', filepath)
+    planned_file.write()
+    logger.success('创建文件: {}' if action == 'create' else '覆盖文件: {}', planned_file.path)
+
+
+def path_exists(path: str) -> bool:
+    """路径是否存在, 存在生效的文件生成计划时包含计划中将创建的目录与文件"""
+    plan = current_plan()
+    if plan is not None:
+        return plan.exists(path)
+    return os.path.exists(path)
 
 
 def add_poetry_script(project_dir: str, script: str):
-    """新增poetry启动脚本"""
-    pyproject_toml = project_dir + os.sep + 'pyproject.toml'
-    if not os.path.exists(pyproject_toml):
+    """新增poetry启动脚本, 按脚本名称判断是否已存在"""
+    with phase('edit'):
+        _add_poetry_script(project_dir, script)
+
+
+def _add_poetry_script(project_dir: str, script: str):
+    plan = current_plan()
+    if plan is not None:
+        registry = plan.poetry_script_registry(project_dir)
+    else:
+        registry = PoetryScriptRegistry.load(project_dir)
+    if registry is None:
         logger.error('pyproject.toml文件不存在, 无法添加poetry执行脚本')
         return
-    with open(pyproject_toml, 'r', encoding='utf-8') as f:
-        content = f.read()
-    if script in content:
+    if not registry.add(script):
         logger.warning('脚本[{}]已存在, 无需重复添加', script)
         return
-    content = content.replace('[tool.poetry.scripts]', f'[tool.poetry.scripts]\n{script}')
-    with open(pyproject_toml, 'w', encoding='utf-8') as f:
-        f.write(content)
-    logger.success('新增poetry执行脚本: [poetry run {}]', script.split('=')[0].strip())
-
-
-def add_docker_compose_script(project_dir: str, script: str):
-    """新增docker-compose启动脚本"""
-    docker_compose_yml = project_dir + os.sep + 'docker-compose.yml'
-    if not os.path.exists(docker_compose_yml):
-        create_file(docker_compose_yml, """version: '3'
-services:
-""")
-        logger.success('docker-compose.yml文件不存在, 创建docker-compose.yml文件')
-    with open(docker_compose_yml, 'r', encoding='utf-8') as f:
-        content = f.read()
-    service_name = script.split('\n')[0].strip().strip('\r').strip(':')
-    if service_name in content:
-        logger.warning('服务[{}]已存在, 无需重复添加, 忽略', service_name)
-        return
-    content = content.replace('\nservices:', f'\nservices:\n{script}')
-    with open(docker_compose_yml, 'w', encoding='utf-8') as f:
-        f.write(content)
-    logger.success('新增docker-compose服务: {}', service_name)
+    if plan is None:
+        for name in registry.flush():
+            logger.success('新增poetry执行脚本: [poetry run {}]', name)
+
+
+def add_docker_compose_script(project_dir: str, script: str, override: bool = False):
+    """新增docker-compose启动脚本, 按服务名称判断是否已存在, override为True时原地更新已存在的服务"""
+    with phase('edit'):
+        _add_docker_compose_script(project_dir, script, override=override)
+
+
+def _add_docker_compose_script(project_dir: str, script: str, override: bool = False):
+    plan = current_plan()
+    if plan is not None:
+        services = plan.docker_compose(project_dir)
+    else:
+        services = DockerComposeServices.load(project_dir)
+    if services.merge(script, update=override) == 'unchanged':
+        logger.warning('服务[{}]已存在, 无需重复添加, 忽略', parse_service(script)[0])
+    if plan is None:
+        if not services.exists:
+            logger.success('docker-compose.yml文件不存在, 创建docker-compose.yml文件')
+        added, updated = services.flush()
+        for service_name in added:
+            logger.success('新增docker-compose服务: {}', service_name)
+        for service_name in updated:
+            logger.success('更新docker-compose服务: {}', service_name)
+
+
+def add_application_config(project_dir: str, key: str, config: str, profile: Optional[str] = None):
+    """在项目配置目录的application.yml中新增顶层配置项, 按配置项名称判断是否已存在, 文件不存在时创建
+
+    Args:
+        project_dir: 项目目录
+        key: 顶层配置项名称
+        config: 配置片段, 需包含顶层配置项
+        profile: 运行环境, 例如: dev, 指定时写入该环境的application-{profile}.yml, 启动时覆盖application.yml中的同名配置
+    """
+    with phase('edit'):
+        _add_application_config(project_dir, key, config, profile)
+
+
+def merge_application_config(project_dir: str, key: str, config: str, profile: Optional[str] = None) -> bool:
+    """在项目配置目录的application.yml中新增顶层配置项, 已存在时将缺失的下一级配置项补充到该配置项末尾, 不修改已有的值
+
+    Args:
+        project_dir: 项目目录
+        key: 顶层配置项名称
+        config: 配置片段, 需包含顶层配置项, 下一级配置项需为单行
+        profile: 运行环境, 例如: dev, 指定时写入该环境的application-{profile}.yml
+
+    Returns:
+        配置项是否包含config中的全部下一级配置项, 已存在的配置项为行内写法无法补充时返回False
+    """
+    with phase('edit'):
+        return _add_application_config(project_dir, key, config, profile, merge=True)
+
+
+def _add_application_config(project_dir: str, key: str, config: str, profile: Optional[str] = None,
+                            merge: bool = False) -> bool:
+    config_dir = project_dir + os.sep + 'config'
+    name = 'application-{}'.format(profile) if profile else 'application'
+    application_yml = config_dir + os.sep + name + '.yml'
+    if not os.path.exists(application_yml) and os.path.exists(config_dir + os.sep + name + '.yaml'):
+        application_yml = config_dir + os.sep + name + '.yaml'
+    plan = current_plan()
+    # 同一计划内多次新增时基于计划中的内容追加
+    planned_file = plan.files.get(application_yml) if plan is not None else None
+    if planned_file is not None:
+        content = planned_file.read_new()
+    elif os.path.exists(application_yml):
+        with open(application_yml, 'r', encoding='utf-8') as f:
+            content = f.read()
+    else:
+        content = ''
+    if re.search(r'^{}\s*:'.format(re.escape(key)), content, re.M):
+        if merge:
+            return _merge_config_options(application_yml, content, key, config)
+        logger.warning('配置项[{}]已存在: {}, 无需重复添加, 忽略', key, application_yml)
+        return True
+    if content:
+        content = content.rstrip('\n') + '\n\n'
+    create_file(application_yml, content + config, override=True)
+    return True
+
+
+# 下一级配置项行, group(1): 缩进, group(2): 配置项名称
+_CONFIG_OPTION_PATTERN = re.compile(r'^([ \t]+)([^\s#:][^:#]*?)\s*:')
+
+
+def _merge_config_options(application_yml: str, content: str, key: str, config: str) -> bool:
+    """将config中已存在配置项缺失的下一级配置项补充到该配置项末尾"""
+    lines = content.split('\n')
+    start = next(i for i, line in enumerate(lines) if re.match(r'{}\s*:'.format(re.escape(key)), line))
+    if re.sub(r'\s#.*$', '', lines[start].split(':', 1)[1]).strip():
+        logger.error('配置项[{}]为行内写法: {}, 无法补充配置, 请手动添加:\n{}', key, application_yml, config)
+        return False
+    # 配置项范围为其后的缩进行, 不含末尾的空行及注释
+    end = start
+    for i in range(start + 1, len(lines)):
+        if lines[i][:1] in (' ', '\t'):
+            if lines[i].strip() and not lines[i].lstrip().startswith('#'):
+                end = i
+        elif lines[i].strip() and not lines[i].startswith('#'):
+            break
+    existing = [m for m in map(_CONFIG_OPTION_PATTERN.match, lines[start + 1:end + 1]) if m]
+    indent = existing[0].group(1) if existing else '  '
+    names = {m.group(2) for m in existing if m.group(1) == indent}
+    missing = []
+    for line in config.split('\n'):
+        m = _CONFIG_OPTION_PATTERN.match(line)
+        if m and m.group(2) not in names:
+            missing.append(line.strip())
+    if not missing:
+        logger.warning('配置项[{}]已存在: {}, 无需重复添加, 忽略', key, application_yml)
+        return True
+    lines[end + 1:end + 1] = [indent + line for line in missing]
+    create_file(application_yml, '\n'.join(lines), override=True)
+    log_applied('配置项[{}]补充配置: {}', key, ', '.join(line.split(':', 1)[0] for line in missing))
+    return True
 
 
 def extract_names(name: str) -> List[str]:
@@ -79,15 +222,16 @@ def extract_names(name: str) -> List[str]:
 
 
 def str_format(text: str, **kwargs):
-    """字符串格式化, 变量使用${}包裹"""
-    pattern = r'\${([^}]*)}'
-    express_names = re.findall(pattern, text)
-    if not express_names:
-        return text
-    for express_name in express_names:
-        if express_name in kwargs:
-            text = text.replace('${' + express_name + '}', str(kwargs[express_name]))
-    return text
+    """字符串格式化, 变量使用${}包裹, 模板按对象标识预编译缓存, 存在未定义变量时抛出TemplateVariableError"""
+    with phase('render'):
+        return render(text, **kwargs)
+
+
+def render_template(name: str, project_dir: Optional[str] = None, **kwargs) -> str:
+    """渲染模板文件, 项目内.seatools-codegen/templates下存在同名模板时优先使用, 模板名称见seatools.codegen.templates"""
+    with phase('render'):
+        return load_template(name, project_dir=project_dir).render(**kwargs)
+
 
 def unwrapper_dir_name(cus_dir: str):
     return cus_dir.strip(os.sep).split(os.sep)[-1]
@@ -0,0 +1,206 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from ..utils import atomic_write
+
+DEFAULT_DOCKER_COMPOSE = """version: '3'
+services:
+"""
+
+_SERVICES_KEY_PATTERN = re.compile(r'^services\s*:\s*(#.*)?$')
+_TOP_LEVEL_KEY_PATTERN = re.compile(r'^[^\s#]')
+# 服务名称行, 值可以在下一级缩进中, 也可以是同一行的行内值, 例如: '  redis: {image: redis}'
+_SERVICE_KEY_PATTERN = re.compile(r'''^(\s+)(?:"([^"]+)"|'([^']+)'|([^\s:#'"][^:#]*?))\s*:(?:\s.*)?$''')
+
+
+def parse_service(script: str) -> Tuple[str, int]:
+    """解析docker-compose服务配置片段的服务名称与缩进, 片段首行需为服务名称, 例如: '  xxx:'"""
+    first_line = script.lstrip('\r\n').split('\n')[0].rstrip('\r')
+    match = _SERVICE_KEY_PATTERN.match(first_line)
+    if not match:
+        raise ValueError('无法解析docker-compose服务[{}]的名称'.format(first_line))
+    return next(group for group in match.groups()[1:4] if group is not None), len(match.group(1))
+
+
+def _reindent(lines: List[str], from_indent: int, to_indent: int) -> List[str]:
+    """按服务名称缩进比例调整配置片段缩进, 使新增服务与文件已有服务的缩进风格一致"""
+    if from_indent == to_indent or from_indent <= 0:
+        return lines
+    new_lines = []
+    for line in lines:
+        if line.strip():
+            current = len(line) - len(line.lstrip(' '))
+            line = ' ' * (current * to_indent // from_indent) + line.lstrip(' ')
+        new_lines.append(line)
+    return new_lines
+
+
+class DockerComposeServices:
+    """docker-compose.yml中services的服务合并器
+
+    加载时按YAML缩进结构解析services下的各服务并按服务名称建立索引, 新增与更新的服务先缓存在内存中,
+    调用flush时一次性合并并原子写入, 未变更的服务及文件其余内容保持原样.
+    """
+
+    def __init__(self, docker_compose_yml: str, content: str, exists: bool = True):
+        self.docker_compose_yml = docker_compose_yml
+        self.exists = exists
+        self.newline = '\r\n' if '\r\n' in content else '\n'
+        self._lines: List[str] = content.splitlines(keepends=True)
+        self._services_index: Optional[int] = None
+        self._service_indent = 2
+        # key: 服务名称, value: 服务配置在文件中的行范围[start, end)
+        self._services: Dict[str, Tuple[int, int]] = {}
+        # 待新增的服务, key: 服务名称, value: 服务配置行
+        self._pending_adds: Dict[str, List[str]] = {}
+        # 待更新的服务, key: 服务名称, value: 服务配置行
+        self._pending_updates: Dict[str, List[str]] = {}
+        self._parse()
+
+    @classmethod
+    def load(cls, project_dir: str) -> 'DockerComposeServices':
+        """加载项目的docker-compose.yml, 文件不存在时基于默认内容创建, 在flush时写入"""
+        docker_compose_yml = project_dir + os.sep + 'docker-compose.yml'
+        if not os.path.exists(docker_compose_yml):
+            return cls(docker_compose_yml, DEFAULT_DOCKER_COMPOSE, exists=False)
+        with open(docker_compose_yml, 'r', encoding='utf-8', newline='') as f:
+            return cls(docker_compose_yml, f.read())
+
+    def _parse(self):
+        self._services_index = None
+        self._services = {}
+        for index, line in enumerate(self._lines):
+            if _SERVICES_KEY_PATTERN.match(line.rstrip('\r\n')):
+                self._services_index = index
+                break
+        if self._services_index is None:
+            return
+        service_indent = None
+        current: Optional[str] = None
+        start = 0
+        end = len(self._lines)
+        for index in range(self._services_index + 1, len(self._lines)):
+            line = self._lines[index].rstrip('\r\n')
+            if _TOP_LEVEL_KEY_PATTERN.match(line):
+                end = index
+                break
+            match = _SERVICE_KEY_PATTERN.match(line)
+            if not match:
+                continue
+            indent = len(match.group(1))
+            if service_indent is None:
+                service_indent = indent
+            if indent != service_indent:
+                continue
+            if current is not None:
+                self._services[current] = (start, index)
+            current = next(group for group in match.groups()[1:4] if group is not None)
+            start = index
+        if current is not None:
+            self._services[current] = (start, end)
+        if service_indent is not None:
+            self._service_indent = service_indent
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._services or name in self._pending_adds
+
+    @property
+    def names(self) -> List[str]:
+        """已存在的服务名称"""
+        return list(self._services)
+
+    def get(self, name: str) -> Optional[str]:
+        """获取已存在的服务配置"""
+        if name not in self._services:
+            return None
+        start, end = self._services[name]
+        return ''.join(self._lines[start:end])
+
+    def _script_lines(self, script: str) -> List[str]:
+        _, indent = parse_service(script)
+        lines = [line + self.newline for line in script.strip('\r\n').replace('\r\n', '\n').split('\n')]
+        return _reindent(lines, indent, self._service_indent)
+
+    def merge(self, script: str, update: bool = False) -> str:
+        """合并服务配置
+
+        Args:
+            script: 服务配置片段
+            update: 服务已存在时是否以新配置原地更新
+
+        Returns:
+            added: 新增, updated: 更新, unchanged: 已存在且无需变更
+        """
+        name, _ = parse_service(script)
+        lines = self._script_lines(script)
+        if name in self._pending_adds:
+            if not update:
+                return 'unchanged'
+            self._pending_adds[name] = lines
+            return 'added'
+        if name not in self._services:
+            self._pending_adds[name] = lines
+            return 'added'
+        if not update:
+            return 'unchanged'
+        start, end = self._services[name]
+        current = [line.rstrip('\r\n') for line in self._lines[start:end]]
+        while current and not current[-1].strip():
+            current.pop()
+        if current == [line.rstrip('\r\n') for line in lines]:
+            self._pending_updates.pop(name, None)
+            return 'unchanged'
+        self._pending_updates[name] = lines
+        return 'updated'
+
+    @property
+    def pending(self) -> Tuple[List[str], List[str]]:
+        """待写入的服务名称, (新增的服务名称, 更新的服务名称)"""
+        return list(self._pending_adds), list(self._pending_updates)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending_adds or self._pending_updates) or not self.exists
+
+    def render(self) -> str:
+        """渲染合并后的文件内容"""
+        lines = list(self._lines)
+        # 先由后向前原地替换更新的服务, 保证前面服务的行号不变, 保留服务后的空行
+        for name, (start, end) in sorted(self._services.items(), key=lambda item: item[1][0], reverse=True):
+            if name not in self._pending_updates:
+                continue
+            while end > start + 1 and not lines[end - 1].strip():
+                end -= 1
+            lines[start:end] = self._pending_updates[name]
+        if self._pending_adds:
+            if self._services_index is None:
+                if lines and not lines[-1].endswith(('\n', '\r')):
+                    lines[-1] += self.newline
+                lines.append('services:' + self.newline)
+                services_index = len(lines) - 1
+            else:
+                services_index = self._services_index
+                if not lines[services_index].endswith(('\n', '\r')):
+                    lines[services_index] += self.newline
+            # 新服务依次插入在services:下方, 后添加的在前, 服务之间空行分隔
+            new_lines = []
+            for service_lines in reversed(list(self._pending_adds.values())):
+                new_lines.extend(service_lines)
+                new_lines.append(self.newline)
+            lines[services_index + 1:services_index + 1] = new_lines
+        return ''.join(lines)
+
+    def flush(self) -> Tuple[List[str], List[str]]:
+        """原子写入合并后的文件, 返回(新增的服务名称, 更新的服务名称)"""
+        if not self.dirty:
+            return [], []
+        content = self.render()
+        atomic_write(self.docker_compose_yml, content, newline='')
+        added, updated = list(self._pending_adds), list(self._pending_updates)
+        self.exists = True
+        self._lines = content.splitlines(keepends=True)
+        self._pending_adds = {}
+        self._pending_updates = {}
+        self._parse()
+        return added, updated
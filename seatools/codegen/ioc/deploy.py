@@ -0,0 +1,41 @@
+import os
+
+from .common import create_file, add_docker_compose_script, render_template, unwrapper_dir_name
+
+
+def generate_bin_script(project_dir: str, name: str, process_name: str, run_command: str, override: bool = False):
+    """生成bin目录下的部署脚本, 拉取代码、安装依赖、终止运行中的进程后执行命令
+
+    Args:
+        project_dir: 项目目录
+        name: 脚本名称, 生成bin/{name}.sh
+        process_name: 需要终止的进程名称, 即poetry脚本名称
+        run_command: 执行命令, 可包含多行
+        override: 是否覆盖文件
+    """
+    bin_file = project_dir + os.sep + 'bin' + os.sep + name + '.sh'
+    create_file(bin_file, render_template('deploy/service.sh', project_dir,
+                                          project_name=unwrapper_dir_name(project_dir),
+                                          process_name=process_name, run_command=run_command), override=override)
+
+
+def generate_dockerfile(project_dir: str, name: str, command: str, install: str = '', override: bool = False):
+    """生成{name}.Dockerfile
+
+    Args:
+        project_dir: 项目目录
+        name: Dockerfile名称
+        command: CMD指令内容
+        install: 安装项目依赖后额外执行的指令, 需包含结尾的空行
+        override: 是否覆盖文件
+    """
+    dockerfile_file = project_dir + os.sep + name + '.Dockerfile'
+    create_file(dockerfile_file, render_template('deploy/Dockerfile', project_dir, install=install, command=command),
+                override=override)
+
+
+def add_web_service(project_dir: str, service_name: str, override: bool = False):
+    """新增暴露8000端口的web服务docker-compose配置, 使用{service_name}.Dockerfile构建"""
+    add_docker_compose_script(project_dir, render_template('deploy/web-service.yml', project_dir,
+                                                           project_name=unwrapper_dir_name(project_dir),
+                                                           service_name=service_name), override=override)
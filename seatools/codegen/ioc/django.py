@@ -1,13 +1,18 @@
 import os
 from typing import Optional
 
-from .common import mkdir, create_file, add_poetry_script, str_format, add_docker_compose_script, unwrapper_dir_name
+from .common import mkdir, create_file, add_poetry_script, render_template, str_format, unwrapper_dir_name
+from .deploy import generate_bin_script, generate_dockerfile, add_web_service
+from .web import uvicorn_template_options, generate_metrics, generate_compression, METRICS_REQUIRES, \
+    COMPRESSION_REQUIRES
 
 
 def generate_django(project_dir: str, package_dir: str, override: bool = False,
                     docker: Optional[bool] = False,
                     docker_compose: Optional[bool] = False,
                     app: Optional[str] = None,
+                    metrics: Optional[bool] = False,
+                    compress: Optional[bool] = False,
                     *args, **kwargs):
     """生成django模板代码
 
@@ -18,6 +23,10 @@ def generate_django(project_dir: str, package_dir: str, override: bool = False,
         docker: 是否生成docker相关文件
         docker_compose: 是否生成docker-compose相关文件
         app: 指定应用
+        metrics: 是否生成请求指标, 生成metrics目录下基于prometheus_client多进程模式的指标及微基准、
+                 django/metrics.py的中间件(MIDDLEWARE首位)及/metrics接口
+        compress: 是否生成响应压缩, 生成compression目录下的压缩器及微基准、django/compression.py的中间件
+                  (位于请求指标中间件之后, 其余中间件之前), 按客户端支持选择zstd、br或gzip压缩
     """
     project_name = unwrapper_dir_name(project_dir)
     package_name = unwrapper_dir_name(package_dir)
@@ -34,6 +43,14 @@ def generate_django(project_dir: str, package_dir: str, override: bool = False,
         manage_py = django_dir + os.sep + 'manage.py'
         mkdir(django_dir)
         create_file(django_init_py, override=override)
+        if metrics:
+            generate_metrics(project_dir, package_dir, override=override)
+            create_file(django_dir + os.sep + 'metrics.py', render_template(
+                'django/metrics.py', project_dir, package_name=package_name), override=override)
+        if compress:
+            generate_compression(project_dir, package_dir, override=override)
+            create_file(django_dir + os.sep + 'compression.py', render_template(
+                'django/compression.py', project_dir, package_name=package_name), override=override)
         create_file(asgi_py, '''"""
 ASGI config for {name} project.
 
@@ -110,7 +127,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
-MIDDLEWARE = [
+MIDDLEWARE = [${metrics_middleware}${compression_middleware}
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -192,7 +209,11 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-''', name=name, project_dir=project_dir, package_name=package_name), override=override)
+''', name=name, project_dir=project_dir, package_name=package_name,
+            metrics_middleware="\n    '{}.django.metrics.PrometheusMiddleware',".format(name) if metrics else '',
+            compression_middleware="\n    '{}.django.compression.CompressionMiddleware',".format(name)
+            if compress else ''),
+            override=override)
         create_file(urls_py, '''"""
 URL configuration for {name} project.
 
@@ -211,11 +232,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-
+{metrics_import}
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('admin/', admin.site.urls),{metrics_url}
 ]
-'''.format(name=name), override=override)
+'''.format(name=name,
+           metrics_import='\nfrom {}.django.metrics import metrics\n'.format(name) if metrics else '',
+           metrics_url="\n    path('metrics', metrics)," if metrics else ''), override=override)
         create_file(manage_py, '''import os
 import sys
 from typing import List
@@ -285,21 +308,22 @@ from typing import Optional
 from ${package_name}.boot import start
 
 
-@click.command()
+${uvicorn_options}@click.command()
 @click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
 @click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
 @click.option('-h', '--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
 @click.option('-p', '--port', default=8000, help='服务端口')
 @click.option('-w', '--workers', default=1, help='工作进程数')
 @click.option('--reload', default=None, help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
-@click.version_option(version="1.0.0", help='查看命令版本')
+${uvicorn_click_options}@click.version_option(version="1.0.0", help='查看命令版本')
 @click.help_option('-h', '--help', help='查看命令帮助')
 def main(project_dir: Optional[str] = None,
          host: Optional[str] = '127.0.0.1',
          port: Optional[int] = 8000,
          workers: Optional[int] = 1,
          env: Optional[str] = 'dev',
-         reload: Optional[bool] = None) -> None:
+         reload: Optional[bool] = None,
+         **options) -> None:
     """Django cmd."""
     if project_dir:
         os.environ['PROJECT_DIR'] = project_dir
@@ -310,14 +334,15 @@ def main(project_dir: Optional[str] = None,
     start()
 
     # start django server
-    uvicorn.run('${package_name}.django.asgi:application', host=host, port=port, workers=workers, reload=reload)
+    uvicorn.run('${package_name}.django.asgi:application', host=host, port=port, workers=workers, reload=reload,
+                **uvicorn_options(env, **options))
 
 
 if __name__ == "__main__":
     # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
     multiprocessing.freeze_support()
     main()
-''', package_name=package_name), override=override)
+''', package_name=package_name, **uvicorn_template_options(project_dir)), override=override)
 
         runserver_poetry_script_name = '{}_django_runserver'.format(app) if app else 'django_runserver'
 
@@ -326,101 +351,22 @@ if __name__ == "__main__":
             package_name=package_name, runserver_poetry_script_name=runserver_poetry_script_name,
         ))
 
-        bin_dir = project_dir + os.sep + 'bin'
-        bin_file = bin_dir + os.sep + 'django.sh'
-        create_file(bin_file, str_format('''# 获取脚本文件目录
-BIN_DIR=$(dirname "$(readlink -f "$0")")
-# 获取项目目录
-PROJECT_DIR=$(dirname "$BIN_DIR")
-echo "当前项目路径: $PROJECT_DIR"
-# 进入目录
-cd "$PROJECT_DIR"
-echo "切换到项目目录: $PROJECT_DIR"
-echo "拉取最新项目代码"
-git pull
-echo "切换虚拟环境"
-source venv/bin/activate
-echo "开始安装生产环境依赖"
-poetry install --only main
-echo "安装生产环境依赖完成"
-echo "开始检查是否已存在运行中的进程"
-pids=$(pgrep -f '${project_name}/venv/bin/django')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-pids=$(pgrep -f '${project_name}-[A-Za-z0-9_\\\\-]*-py3.[0-9]+/bin/django')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-# 执行命令
-echo "开始执行命令"
-# 执行命令
-nohup poetry run ${runserver_poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 2 >> /dev/null 2>&1 &
-echo "执行成功"
-echo "退出虚拟环境"
-deactivate
-''', project_name=project_name, runserver_poetry_script_name=runserver_poetry_script_name), override=override)
+        generate_bin_script(project_dir, 'django', process_name='django', run_command=str_format(
+            '# 执行命令\n'
+            'nohup poetry run ${runserver_poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 2 '
+            '>> /dev/null 2>&1 &', runserver_poetry_script_name=runserver_poetry_script_name), override=override)
 
         if docker or docker_compose:
-            dockerfile_file = project_dir + os.sep + 'django.Dockerfile'
-            create_file(dockerfile_file, str_format('''FROM python:3.9
-
-WORKDIR /app
-
-COPY . /app
-
-# 系统时区改为上海
-RUN ln -snf /usr/share/zoneinfo/Asia/Shanghai /etc/localtime && echo "Asia/Shanghai" > /etc/timezone
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple pip
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple poetry
-
-RUN poetry lock
-
-RUN poetry install --only main
-
-RUN poetry add django
-
-CMD poetry run ${runserver_poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 2
-''', project_name=project_name, runserver_poetry_script_name=runserver_poetry_script_name), override=override)
+            install = 'RUN poetry add django uvicorn[standard]{}{}\n\n'.format(
+                METRICS_REQUIRES if metrics else '', COMPRESSION_REQUIRES if compress else '')
+            generate_dockerfile(project_dir, 'django', install=install,
+                                command=str_format('poetry run ${runserver_poetry_script_name} --host 0.0.0.0 --port 8000 '
+                                                   '--env pro --workers 2',
+                                                   runserver_poetry_script_name=runserver_poetry_script_name),
+                                override=override)
 
         if docker_compose:
-            add_docker_compose_script(project_dir, str_format('''  django:
-    container_name: ${project_name}_django
-    build:
-      context: .
-      dockerfile: django.Dockerfile
-    image: ${project_name}_django:latest
-    volumes:
-      - ".:/app"
-    ports:
-      - "8000:8000"
-    environment:
-      - PYTHONPATH=/app
-''', project_name=project_name))
+            add_web_service(project_dir, 'django', override=override)
 
     gen_django_dir()
     gen_django_cmd()
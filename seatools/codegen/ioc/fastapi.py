@@ -1,7 +1,27 @@
 import os
-from typing import Optional
-
-from .common import mkdir, create_file, add_poetry_script, add_docker_compose_script, unwrapper_dir_name, str_format
+from typing import List, Optional
+
+from loguru import logger
+
+from .common import mkdir, create_file, unwrapper_dir_name, render_template, add_application_config
+from .web import generate_uvicorn_cmd, generate_gunicorn_cmd, generate_response_cache, generate_metrics, \
+    generate_compression, SERVERS, CACHE_BACKENDS, METRICS_REQUIRES, COMPRESSION_REQUIRES
+
+# 命令行工具的项目依赖启动模式, key: 模式, value: 命令行工具模板
+# default: 命令与应用导入时各启动一次; single: 每个进程仅在导入应用时启动一次; prefork: 主进程启动后fork工作进程
+BOOT_MODES = {
+    'default': 'web/uvicorn_main.py',
+    'single': 'fastapi/single_main.py',
+    'prefork': 'fastapi/prefork_main.py',
+}
+# 高性能JSON序列化库, 生成基于该库的fastapi/responses.py响应类
+JSON_LIBRARIES = ('orjson', 'msgspec')
+# 由应用lifespan管理的连接池, key: 连接池, value: (模块名称即配置项名称, bean类型, Dockerfile额外安装的依赖)
+POOLS = {
+    'sqlalchemy-async': ('sqlalchemy_pool', 'SqlAlchemyPool', ' sqlalchemy[asyncio] aiosqlite'),
+    'redis': ('redis_pool', 'RedisPool', ' redis'),
+    'httpx': ('httpx_pool', 'HttpxPool', ' httpx'),
+}
 
 
 def generate_fastapi(project_dir: str, package_dir: str, override: bool = False,
@@ -9,6 +29,13 @@ def generate_fastapi(project_dir: str, package_dir: str, override: bool = False,
                      docker_compose: Optional[bool] = True,
                      app: Optional[str] = None,
                      starter: Optional[bool] = False,
+                     boot: Optional[str] = 'default',
+                     server: Optional[str] = 'uvicorn',
+                     json_library: Optional[str] = None,
+                     pools: Optional[List[str]] = None,
+                     cache: Optional[str] = None,
+                     metrics: Optional[bool] = False,
+                     compress: Optional[bool] = False,
                      *args, **kwargs):
     """生成fastapi模板代码
 
@@ -20,10 +47,65 @@ def generate_fastapi(project_dir: str, package_dir: str, override: bool = False,
         docker_compose: 是否生成docker-compose相关文件
         starter: 是否生成基于starter的代码
         app: 特定应用
+        boot: 项目依赖启动模式, default: 默认, single: 每个进程仅启动一次, prefork: 主进程启动一次后fork工作进程,
+              starter模式下忽略
+        server: 运行方式, uvicorn: 基于uvicorn运行, gunicorn: 基于gunicorn + UvicornWorker运行, 主进程预加载应用,
+                项目依赖仅启动一次, 忽略boot参数, 不支持starter模式
+        json_library: 高性能JSON序列化库, orjson或msgspec, 生成fastapi/responses.py并作为应用的默认响应类, 不支持starter模式
+        pools: 连接池列表, 可选sqlalchemy-async, redis, httpx, 生成pools目录下的连接池配置与bean、fastapi/lifespan.py应用生命周期
+               及config/application.yml配置, 不支持starter模式
+        cache: 响应缓存, memory: 进程内TTL + LRU缓存, redis: 进程内缓存 + Redis二级缓存(自动添加redis连接池),
+               生成caches/response_cache.py及fastapi/cache.py的cached装饰器并应用于示例接口, 不支持starter模式
+        metrics: 是否生成请求指标, 生成metrics目录下基于prometheus_client多进程模式的指标及微基准、
+                 fastapi/metrics.py的ASGI中间件及/metrics接口, 不支持starter模式
+        compress: 是否生成响应压缩, 生成compression目录下的压缩器及微基准、fastapi/compression.py的ASGI中间件,
+                  按客户端支持选择zstd、br或gzip压缩, 不支持starter模式
     """
+    boot = boot or 'default'
+    server = server or 'uvicorn'
+    if boot not in BOOT_MODES:
+        logger.error('不支持的启动模式: {}, 支持的启动模式: {}', boot, ', '.join(BOOT_MODES))
+        return
+    if server not in SERVERS:
+        logger.error('不支持的运行方式: {}, 支持的运行方式: {}', server, ', '.join(SERVERS))
+        return
+    if json_library and json_library not in JSON_LIBRARIES:
+        logger.error('不支持的JSON序列化库: {}, 支持的JSON序列化库: {}', json_library, ', '.join(JSON_LIBRARIES))
+        return
+    if cache and cache not in CACHE_BACKENDS:
+        logger.error('不支持的响应缓存: {}, 支持的响应缓存: {}', cache, ', '.join(CACHE_BACKENDS))
+        return
+    pools = list(dict.fromkeys([pools] if isinstance(pools, str) else pools or []))
+    # Redis二级缓存复用redis连接池
+    if cache == 'redis' and 'redis' not in pools:
+        pools.append('redis')
+    unknown_pools = [pool for pool in pools if pool not in POOLS]
+    if unknown_pools:
+        logger.error('不支持的连接池: {}, 支持的连接池: {}', ', '.join(unknown_pools), ', '.join(POOLS))
+        return
+    if starter:
+        unsupported = [name for name, enabled in (('gunicorn运行方式', server == 'gunicorn'),
+                                                  ('JSON序列化库', json_library), ('连接池', pools),
+                                                  ('响应缓存', cache), ('请求指标', metrics),
+                                                  ('响应压缩', compress)) if enabled]
+        if unsupported:
+            logger.error('starter模式不支持{}', ', '.join(unsupported))
+            return
     project_name = unwrapper_dir_name(project_dir)
     package_name = unwrapper_dir_name(package_dir)
 
+    def gen_pools():
+        """生成连接池bean及配置"""
+        pools_dir = package_dir + os.sep + 'pools'
+        mkdir(pools_dir)
+        create_file(pools_dir + os.sep + '__init__.py', override=override)
+        for pool in pools:
+            module_name = POOLS[pool][0]
+            create_file(pools_dir + os.sep + module_name + '.py',
+                        render_template('pools/{}.py'.format(module_name), project_dir), override=override)
+            add_application_config(project_dir, module_name, render_template('pools/{}.yml'.format(module_name),
+                                                                             project_dir))
+
     def gen_fastapi_dir():
         """生成fastapi目录"""
         fastapi_dir = package_dir + os.sep + 'fastapi'
@@ -31,327 +113,74 @@ def generate_fastapi(project_dir: str, package_dir: str, override: bool = False,
         fastapi_app_py = fastapi_dir + os.sep + 'app.py'
         mkdir(fastapi_dir)
         create_file(fastapi_init_py, override=override)
-        create_file(fastapi_app_py, str_format("""from fastapi import FastAPI
-from seatools.models import R
-
-from ${package_name}.boot import start
-
-# 启动项目依赖
-start()
-
-# app
-app = FastAPI(
-    title='${project_name}',
-)
-
-
-@app.get('/')
-def hello():
-    return R.ok(data='Hello ${project_name} by FastAPI!')
-
-""", package_name=package_name, project_name=project_name), override=override)
-
-
-    def gen_fastapi_cmd():
-        """生成fastapi命令行工具"""
-        cmd_dir = package_dir + os.sep + 'cmd'
-        fastapi_cmd_main_py = cmd_dir + os.sep + 'fastapi_main.py'
-        create_file(fastapi_cmd_main_py, str_format('''import os
-import multiprocessing
-import click
-import uvicorn
-from typing import Optional
-
-from ${package_name}.boot import start
-
-
-@click.command()
-@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
-@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
-@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
-@click.option('--port', default=8000, help='服务端口')
-@click.option('--workers', default=1, help='工作进程数')
-@click.option('--reload', default=None, help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def main(project_dir: Optional[str] = None,
-         host: Optional[str] = '127.0.0.1',
-         port: Optional[int] = 8000,
-         workers: Optional[int] = 1,
-         env: Optional[str] = 'dev',
-         reload: Optional[bool] = None) -> None:
-    """FastAPI cmd."""
-    if project_dir:
-        os.environ['PROJECT_DIR'] = project_dir
-    if env:
-        os.environ['ENV'] = env
-
-    # start ioc
-    start()
-
-    # start uvicorn
-    uvicorn.run('${package_name}.fastapi.app:app', host=host, port=port, workers=workers, reload=reload)
-
-
-if __name__ == "__main__":
-    # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
-    multiprocessing.freeze_support()
-    main()
-''', package_name=package_name), override=override)
-
-        poetry_script_name =  '{}_fastapi'.format(app) if app else 'fastapi'
-
-        add_poetry_script(project_dir, str_format(
-            '${poetry_script_name} = "${package_name}.cmd.fastapi_main:main"',
-            package_name=package_name, poetry_script_name=poetry_script_name,
-        ))
-
-        bin_dir = project_dir + os.sep + 'bin'
-        bin_file = bin_dir + os.sep + 'fastapi.sh'
-        create_file(bin_file, str_format('''# 获取脚本文件目录
-BIN_DIR=$(dirname "$(readlink -f "$0")")
-# 获取项目目录
-PROJECT_DIR=$(dirname "$BIN_DIR")
-echo "当前项目路径: $PROJECT_DIR"
-# 进入目录
-cd "$PROJECT_DIR"
-echo "切换到项目目录: $PROJECT_DIR"
-echo "拉取最新项目代码"
-git pull
-echo "切换虚拟环境"
-source venv/bin/activate
-echo "开始安装生产环境依赖"
-poetry install --only main
-echo "安装生产环境依赖完成"
-echo "开始检查是否已存在运行中的进程"
-pids=$(pgrep -f '${project_name}/venv/bin/fastapi')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-pids=$(pgrep -f '${project_name}-[A-Za-z0-9_\\\\-]*-py3.[0-9]+/bin/fastapi')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-# 执行命令
-echo "开始执行命令"
-# 执行命令 --workers 工作进程数, 正式环境可根据CPU核数设置
-nohup poetry run ${poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 4 >> /dev/null 2>&1 &
-echo "执行成功"
-echo "退出虚拟环境"
-deactivate
-''', project_name=project_name, poetry_script_name=poetry_script_name), override=override)
-        if docker or docker_compose:
-            dockerfile_file = project_dir + os.sep + 'fastapi.Dockerfile'
-            create_file(dockerfile_file, str_format('''FROM python:3.9
-
-WORKDIR /app
-
-COPY . /app
-
-# 系统时区改为上海
-RUN ln -snf /usr/share/zoneinfo/Asia/Shanghai /etc/localtime && echo "Asia/Shanghai" > /etc/timezone
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple pip
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple poetry
-
-RUN poetry lock
-
-RUN poetry install --only main
-
-RUN poetry add fastapi uvicorn[standard]
-
-CMD ["poetry", "run", "${poetry_script_name}", "--env", "pro", "--host", "0.0.0.0", "--port", "8000", "--workers", "4"]
-''', poetry_script_name=poetry_script_name), override=override)
-
-        if docker_compose:
-            add_docker_compose_script(project_dir, str_format('''  fastapi:
-    container_name: ${project_name}_fastapi
-    build:
-      context: .
-      dockerfile: fastapi.Dockerfile
-    image: ${project_name}_fastapi:latest
-    volumes:
-      - ".:/app"
-    ports:
-      - "8000:8000"
-    environment:
-      - PYTHONPATH=/app
-''', project_name=project_name))
-
-    def gen_fastapi_starter_cmd():
-        """生成fastapi starter命令行工具"""
-        cmd_dir = package_dir + os.sep + 'cmd'
-        fastapi_cmd_main_py = cmd_dir + os.sep + 'fastapi_main.py'
-        create_file(fastapi_cmd_main_py, str_format('''import os
-import multiprocessing
-import click
-from seatools.ioc.starters import uvicorn
-from typing import Optional
-
-from ${package_name}.boot import start
-
-
-@click.command()
-@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
-@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
-@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
-@click.option('--port', default=8000, help='服务端口')
-@click.option('--workers', default=1, help='工作进程数')
-@click.option('--reload', default=None, help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def main(project_dir: Optional[str] = None,
-         host: Optional[str] = '127.0.0.1',
-         port: Optional[int] = 8000,
-         workers: Optional[int] = 1,
-         env: Optional[str] = 'dev',
-         reload: Optional[bool] = None) -> None:
-    """FastAPI cmd."""
-    if project_dir:
-        os.environ['PROJECT_DIR'] = project_dir
-    if env:
-        os.environ['ENV'] = env
-
-    # start ioc
-    start()
-
-    # start uvicorn
-    uvicorn.run('${package_name}.boot:start', host=host, port=port, workers=workers, reload=reload)
-
-
-if __name__ == "__main__":
-    # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
-    multiprocessing.freeze_support()
-    main()
-''', package_name=package_name), override=override)
-
-        poetry_script_name = '{}_fastapi'.format(app) if app else 'fastapi'
-
-        add_poetry_script(project_dir, str_format(
-            '${poetry_script_name} = "${package_name}.cmd.fastapi_main:main"',
-            package_name=package_name, poetry_script_name=poetry_script_name,
-        ))
-
-        bin_dir = project_dir + os.sep + 'bin'
-        bin_file = bin_dir + os.sep + 'fastapi.sh'
-        create_file(bin_file, str_format('''# 获取脚本文件目录
-BIN_DIR=$(dirname "$(readlink -f "$0")")
-# 获取项目目录
-PROJECT_DIR=$(dirname "$BIN_DIR")
-echo "当前项目路径: $PROJECT_DIR"
-# 进入目录
-cd "$PROJECT_DIR"
-echo "切换到项目目录: $PROJECT_DIR"
-echo "拉取最新项目代码"
-git pull
-echo "切换虚拟环境"
-source venv/bin/activate
-echo "开始安装生产环境依赖"
-poetry install --only main
-echo "安装生产环境依赖完成"
-echo "开始检查是否已存在运行中的进程"
-pids=$(pgrep -f '${project_name}/venv/bin/fastapi')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-pids=$(pgrep -f '${project_name}-[A-Za-z0-9_\\\\-]*-py3.[0-9]+/bin/fastapi')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-# 执行命令
-echo "开始执行命令"
-# 执行命令 --workers 工作进程数, 正式环境可根据CPU核数设置
-nohup poetry run ${poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 4 >> /dev/null 2>&1 &
-echo "执行成功"
-echo "退出虚拟环境"
-deactivate
-''', project_name=project_name, poetry_script_name=poetry_script_name), override=override)
-        if docker or docker_compose:
-            dockerfile_file = project_dir + os.sep + 'fastapi.Dockerfile'
-            create_file(dockerfile_file, str_format('''FROM python:3.9
-
-WORKDIR /app
-
-COPY . /app
-
-# 系统时区改为上海
-RUN ln -snf /usr/share/zoneinfo/Asia/Shanghai /etc/localtime && echo "Asia/Shanghai" > /etc/timezone
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple pip
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple poetry
-
-RUN poetry lock
-
-RUN poetry install --only main
-
-RUN poetry add fastapi uvicorn[standard]
-
-CMD ["poetry", "run", "${poetry_script_name}", "--env", "pro", "--host", "0.0.0.0", "--port", "8000", "--workers", "4"]
-''', poetry_script_name=poetry_script_name), override=override)
-
-        if docker_compose:
-            add_docker_compose_script(project_dir, str_format('''  fastapi:
-    container_name: ${project_name}_fastapi
-    build:
-      context: .
-      dockerfile: fastapi.Dockerfile
-    image: ${project_name}_fastapi:latest
-    volumes:
-      - ".:/app"
-    ports:
-      - "8000:8000"
-    environment:
-      - PYTHONPATH=/app
-''', project_name=project_name))
-
-    if starter:
-        gen_fastapi_starter_cmd()
+        app_kwargs = dict(imports='', app_options='', app_setup='', hello_decorators='',
+                          hello_response="R.ok(data='Hello {} by FastAPI!')".format(project_name))
+        if json_library:
+            create_file(fastapi_dir + os.sep + 'responses.py',
+                        render_template('fastapi/{}_responses.py'.format(json_library), project_dir), override=override)
+            app_kwargs.update(imports='from {}.fastapi.responses import FastJSONResponse\n'.format(package_name),
+                              app_options='\n    default_response_class=FastJSONResponse,',
+                              hello_response="FastJSONResponse(R.ok(data='Hello {} by FastAPI!'))".format(project_name))
+        if pools:
+            gen_pools()
+            create_file(fastapi_dir + os.sep + 'lifespan.py', render_template(
+                'fastapi/lifespan.py', project_dir,
+                imports=''.join('from {}.pools.{} import {}\n'.format(package_name, *POOLS[pool][:2])
+                                for pool in pools),
+                pools=', '.join('Autowired(cls={})'.format(POOLS[pool][1]) for pool in pools),
+            ), override=override)
+            app_kwargs['imports'] += 'from {}.fastapi.lifespan import lifespan\n'.format(package_name)
+            app_kwargs['app_options'] += '\n    lifespan=lifespan,'
+        if cache:
+            generate_response_cache(project_dir, package_dir,
+                                    redis_options="\n  key_prefix: 'response_cache:{}:'".format(package_name)
+                                    if cache == 'redis' else '',
+                                    override=override)
+            create_file(fastapi_dir + os.sep + 'cache.py', render_template(
+                'fastapi/cache.py', project_dir, package_name=package_name,
+                imports=''.join(line.format(package_name) for line, enabled in (
+                    ('from {}.fastapi.responses import FastJSONResponse\n', json_library),
+                    ('from {}.pools.redis_pool import get_redis\n', cache == 'redis')) if enabled),
+                response_import='' if json_library else 'from fastapi.responses import JSONResponse\n',
+                response_class='FastJSONResponse' if json_library else 'JSONResponse',
+                redis_client='get_redis()' if cache == 'redis' else 'None',
+            ), override=override)
+            app_kwargs['imports'] += 'from {}.fastapi.cache import cached\n'.format(package_name)
+            app_kwargs['hello_decorators'] = '@cached()\n'
+        # 后添加的中间件位于外层, 请求指标需在响应压缩之后添加以统计压缩耗时
+        if compress:
+            generate_compression(project_dir, package_dir, override=override)
+            create_file(fastapi_dir + os.sep + 'compression.py', render_template(
+                'fastapi/compression.py', project_dir, package_name=package_name), override=override)
+            app_kwargs['imports'] += 'from {}.fastapi.compression import CompressionMiddleware\n'.format(package_name)
+            app_kwargs['app_setup'] += '# 响应压缩\napp.add_middleware(CompressionMiddleware)\n'
+        if metrics:
+            generate_metrics(project_dir, package_dir, override=override)
+            create_file(fastapi_dir + os.sep + 'metrics.py', render_template(
+                'fastapi/metrics.py', project_dir, package_name=package_name), override=override)
+            app_kwargs['imports'] += 'from {}.fastapi.metrics import PrometheusMiddleware, metrics\n'.format(
+                package_name)
+            app_kwargs['app_setup'] += ('# 请求指标, 访问/metrics获取全部工作进程的指标\n'
+                                       'app.add_middleware(PrometheusMiddleware)\n'
+                                       "app.add_route('/metrics', metrics, include_in_schema=False)\n")
+        create_file(fastapi_app_py, render_template('fastapi/app.py', project_dir,
+                                                    package_name=package_name, project_name=project_name,
+                                                    **app_kwargs),
+                    override=override)
+
+    if not starter:
+        gen_fastapi_dir()
+    app_path = '{}.fastapi.app:app'.format(package_name)
+    requires = (' ' + json_library if json_library else '') + ''.join(POOLS[pool][2] for pool in pools) \
+        + (METRICS_REQUIRES if metrics else '') + (COMPRESSION_REQUIRES if compress else '')
+    if server == 'gunicorn':
+        generate_gunicorn_cmd(project_dir, package_dir, 'fastapi', 'FastAPI', app_path,
+                              # uvicorn.workers已弃用, 使用独立的uvicorn-worker包
+                              worker_class='uvicorn_worker.UvicornWorker',
+                              workers='multiprocessing.cpu_count()',
+                              install='RUN poetry add fastapi gunicorn uvicorn[standard] uvicorn-worker{}\n\n'.format(requires),
+                              override=override, docker=docker, docker_compose=docker_compose, app=app)
         return
-    gen_fastapi_dir()
-    gen_fastapi_cmd()
+    generate_uvicorn_cmd(project_dir, package_dir, 'fastapi', 'FastAPI', app_path,
+                         override=override, docker=docker, docker_compose=docker_compose, app=app, starter=starter,
+                         main_template=BOOT_MODES[boot], requires=requires)
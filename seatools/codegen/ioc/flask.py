@@ -1,7 +1,22 @@
 import os
 from typing import Optional
 
-from .common import mkdir, create_file, add_poetry_script, add_docker_compose_script, unwrapper_dir_name, str_format
+from loguru import logger
+
+from .common import mkdir, create_file, unwrapper_dir_name, render_template
+from .web import generate_uvicorn_cmd, generate_gunicorn_cmd, generate_waitress_cmd, generate_response_cache, \
+    generate_metrics, generate_compression, SERVERS, CACHE_BACKENDS, METRICS_REQUIRES, COMPRESSION_REQUIRES
+
+# flask运行方式, uvicorn为wsgi转asgi运行, 其余为原生wsgi运行
+FLASK_SERVERS = (*SERVERS, 'waitress')
+# gunicorn原生wsgi工作进程类型, key: 工作进程类型, value: (默认工作进程数表达式, 额外配置, 额外依赖, 启动命令main函数前置代码)
+WSGI_WORKER_CLASSES = {
+    'gthread': ('multiprocessing.cpu_count() * 2 + 1', '# 每个工作进程的线程数\nthreads = 4\n', '', ''),
+    # gevent需在主进程预加载应用前打补丁, 项目依赖启动时会扫描导入启动命令模块, 补丁仅在执行命令时打
+    'gevent': ('multiprocessing.cpu_count()', '# 每个工作进程的最大并发连接数\nworker_connections = 1000\n', ' gevent',
+               '    # 主进程预加载应用前打补丁, 项目依赖启动时会扫描导入本模块, 补丁不能在模块导入时打\n'
+               '    from gevent import monkey\n    monkey.patch_all()\n\n'),
+}
 
 
 def generate_flask(project_dir: str, package_dir: str, override: bool = False,
@@ -9,6 +24,11 @@ def generate_flask(project_dir: str, package_dir: str, override: bool = False,
                    docker_compose: Optional[bool] = False,
                    app: Optional[str] = None,
                    starter: Optional[bool] =  False,
+                   server: Optional[str] = 'uvicorn',
+                   worker_class: Optional[str] = 'gthread',
+                   cache: Optional[str] = None,
+                   metrics: Optional[bool] = False,
+                   compress: Optional[bool] = False,
                    *args, **kwargs):
     """生成flask模板代码
 
@@ -20,7 +40,34 @@ def generate_flask(project_dir: str, package_dir: str, override: bool = False,
         docker_compose: 是否生成docker-compose相关文件
         starter: 是否生成基于starter的代码
         app: 指定应用
+        server: 运行方式, uvicorn: 基于uvicorn运行(wsgi转asgi), gunicorn: 基于gunicorn原生wsgi工作进程运行,
+                主进程预加载应用, 项目依赖仅启动一次, waitress: 基于waitress单进程多线程原生wsgi运行,
+                原生wsgi运行方式额外生成与wsgi转asgi对比的微基准flask/benchmark.py, 不支持starter模式
+        worker_class: gunicorn工作进程类型, gthread: 多线程, gevent: 协程
+        cache: 响应缓存, memory: 进程内TTL + LRU缓存, redis: 进程内缓存 + Redis二级缓存,
+               生成caches/response_cache.py及flask/cache.py的cached装饰器并应用于示例接口, 不支持starter模式
+        metrics: 是否生成请求指标, 生成metrics目录下基于prometheus_client多进程模式的指标及微基准、
+                 flask/metrics.py的请求钩子及/metrics接口, 不支持starter模式
+        compress: 是否生成响应压缩, 生成compression目录下的压缩器及微基准、flask/compression.py的请求钩子,
+                  按客户端支持选择zstd、br或gzip压缩, 不支持starter模式
     """
+    server = server or 'uvicorn'
+    worker_class = worker_class or 'gthread'
+    if server not in FLASK_SERVERS:
+        logger.error('不支持的运行方式: {}, 支持的运行方式: {}', server, ', '.join(FLASK_SERVERS))
+        return
+    if worker_class not in WSGI_WORKER_CLASSES:
+        logger.error('不支持的工作进程类型: {}, 支持的工作进程类型: {}', worker_class, ', '.join(WSGI_WORKER_CLASSES))
+        return
+    if cache and cache not in CACHE_BACKENDS:
+        logger.error('不支持的响应缓存: {}, 支持的响应缓存: {}', cache, ', '.join(CACHE_BACKENDS))
+        return
+    if server != 'uvicorn' and starter:
+        logger.error('starter模式不支持{}运行方式', server)
+        return
+    if starter and (cache or metrics or compress):
+        logger.error('starter模式不支持响应缓存、请求指标及响应压缩')
+        return
     project_name = unwrapper_dir_name(project_dir)
     package_name = unwrapper_dir_name(package_dir)
 
@@ -31,329 +78,58 @@ def generate_flask(project_dir: str, package_dir: str, override: bool = False,
         flask_app_py = flask_dir + os.sep + 'app.py'
         mkdir(flask_dir)
         create_file(flask_init_py, override=override)
-        create_file(flask_app_py, str_format('''from flask import Flask
-from seatools.models import R
-from uvicorn.middleware.wsgi import WSGIMiddleware
-
-from ${package_name}.boot import start
-
-# 启动项目依赖
-start()
-
-app = Flask(__name__)
-
-
-@app.get('/')
-def hello():
-    return R.ok(data='Hello ${project_name} by Flask!').model_dump()
-
-
-# wsgi 转 asgi
-asgi_app = WSGIMiddleware(app)
-''', package_name=package_name, project_name=project_name), override=override)
-
-    def gen_flask_cmd():
-        """生成flask命令行工具"""
-        cmd_dir = package_dir + os.sep + 'cmd'
-        flask_cmd_main_py = cmd_dir + os.sep + 'flask_main.py'
-        create_file(flask_cmd_main_py, str_format('''import os
-import multiprocessing
-import click
-import uvicorn
-from typing import Optional
-
-from ${package_name}.boot import start
-
-
-@click.command()
-@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
-@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
-@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
-@click.option('--port', default=8000, help='服务端口')
-@click.option('--workers', default=1, help='工作进程数')
-@click.option('--reload', default=None, help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def main(project_dir: Optional[str] = None,
-         env: Optional[str] = 'dev',
-         host: Optional[str] = '127.0.0.1',
-         port: Optional[int] = 8000,
-         workers: Optional[int] = 1,
-         reload: Optional[bool] = None) -> None:
-    """Flask cmd."""
-    if project_dir:
-        os.environ['PROJECT_DIR'] = project_dir
-    if env:
-        os.environ['ENV'] = env
-
-    # start ioc
-    start()
-
-    # start uvicorn
-    uvicorn.run('${package_name}.flask.app:asgi_app', host=host, port=port, workers=workers, reload=reload)
-
-
-if __name__ == "__main__":
-    # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
-    multiprocessing.freeze_support()
-    main()
-''', package_name=package_name), override=override)
-
-        poetry_script_name = '{}_flask'.format(app) if app else 'flask'
-
-        add_poetry_script(project_dir, str_format(
-            '${poetry_script_name} = "${package_name}.cmd.flask_main:main"',
-            package_name=package_name, poetry_script_name=poetry_script_name
-        ))
-
-        bin_dir = project_dir + os.sep + 'bin'
-        bin_file = bin_dir + os.sep + 'flask.sh'
-        create_file(bin_file, str_format('''# 获取脚本文件目录
-BIN_DIR=$(dirname "$(readlink -f "$0")")
-# 获取项目目录
-PROJECT_DIR=$(dirname "$BIN_DIR")
-echo "当前项目路径: $PROJECT_DIR"
-# 进入目录
-cd "$PROJECT_DIR"
-echo "切换到项目目录: $PROJECT_DIR"
-echo "拉取最新项目代码"
-git pull
-echo "切换虚拟环境"
-source venv/bin/activate
-echo "开始安装生产环境依赖"
-poetry install --only main
-echo "安装生产环境依赖完成"
-echo "开始检查是否已存在运行中的进程"
-pids=$(pgrep -f '${project_name}/venv/bin/flask')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-pids=$(pgrep -f '${project_name}-[A-Za-z0-9_\\\\-]*-py3.[0-9]+/bin/flask')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-# 执行命令
-echo "开始执行命令"
-# 执行命令 --workers 工作进程数, 正式环境可根据CPU核数设置
-nohup poetry run ${poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 4 >> /dev/null 2>&1 &
-echo "执行成功"
-echo "退出虚拟环境"
-deactivate
-''', project_name=project_name, poetry_script_name=poetry_script_name), override=override)
-
-        if docker or docker_compose:
-            dockerfile_path = project_dir + os.sep + 'flask.Dockerfile'
-            create_file(dockerfile_path, str_format('''FROM python:3.9
-
-WORKDIR /app
-
-COPY . /app
-
-# 系统时区改为上海
-RUN ln -snf /usr/share/zoneinfo/Asia/Shanghai /etc/localtime && echo "Asia/Shanghai" > /etc/timezone
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple pip
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple poetry
-
-RUN poetry lock
-
-RUN poetry install --only main
-
-RUN poetry add flask uvicorn[standard]
-
-CMD ["poetry", "run", "${poetry_script_name}", "--env", "pro", "--host", "0.0.0.0", "--port", "8000", "--workers", "4"]
-''', poetry_script_name=poetry_script_name), override=override)
-
-        if docker_compose:
-            add_docker_compose_script(project_dir, str_format('''  flask:
-    container_name: ${project_name}_flask
-    build:
-      context: .
-      dockerfile: flask.Dockerfile
-    image: ${project_name}_flask:latest
-    volumes:
-      - ".:/app"
-    ports:
-      - "8000:8000"
-    environment:
-      - PYTHONPATH=/app
-''', project_name=project_name))
-
-    def gen_flask_starter_cmd():
-        """生成flask starter命令行工具"""
-        cmd_dir = package_dir + os.sep + 'cmd'
-        flask_cmd_main_py = cmd_dir + os.sep + 'flask_main.py'
-        create_file(flask_cmd_main_py, str_format('''import os
-import multiprocessing
-import click
-from seatools.ioc.starters import uvicorn
-from typing import Optional
-
-from ${package_name}.boot import start
-
-
-@click.command()
-@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
-@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
-@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
-@click.option('--port', default=8000, help='服务端口')
-@click.option('--workers', default=1, help='工作进程数')
-@click.option('--reload', default=None, help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def main(project_dir: Optional[str] = None,
-         env: Optional[str] = 'dev',
-         host: Optional[str] = '127.0.0.1',
-         port: Optional[int] = 8000,
-         workers: Optional[int] = 1,
-         reload: Optional[bool] = None) -> None:
-    """Flask cmd."""
-    if project_dir:
-        os.environ['PROJECT_DIR'] = project_dir
-    if env:
-        os.environ['ENV'] = env
-
-    # start ioc
-    start()
-
-    # start uvicorn
-    uvicorn.run('${package_name}.boot:start', host=host, port=port, workers=workers, reload=reload)
-
-
-if __name__ == "__main__":
-    # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
-    multiprocessing.freeze_support()
-    main()
-''', package_name=package_name), override=override)
-
-        poetry_script_name = '{}_flask'.format(app) if app else 'flask'
-
-        add_poetry_script(project_dir, str_format(
-            '${poetry_script_name} = "${package_name}.cmd.flask_main:main"',
-            package_name=package_name, poetry_script_name=poetry_script_name
-        ))
-
-        bin_dir = project_dir + os.sep + 'bin'
-        bin_file = bin_dir + os.sep + 'flask.sh'
-        create_file(bin_file, str_format('''# 获取脚本文件目录
-BIN_DIR=$(dirname "$(readlink -f "$0")")
-# 获取项目目录
-PROJECT_DIR=$(dirname "$BIN_DIR")
-echo "当前项目路径: $PROJECT_DIR"
-# 进入目录
-cd "$PROJECT_DIR"
-echo "切换到项目目录: $PROJECT_DIR"
-echo "拉取最新项目代码"
-git pull
-echo "切换虚拟环境"
-source venv/bin/activate
-echo "开始安装生产环境依赖"
-poetry install --only main
-echo "安装生产环境依赖完成"
-echo "开始检查是否已存在运行中的进程"
-pids=$(pgrep -f '${project_name}/venv/bin/flask')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-pids=$(pgrep -f '${project_name}-[A-Za-z0-9_\\\\-]*-py3.[0-9]+/bin/flask')
-if [ -z "$pids" ]; then
-  echo "无正在运行中的进程, 忽略"
-else
-  # 通过for循环遍历所有进程ID
-  for pid in $pids; do
-    echo "存在正在运行中的进程: $pid, 即将终止进程..."
-    kill "$pid" # 使用引号以确保ID作为参数正确传递
-    if [ $? -eq 0 ]; then
-      echo "进程: $pid 已被成功终止"
-    else
-      echo "进程: $pid 终止失败"
-    fi
-  done
-fi
-# 执行命令
-echo "开始执行命令"
-# 执行命令 --workers 工作进程数, 正式环境可根据CPU核数设置
-nohup poetry run ${poetry_script_name} --host 0.0.0.0 --port 8000 --env pro --workers 4 >> /dev/null 2>&1 &
-echo "执行成功"
-echo "退出虚拟环境"
-deactivate
-''', project_name=project_name, poetry_script_name=poetry_script_name), override=override)
-
-        if docker or docker_compose:
-            dockerfile_path = project_dir + os.sep + 'flask.Dockerfile'
-            create_file(dockerfile_path, str_format('''FROM python:3.9
-
-WORKDIR /app
-
-COPY . /app
-
-# 系统时区改为上海
-RUN ln -snf /usr/share/zoneinfo/Asia/Shanghai /etc/localtime && echo "Asia/Shanghai" > /etc/timezone
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple pip
-
-RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple poetry
-
-RUN poetry lock
-
-RUN poetry install --only main
-
-RUN poetry add flask uvicorn[standard]
-
-CMD ["poetry", "run", "${poetry_script_name}", "--env", "pro", "--host", "0.0.0.0", "--port", "8000", "--workers", "4"]
-''', poetry_script_name=poetry_script_name), override=override)
-
-        if docker_compose:
-            add_docker_compose_script(project_dir, str_format('''  flask:
-    container_name: ${project_name}_flask
-    build:
-      context: .
-      dockerfile: flask.Dockerfile
-    image: ${project_name}_flask:latest
-    volumes:
-      - ".:/app"
-    ports:
-      - "8000:8000"
-    environment:
-      - PYTHONPATH=/app
-''', project_name=project_name))
-
-    if starter:
-        gen_flask_starter_cmd()
+        app_kwargs = dict(imports='', app_setup='', hello_decorators='')
+        if cache:
+            redis_options = "\n  key_prefix: 'response_cache:{}:'\n  redis_url: 'redis://127.0.0.1:6379/0'".format(
+                package_name)
+            generate_response_cache(project_dir, package_dir, redis_options=redis_options if cache == 'redis' else '',
+                                    override=override)
+            create_file(flask_dir + os.sep + 'cache.py', render_template(
+                'flask/cache.py', project_dir, package_name=package_name), override=override)
+            app_kwargs.update(imports='from {}.flask.cache import cached\n'.format(package_name),
+                              hello_decorators='@cached()\n')
+        if metrics:
+            generate_metrics(project_dir, package_dir, override=override)
+            create_file(flask_dir + os.sep + 'metrics.py', render_template(
+                'flask/metrics.py', project_dir, package_name=package_name), override=override)
+            app_kwargs['imports'] += 'from {}.flask.metrics import init_metrics\n'.format(package_name)
+            app_kwargs['app_setup'] += '# 请求指标, 访问/metrics获取全部工作进程的指标\ninit_metrics(app)\n'
+        if compress:
+            generate_compression(project_dir, package_dir, override=override)
+            create_file(flask_dir + os.sep + 'compression.py', render_template(
+                'flask/compression.py', project_dir, package_name=package_name), override=override)
+            app_kwargs['imports'] += 'from {}.flask.compression import init_compression\n'.format(package_name)
+            app_kwargs['app_setup'] += '# 响应压缩\ninit_compression(app)\n'
+        # 原生wsgi运行, 无需wsgi转asgi
+        create_file(flask_app_py, render_template('flask/app.py' if server == 'uvicorn' else 'flask/wsgi_app.py',
+                                                  project_dir,
+                                                  package_name=package_name, project_name=project_name,
+                                                  **app_kwargs),
+                    override=override)
+        if server != 'uvicorn':
+            create_file(flask_dir + os.sep + 'benchmark.py', render_template(
+                'flask/benchmark.py', project_dir, package_name=package_name), override=override)
+
+    if not starter:
+        gen_flask_dir()
+    app_path = '{}.flask.app:app'.format(package_name)
+    extra_requires = (' redis' if cache == 'redis' else '') + (METRICS_REQUIRES if metrics else '') \
+        + (COMPRESSION_REQUIRES if compress else '')
+    if server == 'gunicorn':
+        workers, worker_options, requires, prelude = WSGI_WORKER_CLASSES[worker_class]
+        generate_gunicorn_cmd(project_dir, package_dir, 'flask', 'Flask', app_path,
+                              worker_class=worker_class,
+                              workers=workers,
+                              worker_options=worker_options,
+                              install='RUN poetry add flask gunicorn{}{}\n\n'.format(requires, extra_requires),
+                              prelude=prelude,
+                              override=override, docker=docker, docker_compose=docker_compose, app=app)
+        return
+    if server == 'waitress':
+        generate_waitress_cmd(project_dir, package_dir, 'flask', 'Flask', app_path,
+                              install='RUN poetry add flask waitress{}\n\n'.format(extra_requires),
+                              override=override, docker=docker, docker_compose=docker_compose, app=app)
         return
-    gen_flask_dir()
-    gen_flask_cmd()
+    generate_uvicorn_cmd(project_dir, package_dir, 'flask', 'Flask', '{}.flask.app:asgi_app'.format(package_name),
+                         override=override, docker=docker, docker_compose=docker_compose, app=app, starter=starter,
+                         requires=extra_requires)
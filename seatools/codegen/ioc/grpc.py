@@ -1,20 +1,240 @@
+import hashlib
+import json
 import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from loguru import logger
-from .common import mkdir, create_file
+from .common import mkdir, create_file, move_file, path_exists
+from .plan import current_plan, file_plan
+from .profile import phase
+from ..utils import atomic_writer
 
+# proto文件数量超过该值时按CPU核数分片并行编译, 否则单次protoc调用编译全部文件
+PARALLEL_THRESHOLD = 32
+# 代码生成工具目录, 相对项目目录, 存放本地增量生成缓存及编译临时目录, 无需提交, 目录内生成忽略全部文件的.gitignore
+CODEGEN_DIR = '.seatools-codegen'
+_CODEGEN_GITIGNORE = '# seatools-codegen本地增量生成缓存及编译临时目录, 无需提交, 缺失时重新全量生成\n*\n'
+# 增量生成缓存文件, 相对项目目录
+GRPC_LOCK_FILE = CODEGEN_DIR + os.sep + 'grpc.lock'
+_GRPC_LOCK_VERSION = 1
 
-def generate_grpc(project_dir: str, package_dir: str, override: bool = False,
-                  name: str = None,
-                  pyi: bool = False,
-                  **kwargs):
-    """生成grpc代码命令"""
+# protoc生成的proto包导入语句, 例如: from proto.a import b_pb2 as proto_dot_a_dot_b__pb2
+_PROTO_IMPORT_PATTERN = re.compile(r'^(\s*)from\s+(proto(?:\.\w+)*)\s+import(?=\s)')
+_IMPORT_PATTERN = re.compile(r'^\s*import\s+(?:public\s+|weak\s+)?["\']([^"\']+)["\']\s*;', re.MULTILINE)
+
+
+def parse_proto_imports(content: str) -> List[str]:
+    """解析proto文件的import路径"""
+    return _IMPORT_PATTERN.findall(content)
+
+
+class ProtoHasher:
+    """计算proto文件及其传递依赖的内容哈希, 依赖基于src目录解析, 不在src目录下的依赖(例如google/protobuf)仅记录路径"""
+
+    def __init__(self, src_dir: str):
+        self.src_dir = src_dir
+        # key: 相对src目录的proto路径, value: 文件内容哈希, 文件不存在为None
+        self._content_hashes: Dict[str, Optional[str]] = {}
+        self._imports: Dict[str, List[str]] = {}
+        self._digests: Dict[str, str] = {}
+
+    def _load(self, proto_path: str):
+        if proto_path in self._content_hashes:
+            return
+        filepath = self.src_dir + os.sep + proto_path.replace('/', os.sep)
+        if not os.path.exists(filepath):
+            self._content_hashes[proto_path] = None
+            self._imports[proto_path] = []
+            return
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        self._content_hashes[proto_path] = hashlib.sha256(content).hexdigest()
+        self._imports[proto_path] = parse_proto_imports(content.decode('utf-8', errors='replace'))
+
+    def dependencies(self, proto_path: str) -> Set[str]:
+        """proto文件的传递依赖(含自身)"""
+        visited = set()
+        stack = [proto_path]
+        while stack:
+            current = stack.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            self._load(current)
+            stack.extend(self._imports[current])
+        return visited
+
+    def digest(self, proto_path: str) -> str:
+        """proto文件及其传递依赖的哈希"""
+        if proto_path not in self._digests:
+            sha256 = hashlib.sha256()
+            for dependency in sorted(self.dependencies(proto_path)):
+                sha256.update('{}={}\n'.format(dependency, self._content_hashes[dependency]).encode('utf-8'))
+            self._digests[proto_path] = sha256.hexdigest()
+        return self._digests[proto_path]
+
+
+def proto_dependents(src_dir: str, names: Iterable[str], changed: Iterable[str]) -> List[str]:
+    """names中自身或传递依赖包含changed的proto名称, 名称均为相对src/proto目录且不含.proto后缀的路径"""
+    hasher = ProtoHasher(src_dir)
+    changed_paths = {'proto/{}.proto'.format(name) for name in changed}
+    return [name for name in names if hasher.dependencies('proto/{}.proto'.format(name)) & changed_paths]
+
+
+def scan_protos(proto_dir: str) -> Dict[str, Tuple[int, int]]:
+    """扫描proto目录(含嵌套目录)下的proto文件, key: proto名称, value: (修改时间, 文件大小)"""
+    snapshot = {}
+    for root, _, files in os.walk(proto_dir):
+        for file in files:
+            if not file.endswith('.proto'):
+                continue
+            filepath = os.path.join(root, file)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            snapshot[os.path.relpath(filepath, proto_dir)[:-len('.proto')].replace(os.sep, '/')] = \
+                (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _load_lock(lock_file: str) -> Dict[str, dict]:
+    if not os.path.exists(lock_file):
+        return {}
+    try:
+        with open(lock_file, 'r', encoding='utf-8') as f:
+            lock = json.load(f)
+    except (OSError, ValueError):
+        logger.warning('grpc缓存文件[{}]读取失败, 忽略缓存', lock_file)
+        return {}
+    if lock.get('version') != _GRPC_LOCK_VERSION:
+        return {}
+    return lock.get('protos', {})
+
+
+def _dump_lock(protos: Dict[str, dict]) -> str:
+    return json.dumps({'version': _GRPC_LOCK_VERSION, 'protos': protos}, ensure_ascii=False, indent=2,
+                      sort_keys=True) + '\n'
+
+
+def _output_files(proto_dir: str, name: str, pyi: bool) -> List[str]:
+    prefix = proto_dir + os.sep + name.replace('/', os.sep)
+    outputs = [prefix + '_pb2.py', prefix + '_pb2_grpc.py']
+    if pyi:
+        outputs.append(prefix + '_pb2.pyi')
+    return outputs
+
+
+def _run_protoc(src_dir: str, grpc_dir: str, protobuf_files: List[str], pyi: bool) -> int:
+    """执行protoc编译, 返回protoc退出码, 需为模块级函数以支持进程池调用"""
+    from grpc_tools import protoc
+
+    args = [
+        "grpc_tools.protoc",
+        "-I{}".format(src_dir),
+        "--python_out={}".format(grpc_dir),
+        "--grpc_python_out={}".format(grpc_dir),
+    ]
+    if pyi:
+        args.append("--pyi_out={}".format(grpc_dir))
+    args.extend(protobuf_files)
+    return protoc.main(args)
+
+
+def _compile(src_dir: str, grpc_dir: str, protobuf_files: List[str], pyi: bool, jobs: Optional[int]) -> bool:
+    """编译proto文件, 文件较多时分片到进程池并行编译, 返回是否全部编译成功"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(protobuf_files) <= PARALLEL_THRESHOLD:
+        return _run_protoc(src_dir, grpc_dir, protobuf_files, pyi) == 0
+    jobs = min(jobs, len(protobuf_files))
+    shards = [protobuf_files[i::jobs] for i in range(jobs)]
+    logger.info('proto文件共{}个, 分{}片并行编译', len(protobuf_files), jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        codes = list(executor.map(_run_protoc, [src_dir] * jobs, [grpc_dir] * jobs, shards, [pyi] * jobs))
+    return all(code == 0 for code in codes)
+
+
+def _relative_module(package_parts: List[str], module: str) -> str:
+    """将proto包的绝对模块路径转换为相对于当前包的模块路径"""
+    module_parts = module.split('.')
+    common = 0
+    while common < min(len(package_parts), len(module_parts)) and package_parts[common] == module_parts[common]:
+        common += 1
+    return '.' * (len(package_parts) - common + 1) + '.'.join(module_parts[common:])
+
+
+def rewrite_proto_import(line: str, package_parts: List[str]) -> str:
+    """重写单行的proto包导入语句为相对导入, 例如proto/a/b_pb2_grpc.py中的'from proto.a import b_pb2'重写为'from . import b_pb2',
+    非proto包的导入原样返回"""
+    match = _PROTO_IMPORT_PATTERN.match(line)
+    if not match:
+        return line
+    return '{}from {} import{}'.format(match.group(1), _relative_module(package_parts, match.group(2)), line[match.end():])
+
+
+def rewrite_proto_imports(filepath: str, package_parts: List[str]) -> bool:
+    """流式重写生成文件中的proto包导入, 无需重写的文件不写入, 需要重写的文件写入临时文件后原子替换, 返回是否重写"""
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        if not any(rewrite_proto_import(line, package_parts) != line for line in f):
+            return False
+    with open(filepath, 'r', encoding='utf-8', newline='') as src, \
+            atomic_writer(filepath, encoding='utf-8', newline='') as dst:
+        for line in src:
+            dst.write(rewrite_proto_import(line, package_parts))
+    return True
+
+
+def _rewrite_outputs(proto_dir: str, name: str, pyi: bool):
+    """重写protoc生成文件的proto包导入"""
+    # name可为proto目录下的嵌套路径, 例如: a/b, 对应的包为proto.a
+    package_parts = ['proto', *name.split('/')[:-1]]
+    for output_file in _output_files(proto_dir, name, pyi):
+        if rewrite_proto_imports(output_file, package_parts):
+            logger.debug('重写文件导入: {}', output_file)
+
+
+def generate_grpc_batch(project_dir: str, package_dir: str, override: bool = False,
+                        names: List[str] = None,
+                        pyi: bool = False,
+                        jobs: Optional[int] = None,
+                        force: bool = False,
+                        **kwargs):
+    """批量生成grpc代码, 全部proto文件在一次protoc调用中编译, 文件较多时按CPU核数分片到进程池并行编译,
+    编译后的文件重写在线程池中并发执行.
+
+    基于.seatools-codegen/grpc.lock记录的proto文件及其传递依赖的内容哈希增量生成, 仅重新生成输入有变化的proto,
+    未变化的proto生成文件保持不变. grpc.lock为本地缓存, 无需提交, .seatools-codegen目录内生成的.gitignore忽略该目录.
+
+    protoc编译输出到.seatools-codegen下的临时目录, 导入重写完成后移动到grpc包目录, 与其余生成操作一样记录在文件生成计划中,
+    支持dry-run预览与失败回滚.
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        override: 是否覆盖grpc包的__init__.py文件
+        names: proto文件名称列表, 不含.proto后缀, src/proto下的嵌套目录使用/分隔, 例如: a/b
+        pyi: 是否生成pyi文件
+        jobs: 并行数, 默认CPU核数
+        force: 是否忽略缓存强制重新生成
+    """
     src_dir = project_dir + os.sep + 'src'
     protobuf_dir = src_dir + os.sep + 'proto'
-    protobuf_file = protobuf_dir + os.sep + '{}.proto'.format(name)
-    # 检查proto文件是否存在
-    if not os.path.exists(protobuf_file):
-        logger.error("文件: {} 不存在, 无法生成grpc pb2代码".format(protobuf_file))
+    names = list(dict.fromkeys(names or []))
+    # key: proto名称, value: proto文件路径
+    protobuf_files: Dict[str, str] = {}
+    for name in names:
+        protobuf_file = protobuf_dir + os.sep + '{}.proto'.format(name.replace('/', os.sep))
+        # 检查proto文件是否存在
+        if not os.path.exists(protobuf_file):
+            logger.error("文件: {} 不存在, 无法生成grpc pb2代码".format(protobuf_file))
+            return
+        protobuf_files[name] = protobuf_file
+    if not protobuf_files:
         return
 
     grpc_dir = package_dir + os.sep + 'grpc'
@@ -26,36 +246,135 @@ def generate_grpc(project_dir: str, package_dir: str, override: bool = False,
     proto_init_py = proto_dir + os.sep + '__init__.py'
     mkdir(proto_dir)
     create_file(proto_init_py, override=override)
+    # 嵌套proto目录同样需要作为包导入
+    for nested_dir in sorted({os.path.dirname(name) for name in names if '/' in name}):
+        nested_proto_dir = proto_dir
+        for part in nested_dir.split('/'):
+            nested_proto_dir = nested_proto_dir + os.sep + part
+            if not path_exists(nested_proto_dir + os.sep + '__init__.py'):
+                mkdir(nested_proto_dir)
+                create_file(nested_proto_dir + os.sep + '__init__.py', override=override)
 
-    from grpc_tools import protoc
+    lock_file = project_dir + os.sep + GRPC_LOCK_FILE
+    lock = {} if force else _load_lock(lock_file)
+    hasher = ProtoHasher(src_dir)
+    rel_grpc_dir = os.path.relpath(grpc_dir, project_dir).replace(os.sep, '/')
+    entries = {}
+    misses = []
+    for name in names:
+        proto_path = 'proto/{}.proto'.format(name)
+        entry = {'hash': hasher.digest(proto_path), 'pyi': pyi, 'grpc_dir': rel_grpc_dir}
+        entries[proto_path] = entry
+        if lock.get(proto_path) == entry and all(os.path.exists(file) for file in _output_files(proto_dir, name, pyi)):
+            continue
+        misses.append(name)
+    logger.info('grpc增量生成: 共{}个proto, 缓存命中{}个, 需重新生成{}个', len(names), len(names) - len(misses), len(misses))
+    if not misses:
+        return
 
-    args = [
-        "-I{}".format(src_dir),
-        "--python_out={}".format(grpc_dir),
-        "--grpc_python_out={}".format(grpc_dir),
-        "-I{}".format(src_dir),
-        protobuf_file,
-    ]
-    if pyi:
-        args.append("--pyi_out={}".format(grpc_dir))
-    protoc.main(args)
+    # 编译到与项目同一文件系统的临时目录, 保证移动到grpc包目录时为原子替换
+    staging_root = project_dir + os.sep + CODEGEN_DIR
+    os.makedirs(staging_root, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='grpc-', dir=staging_root)
+    plan = current_plan()
+    try:
+        with phase('protoc'):
+            compiled = _compile(src_dir, staging_dir, [protobuf_files[name] for name in misses], pyi, jobs)
+        if not compiled:
+            logger.error('protoc编译失败, 请检查proto文件')
+            return
 
+        # 重写文件导入
+        staging_proto_dir = staging_dir + os.sep + 'proto'
+        with ThreadPoolExecutor(max_workers=min(len(misses), jobs or os.cpu_count() or 1)) as executor:
+            for future in [executor.submit(_rewrite_outputs, staging_proto_dir, name, pyi) for name in misses]:
+                future.result()
 
+        # 内容未变化的生成文件不替换, 保留修改时间
+        for name in misses:
+            for staged, target in zip(_output_files(staging_proto_dir, name, pyi), _output_files(proto_dir, name, pyi)):
+                move_file(staged, target, override=True)
 
-    # 重写文件
-    grpc_pb2_file = proto_dir + os.sep + '{}_pb2.py'.format(name)
-    with open(grpc_pb2_file, 'r', encoding='utf-8') as f:
-        grpc_pb2_file_content = f.read()
-    create_file(grpc_pb2_file, grpc_pb2_file_content, override=True)
+        # 仅在生成成功后更新缓存
+        lock = _load_lock(lock_file)
+        for name in misses:
+            proto_path = 'proto/{}.proto'.format(name)
+            lock[proto_path] = entries[proto_path]
+        create_file(lock_file, _dump_lock(lock), override=True)
+        codegen_gitignore = staging_root + os.sep + '.gitignore'
+        if not path_exists(codegen_gitignore):
+            create_file(codegen_gitignore, _CODEGEN_GITIGNORE)
+    finally:
+        # 存在文件生成计划时临时目录在计划应用或丢弃后清理
+        if plan is not None:
+            plan.add_cleanup_dir(staging_dir)
+        else:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
-    grpc_pb2_grpc_file = proto_dir + os.sep + '{}_pb2_grpc.py'.format(name)
-    with open(grpc_pb2_grpc_file, 'r', encoding='utf-8') as f:
-        grpc_pb2_grpc_file_content = f.read()
-    grpc_pb2_grpc_file_content = grpc_pb2_grpc_file_content.replace('from proto', 'from .')
-    create_file(grpc_pb2_grpc_file, grpc_pb2_grpc_file_content, override=True)
 
-    if pyi:
-        grpc_pyi_file = proto_dir + os.sep + '{}_pb2.pyi'.format(name)
-        with open(grpc_pyi_file, 'r', encoding='utf-8') as f:
-            grpc_pyi_file_content = f.read()
-        create_file(grpc_pyi_file, grpc_pyi_file_content, override=True)
+def generate_grpc(project_dir: str, package_dir: str, override: bool = False,
+                  name: str = None,
+                  pyi: bool = False,
+                  **kwargs):
+    """生成grpc代码命令"""
+    generate_grpc_batch(project_dir, package_dir, override=override, names=[name], pyi=pyi, **kwargs)
+
+
+def watch_grpc(project_dir: str, package_dir: str, override: bool = False,
+               pyi: bool = False,
+               jobs: Optional[int] = None,
+               interval: float = 0.5,
+               debounce: float = 0.3,
+               **kwargs):
+    """监听src/proto目录, proto文件变更时仅重新生成变更的proto及依赖它的proto, 直到Ctrl+C停止.
+
+    按轮询修改时间检测变更, 变更后等待debounce秒内不再变化再生成, 避免编辑器保存时的多次写入触发多次生成.
+    每轮生成独立应用文件生成计划, 生成失败时记录错误并继续监听.
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        override: 是否覆盖grpc包的__init__.py文件
+        pyi: 是否生成pyi文件
+        jobs: 并行数, 默认CPU核数
+        interval: 轮询间隔(秒)
+        debounce: 防抖时间(秒)
+    """
+    src_dir = project_dir + os.sep + 'src'
+    proto_dir = src_dir + os.sep + 'proto'
+    snapshot = scan_protos(proto_dir)
+    with file_plan(isolated=True):
+        generate_grpc_batch(project_dir, package_dir, override, names=sorted(snapshot), pyi=pyi, jobs=jobs)
+    logger.info('开始监听proto目录[{}], 按Ctrl+C停止', proto_dir)
+    try:
+        while True:
+            time.sleep(interval)
+            current = scan_protos(proto_dir)
+            if current == snapshot:
+                continue
+            # 防抖: 等待文件在debounce时间内不再变化
+            while True:
+                time.sleep(debounce)
+                latest = scan_protos(proto_dir)
+                if latest == current:
+                    break
+                current = latest
+            changed = [name for name, stat in current.items() if snapshot.get(name) != stat]
+            removed = [name for name in snapshot if name not in current]
+            snapshot = current
+            for name in removed:
+                logger.warning('proto文件已删除: {}, 保留已生成的代码', name)
+            affected = proto_dependents(src_dir, sorted(current), [*changed, *removed])
+            if not affected:
+                continue
+            logger.info('检测到proto变更: {}, 重新生成: {}', ', '.join(changed or removed), ', '.join(affected))
+            start = time.perf_counter()
+            try:
+                with file_plan(isolated=True):
+                    generate_grpc_batch(project_dir, package_dir, override, names=affected, pyi=pyi, jobs=jobs)
+            except Exception as e:
+                logger.error('grpc代码生成失败: {}', e)
+                continue
+            logger.success('grpc代码生成完成, 耗时{:.0f}ms', (time.perf_counter() - start) * 1000)
+    except KeyboardInterrupt:
+        logger.info('停止监听proto目录')
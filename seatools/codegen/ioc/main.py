@@ -1,309 +1,102 @@
-import os
-from os.path import dirname
+import importlib
+from typing import Dict, List, Optional, Tuple
 
 import click
-from loguru import logger
-from typing import Optional
 
-from seatools.codegen.ioc import generate_app
-from .common import extract_names
-from .cmd import generate_cmd
-from .django import generate_django
-from .fastapi import generate_fastapi
-from .flask import generate_flask
-from .grpc import generate_grpc
-from .scrapy import generate_scrapy, generate_scrapy_spider
-from .task import generate_task
-from ..utils import find_project_dir, find_package_dir
-
-
-def _extract_project_package_dir(project_dir, package_dir):
-    project_dir = project_dir or find_project_dir(os.getcwd())
-    if not project_dir:
-        logger.error('无法找到项目目录')
-        exit(1)
-    package_dir = package_dir or find_package_dir(project_dir)
-    if not package_dir:
-        logger.error('无法找到包目录')
-        exit(1)
-    logger.info("项目目录: {}", project_dir)
-    logger.info("包目录: {}", package_dir)
-    return project_dir, package_dir
-
-
-def _extract_package_app_dir(package_dir, app):
-    if not app:
-        return package_dir
-    return dirname(package_dir) + os.sep + '_'.join(extract_names(app))
-
-
-@click.group()
+# 子命令注册表, key: 命令名称, value: (命令导入路径[模块:对象], 命令简介)
+# 子命令仅在首次调用时导入, 查看帮助时使用注册表中的简介, 不导入任何子命令模块
+LAZY_COMMANDS: Dict[str, Tuple[str, str]] = {
+    'startapp': ('seatools.codegen.ioc.commands.app:startapp', '创建新应用'),
+    'cmd': ('seatools.codegen.ioc.commands.cmd:cmd', '生成CMD命令行工具'),
+    'task': ('seatools.codegen.ioc.commands.task:task', '生成任务模板代码'),
+    'fastapi': ('seatools.codegen.ioc.commands.fastapi:fastapi', '生成FastAPI模板代码'),
+    'flask': ('seatools.codegen.ioc.commands.flask:flask', '生成Flask模板代码'),
+    'django': ('seatools.codegen.ioc.commands.django:django', '生成Django模板代码'),
+    'scrapy': ('seatools.codegen.ioc.commands.scrapy:scrapy', '生成Scrapy模板代码'),
+    'grpc': ('seatools.codegen.ioc.commands.grpc:grpc', '生成gRPC pb2代码'),
+    'apply': ('seatools.codegen.ioc.commands.apply:apply', '按清单批量生成代码'),
+    'serve': ('seatools.codegen.ioc.commands.serve:serve', '启动常驻代码生成服务(JSON行协议)'),
+}
+
+
+class LazyGroup(click.Group):
+    """延迟加载子命令的命令组"""
+
+    def __init__(self, *args, lazy_commands: Optional[Dict[str, Tuple[str, str]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self.add_command(self._load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name: str) -> click.Command:
+        import_path, _ = self.lazy_commands[cmd_name]
+        module_name, attr_name = import_path.split(':')
+        command = getattr(importlib.import_module(module_name), attr_name)
+        if not isinstance(command, click.Command):
+            raise TypeError('子命令[{}]导入对象[{}]不是click命令'.format(cmd_name, import_path))
+        return command
+
+    def invoke(self, ctx: click.Context):
+        # 单次命令调用内的全部生成操作记录在同一文件生成计划中, 命令结束后统一写入, 失败时回滚
+        from .plan import file_plan
+        from .profile import profiling
+        dry_run = ctx.params.get('dry_run', False)
+        profile_json = ctx.params.get('profile_json')
+        with profiling(enabled=ctx.params.get('profile', False) or bool(profile_json)) as profiler:
+            with file_plan(dry_run=dry_run) as plan:
+                rv = super().invoke(ctx)
+                if dry_run:
+                    click.echo(plan.diff() or '无文件变更', nl=False)
+        if profiler is not None:
+            self._output_profile(profiler, profile_json)
+        return rv
+
+    @staticmethod
+    def _output_profile(profiler, profile_json: Optional[str]):
+        if not profile_json:
+            click.echo(profiler.format(), err=True)
+        elif profile_json == '-':
+            click.echo(profiler.to_json())
+        else:
+            with open(profile_json, 'w', encoding='utf-8') as f:
+                f.write(profiler.to_json() + '\n')
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        rows = []
+        for cmd_name in self.list_commands(ctx):
+            if cmd_name in self.commands:
+                command = self.commands[cmd_name]
+                if command.hidden:
+                    continue
+                rows.append((cmd_name, command.get_short_help_str(formatter.width)))
+            else:
+                rows.append((cmd_name, self.lazy_commands[cmd_name][1]))
+        if rows:
+            with formatter.section('Commands'):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
+@click.option('--dry_run', '--dry-run', is_flag=True, default=False,
+              help='仅预览将要创建的目录与文件变更(unified diff), 不写入任何文件, 默认false')
 @click.version_option(version="1.0.0", help='查看命令版本')
 @click.help_option('-h', '--help', help='查看命令帮助')
-def main() -> None:
+@click.option('--profile', is_flag=True, default=False, envvar='SEATOOLS_CODEGEN_PROFILE',
+              help='输出各阶段(项目检索、模板渲染、文件写入、toml/yaml编辑、protoc编译)耗时及写入文件数与字节数, '
+                   '也可通过环境变量SEATOOLS_CODEGEN_PROFILE=1开启, 默认false')
+@click.option('--profile_json', '--profile-json', default=None, envvar='SEATOOLS_CODEGEN_PROFILE_JSON',
+              help='以JSON格式输出性能分析报告到指定文件, -为标准输出, 指定时自动开启性能分析, '
+                   '也可通过环境变量SEATOOLS_CODEGEN_PROFILE_JSON指定')
+def main(dry_run: bool = False, profile: bool = False, profile_json: Optional[str] = None) -> None:
     """代码生成命令行工具"""
     pass
 
 
-@main.command()
-@click.argument('app')
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='主包目录, 若不传则基于项目目录自动检索')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def startapp(app: str,
-             project_dir: Optional[str] = None,
-             package_dir: Optional[str] = None,
-             override: Optional[bool] = False) -> None:
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    logger.info("开始生成应用[{}]模板代码", app)
-    generate_app(project_dir=project_dir, package_dir=package_dir, override=override,
-                 app_name=app)
-    logger.info("生成应用[{}]模板代码完成", app)
-
-
-@main.command()
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
-@click.option('--docker_compose', is_flag=True, default=False,
-              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
-@click.option('--starter', is_flag=True, default=False, help='是否生成基于starter的代码')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def fastapi(project_dir: Optional[str] = None,
-            package_dir: Optional[str] = None,
-            override: Optional[bool] = False,
-            app: Optional[str] = None,
-            docker: Optional[bool] = False,
-            docker_compose: Optional[bool] = False,
-            starter: Optional[bool] = False) -> None:
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    logger.info('开始生成[fastapi]模板代码')
-    generate_fastapi(project_dir=project_dir, package_dir=package_dir, override=override,
-                     docker=docker,
-                     docker_compose=docker_compose,
-                     app=app,
-                     starter=starter)
-    logger.success('生成[fastapi]模板代码完成')
-
-
-@main.command()
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
-@click.option('--docker_compose', is_flag=True, default=False,
-              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
-@click.option('--starter', is_flag=True, default=False, help='是否生成基于starter的代码')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def flask(project_dir: Optional[str] = None,
-          package_dir: Optional[str] = None,
-          override: Optional[bool] = False,
-          app: Optional[str] = None,
-          docker: Optional[bool] = False,
-          docker_compose: Optional[bool] = False,
-          starter: Optional[bool] = False):
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    logger.info('开始生成[flask]模板代码')
-    generate_flask(project_dir=project_dir, package_dir=package_dir, override=override,
-                   docker=docker,
-                   docker_compose=docker_compose,
-                   app=app,
-                   starter=starter)
-    logger.success('生成[flask]模板代码完成')
-
-
-@main.command()
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.option('--task_class', '--class', '--module_name', '--module', default=None,
-              help='任务类名, 支持驼峰、下划线名称解析, 生成的文件名下划线分隔, 类名驼峰, 例如: HelloWorld, 生成task模板时必填该参数')
-@click.option('--task_name', '--name', default="默认任务", help='任务名称, 中英文任务描述, 默认值: 默认任务')
-@click.option('--is_async', '--async', is_flag=True, default=False, help='是否创建异步任务, 默认false')
-@click.option('--cmd', is_flag=True, default=False, help='是否生成对应的命令行入口')
-@click.option('--docker', is_flag=True, default=False,
-              help='cmd参数为true时该参数生效, 是否生成Dockerfile文件, 默认: false')
-@click.option('--docker_compose', is_flag=True, default=False,
-              help='cmd参数为true时该参数生效, 是否生成Dockerfile文件和docker-compose配置, 默认: false')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def task(project_dir: Optional[str] = None,
-         package_dir: Optional[str] = None,
-         override: Optional[bool] = False,
-         app: Optional[str] = None,
-         task_class: Optional[str] = None,
-         task_name: Optional[str] = "默认任务",
-         is_async: Optional[bool] = False,
-         cmd: Optional[bool] = False,
-         docker: Optional[bool] = False,
-         docker_compose: Optional[bool] = False) -> None:
-    if not task_class:
-        logger.error('[--task_class]参数不能为空')
-        return
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    generate_task(project_dir=project_dir, package_dir=package_dir,
-                  task_class=task_class, task_name=task_name,
-                  override=override, is_async=is_async, cmd=cmd,
-                  docker=docker, docker_compose=docker_compose)
-
-
-@main.group()
-@click.help_option('-h', '--help', help='查看命令帮助')
-def scrapy():
-    pass
-
-
-@scrapy.command('init')
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def scrapy_init(project_dir: Optional[str] = None,
-                package_dir: Optional[str] = None,
-                override: Optional[bool] = False,
-                app: Optional[str] = None):
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    generate_scrapy(project_dir=project_dir, package_dir=package_dir, override=override,
-                    app=app)
-
-
-@scrapy.command('genspider')
-@click.argument('name')
-@click.argument('domain')
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
-@click.option('--docker_compose', is_flag=True, default=False,
-              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def scrapy_genspider(name: str,
-                     domain: str,
-                     project_dir: Optional[str] = None,
-                     package_dir: Optional[str] = None,
-                     override: Optional[bool] = False,
-                     app: Optional[str] = None,
-                     docker: Optional[bool] = False,
-                     docker_compose: Optional[bool] = False):
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    generate_scrapy_spider(project_dir=project_dir, package_dir=package_dir,
-                           name=name, domain=domain, override=override,
-                           docker=docker,
-                           docker_compose=docker_compose,
-                           app=app)
-
-
-@main.command()
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
-@click.option('--docker_compose', is_flag=True, default=False,
-              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def django(project_dir: Optional[str] = None,
-           package_dir: Optional[str] = None,
-           override: Optional[bool] = False,
-           app: Optional[str] = None,
-           docker: Optional[bool] = False,
-           docker_compose: Optional[bool] = False):
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    generate_django(project_dir=project_dir,
-                    package_dir=package_dir,
-                    override=override,
-                    docker=docker,
-                    docker_compose=docker_compose,
-                    app=app)
-
-
-@main.command()
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option('--name', default=None, help='cmd命令名称, 使用poetry run {name} 执行生成的命令, 必填')
-@click.option("--app", default=None, help='startapp创建的应用名, 主应用无需填写')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.option('--docker', is_flag=True, default=False, help='是否生成Dockerfile文件, 默认: false')
-@click.option('--docker_compose', is_flag=True, default=False,
-              help='是否生成Dockerfile文件和docker-compose配置, 默认: false')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def cmd(name: str,
-        project_dir: Optional[str] = None,
-        package_dir: Optional[str] = None,
-        app: Optional[str] = None,
-        override: Optional[bool] = False,
-        docker: Optional[bool] = False,
-        docker_compose: Optional[bool] = False):
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    package_dir = _extract_package_app_dir(package_dir, app)
-    if not name:
-        logger.error('[--name]参数不能为空')
-        return
-    generate_cmd(project_dir=project_dir,
-                 package_dir=package_dir,
-                 override=override,
-                 command=name,
-                 docker=docker,
-                 docker_compose=docker_compose,
-                 app=app)
-
-
-@main.command()
-@click.option('--project_dir', default=None, help='项目目录, 默认从项目内的任意位置执行能够自动检索, 不传也可')
-@click.option('--package_dir', default=None, help='包目录, 若不传则基于项目目录自动检索')
-@click.option("--name", default=None,
-              help='protobuf文件名称, proto文件仅支持在src/proto目录下, 例如存在xxx.proto, 则name应该传递xxx, 若不传递该参数, 则默认将src/proto目录下所有proto文件一起生成')
-@click.option("--pyi", is_flag=True, default=False, help='是否生成pyi文件, 默认false不生成')
-@click.option('--override', is_flag=True, default=False,
-              help='是否覆盖代码, 不建议覆盖, 若要覆盖请确认覆盖代码是否对业务存在影响, 默认false')
-@click.version_option(version="1.0.0", help='查看命令版本')
-@click.help_option('-h', '--help', help='查看命令帮助')
-def grpc(project_dir: Optional[str] = None,
-         package_dir: Optional[str] = None,
-         name: Optional[str] = None, pyi: Optional[bool] = False, override: Optional[bool] = False):
-    project_dir, package_dir = _extract_project_package_dir(project_dir, package_dir)
-    proto_dir = project_dir + os.sep + 'src' + os.sep + 'proto'
-    if not os.path.exists(proto_dir):
-        logger.error("proto目录[{}]不存在, 无法生成pb2代码".format(proto_dir))
-        return
-    if not name:
-        import glob
-        names = [file.replace('.proto', '').split(os.sep)[-1] for file in glob.glob(os.path.join(proto_dir, '*.proto'))]
-    else:
-        names = [name]
-
-    for name in names:
-        generate_grpc(project_dir, package_dir, override, name, pyi=pyi)
-        # 仅第一次需要override, 防止多次重复override
-        override = False
-
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+import inspect
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .commands import extract_package_app_dir
+from .plan import file_plan
+
+# 清单支持的配置项及生成顺序, key: 清单配置项名称, value: (生成器导入名称, 字段别名映射)
+# 字段别名映射与命令行参数保持一致, 例如task的class等价于task_class
+_SECTIONS: Dict[str, Tuple[str, Dict[str, str]]] = {
+    'app': ('generate_app', {'name': 'app_name'}),
+    'scrapy': ('generate_scrapy', {}),
+    'spider': ('generate_scrapy_spider', {}),
+    'task': ('generate_task', {'class': 'task_class', 'module_name': 'task_class', 'module': 'task_class',
+                               'name': 'task_name', 'async': 'is_async'}),
+    'cmd': ('generate_cmd', {'name': 'command'}),
+    'fastapi': ('generate_fastapi', {'json': 'json_library', 'pool': 'pools'}),
+    'flask': ('generate_flask', {}),
+    'django': ('generate_django', {}),
+    'grpc': ('generate_grpc', {}),
+}
+
+# 清单全局配置项
+_GLOBAL_KEYS = ('project_dir', 'package_dir', 'override')
+
+# 各配置项的必填字段(别名转换后)
+_REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'app': ('app_name',),
+    'spider': ('name', 'domain'),
+    'task': ('task_class',),
+    'cmd': ('command',),
+    'grpc': ('name',),
+}
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """读取并校验生成清单, 清单格式错误时抛出ValueError
+
+    清单示例:
+        override = false
+
+        [[task]]
+        class = "hello_task"
+        name = "Hello任务"
+        cmd = true
+
+        [[spider]]
+        name = "hello"
+        domain = "hello.com"
+    """
+    import toml
+    from seatools.codegen import ioc
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = toml.load(f)
+    unknown_keys = [key for key in manifest if key not in _SECTIONS and key not in _GLOBAL_KEYS]
+    if unknown_keys:
+        raise ValueError('清单[{}]存在不支持的配置项: {}, 支持的配置项: {}'.format(
+            manifest_path, ', '.join(unknown_keys), ', '.join([*_GLOBAL_KEYS, *_SECTIONS])))
+    for section, (generator_name, aliases) in _SECTIONS.items():
+        if section not in manifest:
+            continue
+        fields = _entry_fields(section, getattr(ioc, generator_name))
+        entries = manifest[section]
+        # 单个表与表数组均支持
+        if isinstance(entries, dict):
+            entries = [entries]
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError('清单[{}]配置项[{}]必须为表或表数组'.format(manifest_path, section))
+        normalized_entries = []
+        for index, entry in enumerate(entries):
+            entry = {aliases.get(key, key): value for key, value in entry.items()}
+            unknown_fields = [key for key in entry if key not in fields]
+            if unknown_fields:
+                raise ValueError('清单[{}]配置项[{}]第{}项存在不支持的字段: {}, 支持的字段: {}'.format(
+                    manifest_path, section, index + 1, ', '.join(unknown_fields),
+                    ', '.join([*fields, *aliases])))
+            missing_fields = [field for field in _REQUIRED_FIELDS.get(section, ()) if not entry.get(field)]
+            if missing_fields:
+                raise ValueError('清单[{}]配置项[{}]第{}项缺少必填字段: {}'.format(
+                    manifest_path, section, index + 1, ', '.join(missing_fields)))
+            normalized_entries.append(entry)
+        manifest[section] = normalized_entries
+    return manifest
+
+
+def _entry_fields(section: str, generator) -> List[str]:
+    """配置项支持的字段(别名转换后), 生成器均接收**kwargs, 按生成器参数校验, 避免字段拼写错误被忽略后按默认值生成"""
+    fields = [name for name, param in inspect.signature(generator).parameters.items()
+              if name not in ('project_dir', 'package_dir')
+              and param.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)]
+    # 应用及grpc以外的配置项通过app指定生成到的应用, grpc代码固定生成在主包中
+    if section not in ('app', 'grpc') and 'app' not in fields:
+        fields.append('app')
+    return fields
+
+
+def apply_manifest(manifest: Dict[str, Any], project_dir: str, package_dir: str,
+                   override: bool = False) -> int:
+    """在单个进程内按清单批量生成代码, 全部生成操作记录在同一文件生成计划中, pyproject.toml与docker-compose.yml在全部生成完成后统一写入一次
+
+    Args:
+        manifest: load_manifest读取的清单
+        project_dir: 项目目录
+        package_dir: 主包目录
+        override: 是否覆盖文件, 清单内单项配置的override优先
+
+    Returns:
+        生成的代码项数量
+    """
+    from seatools.codegen import ioc
+
+    count = 0
+    with file_plan():
+        for section, (generator_name, _) in _SECTIONS.items():
+            entries: List[Dict[str, Any]] = manifest.get(section) or []
+            if not entries:
+                continue
+            if section == 'grpc':
+                count += _apply_grpc(entries, project_dir, package_dir, override)
+                continue
+            generator = getattr(ioc, generator_name)
+            for entry in entries:
+                kwargs = dict(entry)
+                kwargs.setdefault('override', override)
+                app = kwargs.get('app')
+                if section == 'app':
+                    entry_package_dir = package_dir
+                else:
+                    entry_package_dir = extract_package_app_dir(package_dir, app)
+                logger.info('开始生成[{}]: {}', section, entry)
+                generator(project_dir=project_dir, package_dir=entry_package_dir, **kwargs)
+                count += 1
+    return count
+
+
+def _apply_grpc(entries: List[Dict[str, Any]], project_dir: str, package_dir: str, override: bool) -> int:
+    """按pyi与override参数分组, 每组proto文件在一次grpc批量生成中编译, grpc代码固定生成在主包中"""
+    from .grpc import generate_grpc_batch
+
+    groups: Dict[Tuple[bool, bool], List[str]] = {}
+    for entry in entries:
+        key = (bool(entry.get('pyi', False)), bool(entry.get('override', override)))
+        groups.setdefault(key, []).append(entry['name'])
+    for (pyi, group_override), names in groups.items():
+        logger.info('开始生成[grpc]: {}', names)
+        generate_grpc_batch(project_dir, package_dir, override=group_override, names=names, pyi=pyi)
+    return len(entries)
+
+
+def manifest_dirs(manifest: Dict[str, Any], manifest_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """获取清单中配置的项目目录与包目录, 相对路径基于清单文件所在目录"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    dirs = []
+    for key in ('project_dir', 'package_dir'):
+        value = manifest.get(key)
+        dirs.append(os.path.normpath(os.path.join(base_dir, value)) if value else None)
+    return dirs[0], dirs[1]
@@ -0,0 +1,342 @@
+import difflib
+import hashlib
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from .compose import DockerComposeServices
+from .profile import count, current_profiler, phase
+from .pyproject import PoetryScriptRegistry
+from ..utils import atomic_write
+
+
+def _file_digest(filepath: str) -> Tuple[int, bytes]:
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return os.path.getsize(filepath), sha256.digest()
+
+
+def _encode(content: str, encoding: str) -> bytes:
+    # 与open写入时一致, 按平台换行符转换
+    return (content.replace('\n', os.linesep) if os.linesep != '\n' else content).encode(encoding)
+
+
+def file_changed(filepath: str, content: str, encoding='utf-8') -> bool:
+    """比较文件内容与磁盘文件是否不同, 先比较文件大小, 大小相同再比较内容哈希"""
+    data = _encode(content, encoding)
+    try:
+        if os.path.getsize(filepath) != len(data):
+            return True
+        return _file_digest(filepath)[1] != hashlib.sha256(data).digest()
+    except OSError:
+        return True
+
+
+def files_differ(filepath: str, other_filepath: str) -> bool:
+    """比较两个磁盘文件内容是否不同"""
+    try:
+        if os.path.getsize(filepath) != os.path.getsize(other_filepath):
+            return True
+        return _file_digest(filepath) != _file_digest(other_filepath)
+    except OSError:
+        return True
+
+
+class PlannedFile:
+    """计划写入的文件, 内容为content或已生成的source文件(应用计划时移动到目标路径)"""
+
+    __slots__ = ('path', 'content', 'source', 'encoding', 'override', 'if_changed', 'newline')
+
+    def __init__(self, path: str, content: Optional[str] = None, source: Optional[str] = None,
+                 encoding: str = 'utf-8', override: bool = False, if_changed: bool = True,
+                 newline: Optional[str] = None):
+        self.path = path
+        self.content = content
+        self.source = source
+        self.encoding = encoding
+        self.override = override
+        self.if_changed = if_changed
+        self.newline = newline
+
+    def action(self) -> str:
+        """计算文件操作, create: 创建, update: 覆盖, unchanged: 内容未变化, exists: 已存在不覆盖"""
+        if not os.path.exists(self.path):
+            return 'create'
+        if not self.override:
+            return 'exists'
+        if self.if_changed:
+            if self.source is not None:
+                changed = files_differ(self.path, self.source)
+            elif self.newline == '':
+                with open(self.path, 'r', encoding=self.encoding, newline='') as f:
+                    changed = f.read() != self.content
+            else:
+                changed = file_changed(self.path, self.content, encoding=self.encoding)
+            if not changed:
+                return 'unchanged'
+        return 'update'
+
+    def read_new(self) -> str:
+        if self.source is not None:
+            with open(self.source, 'r', encoding=self.encoding, errors='replace') as f:
+                return f.read()
+        return self.content
+
+    def write(self):
+        if current_profiler() is not None:
+            count('files_written')
+            count('bytes_written', os.path.getsize(self.source) if self.source is not None
+                  else len(self.content.encode(self.encoding)))
+        with phase('fs_write'):
+            if self.source is not None:
+                if os.path.exists(self.path):
+                    shutil.copymode(self.path, self.source)
+                os.replace(self.source, self.path)
+                return
+            atomic_write(self.path, self.content, encoding=self.encoding, newline=self.newline)
+
+
+class FilePlan:
+    """文件生成计划
+
+    生成器通过mkdir, create_file, add_poetry_script, add_docker_compose_script等方法在计划中记录要创建的目录、文件、
+    poetry脚本与docker-compose服务, 计划期间不写入任何文件, 最后由apply统一写入, 写入失败时回滚已写入的变更,
+    dry-run模式下可通过diff预览全部变更.
+    """
+
+    def __init__(self):
+        # 计划创建的目录, 保持顺序
+        self.dirs: Dict[str, None] = {}
+        # 计划写入的文件, key: 文件路径
+        self.files: Dict[str, PlannedFile] = {}
+        self.poetry_scripts: Dict[str, Optional[PoetryScriptRegistry]] = {}
+        self.docker_compose_services: Dict[str, DockerComposeServices] = {}
+        # 计划结束(应用或丢弃)后需要清理的临时目录
+        self._cleanup_dirs: List[str] = []
+        # 应用计划后实际执行的操作, (操作, 路径), 操作为mkdir, create, update
+        self.applied: List[Tuple[str, str]] = []
+        # 计划应用成功后输出的日志, (日志级别, 日志内容, 参数)
+        self.applied_logs: List[Tuple[str, str, tuple]] = []
+
+    def add_dir(self, dir_path: str):
+        self.dirs[dir_path] = None
+
+    def add_file(self, planned_file: PlannedFile):
+        existing = self.files.get(planned_file.path)
+        # 同一文件多次写入时与直接写入的语义一致: 后一次不覆盖则保留前一次内容
+        if existing is not None and not planned_file.override:
+            return False
+        self.files[planned_file.path] = planned_file
+        return True
+
+    def exists(self, path: str) -> bool:
+        """按计划执行后路径是否存在"""
+        return path in self.dirs or path in self.files or os.path.exists(path)
+
+    def add_cleanup_dir(self, dir_path: str):
+        self._cleanup_dirs.append(dir_path)
+
+    def poetry_script_registry(self, project_dir: str) -> Optional[PoetryScriptRegistry]:
+        """获取项目的poetry脚本注册表, 每个项目的pyproject.toml仅读取一次"""
+        if project_dir not in self.poetry_scripts:
+            self.poetry_scripts[project_dir] = PoetryScriptRegistry.load(project_dir)
+        return self.poetry_scripts[project_dir]
+
+    def docker_compose(self, project_dir: str) -> DockerComposeServices:
+        """获取项目的docker-compose服务合并器, 每个项目的docker-compose.yml仅读取一次"""
+        if project_dir not in self.docker_compose_services:
+            self.docker_compose_services[project_dir] = DockerComposeServices.load(project_dir)
+        return self.docker_compose_services[project_dir]
+
+    def _edit_files(self) -> Iterator[Tuple[PlannedFile, List[str]]]:
+        """pyproject.toml与docker-compose.yml的编辑转换为计划文件, 并附带变更说明"""
+        for registry in self.poetry_scripts.values():
+            if registry is not None and registry.pending:
+                with phase('edit'):
+                    content = registry.render()
+                yield (PlannedFile(registry.pyproject_toml, content, override=True, newline=''),
+                       ['新增poetry执行脚本: [poetry run {}]'.format(name) for name in registry.pending])
+        for services in self.docker_compose_services.values():
+            if services.dirty:
+                added, updated = services.pending
+                messages = ['新增docker-compose服务: {}'.format(name) for name in added]
+                messages.extend('更新docker-compose服务: {}'.format(name) for name in updated)
+                with phase('edit'):
+                    content = services.render()
+                yield PlannedFile(services.docker_compose_yml, content, override=True, newline=''), messages
+
+    def diff(self) -> str:
+        """计划变更的unified diff"""
+        chunks = []
+        for dir_path in self.dirs:
+            if not os.path.exists(dir_path):
+                chunks.append('创建目录: {}\n'.format(dir_path))
+        planned = [(planned_file, []) for planned_file in self.files.values()]
+        for planned_file, _ in [*planned, *self._edit_files()]:
+            action = planned_file.action()
+            if action == 'create':
+                old_lines, from_file = [], '/dev/null'
+            elif action == 'update':
+                with open(planned_file.path, 'r', encoding=planned_file.encoding, errors='replace') as f:
+                    old_lines, from_file = f.read().splitlines(keepends=True), planned_file.path
+            else:
+                continue
+            new_lines = planned_file.read_new().splitlines(keepends=True)
+            chunks.append(''.join(line if line.endswith('\n') else line + '\n' for line in difflib.unified_diff(
+                old_lines, new_lines, fromfile=from_file, tofile=planned_file.path)))
+        return ''.join(chunks)
+
+    def apply(self):
+        """应用计划, 先创建目录再写入文件, 任一写入失败时回滚本次计划已创建的目录、文件及已覆盖的文件"""
+        created_dirs: List[str] = []
+        created_files: List[str] = []
+        # 被覆盖文件的备份, key: 文件路径, value: 备份路径
+        backups: Dict[str, str] = {}
+        # 当前写入的目录或文件, 写入失败时输出
+        current = None
+        try:
+            for dir_path in self.dirs:
+                current = dir_path
+                if os.path.exists(dir_path):
+                    logger.warning('目录已存在: {}, 忽略', dir_path)
+                    continue
+                with phase('fs_write'):
+                    created_dirs.extend(self._makedirs(dir_path))
+                count('dirs_created')
+                self.applied.append(('mkdir', dir_path))
+                logger.success('创建目录: {}', dir_path)
+            for planned_file in self.files.values():
+                current = planned_file.path
+                self._apply_file(planned_file, created_dirs, created_files, backups, [])
+            current = None
+            for planned_file, messages in list(self._edit_files()):
+                current = planned_file.path
+                self._apply_file(planned_file, created_dirs, created_files, backups, messages)
+        except BaseException as e:
+            logger.error('写入失败: {}, {}, 回滚本次变更, 本次生成未完成', current, repr(e))
+            self._rollback(created_dirs, created_files, backups)
+            raise
+        finally:
+            self._cleanup()
+        for backup in backups.values():
+            os.remove(backup)
+        for level, message, args in self.applied_logs:
+            logger.log(level, message, *args)
+
+    @staticmethod
+    def _makedirs(dir_path: str) -> List[str]:
+        """创建目录, 返回新创建的各级目录"""
+        missing = []
+        current = dir_path
+        while current and not os.path.exists(current):
+            missing.append(current)
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        os.makedirs(dir_path, exist_ok=True)
+        return list(reversed(missing))
+
+    def _apply_file(self, planned_file: PlannedFile, created_dirs: List[str], created_files: List[str],
+                    backups: Dict[str, str], messages: List[str]):
+        action = planned_file.action()
+        if action == 'exists':
+            logger.warning('文件已存在: {}, 忽略', planned_file.path)
+            return
+        if action == 'unchanged':
+            logger.info('文件内容未变化: {}, 忽略', planned_file.path)
+            return
+        if action == 'create':
+            parent = os.path.dirname(planned_file.path)
+            if parent and not os.path.exists(parent):
+                created_dirs.extend(self._makedirs(parent))
+            planned_file.write()
+            created_files.append(planned_file.path)
+            logger.success('创建文件: {}', planned_file.path)
+        else:
+            backups[planned_file.path] = self._backup(planned_file.path)
+            planned_file.write()
+            logger.success('覆盖文件: {}', planned_file.path)
+        self.applied.append((action, planned_file.path))
+        for message in messages:
+            logger.success(message)
+
+    @staticmethod
+    def _backup(filepath: str) -> str:
+        backup = '{}.{}.bak'.format(filepath, os.getpid())
+        try:
+            # 硬链接备份无需复制文件内容
+            os.link(filepath, backup)
+        except OSError:
+            shutil.copy2(filepath, backup)
+        return backup
+
+    @staticmethod
+    def _rollback(created_dirs: List[str], created_files: List[str], backups: Dict[str, str]):
+        for filepath, backup in backups.items():
+            try:
+                os.replace(backup, filepath)
+            except OSError:
+                logger.error('文件回滚失败: {}, 备份文件: {}', filepath, backup)
+        for filepath in reversed(created_files):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+        for dir_path in reversed(created_dirs):
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                pass
+
+    def _cleanup(self):
+        for dir_path in self._cleanup_dirs:
+            shutil.rmtree(dir_path, ignore_errors=True)
+        self._cleanup_dirs = []
+
+    def discard(self):
+        """丢弃计划"""
+        self._cleanup()
+
+
+# 当前生效的文件生成计划, 为None时各生成操作立即写入文件
+_current_plan: Optional[FilePlan] = None
+
+
+def current_plan() -> Optional[FilePlan]:
+    return _current_plan
+
+
+def log_applied(message: str, *args, level: str = 'SUCCESS'):
+    """输出生成完成日志, 存在生效的文件生成计划时在计划应用成功后输出, 计划写入失败回滚、丢弃或dry-run时不输出"""
+    if _current_plan is None:
+        logger.log(level, message, *args)
+        return
+    _current_plan.applied_logs.append((level, message, args))
+
+
+@contextmanager
+def file_plan(dry_run: bool = False, isolated: bool = False):
+    """文件生成计划上下文, 上下文内的生成操作仅记录到计划中, 正常退出时统一应用, 异常退出时丢弃计划不写入任何文件,
+    dry_run为True时退出后不应用计划, 可通过计划的diff预览变更. 支持嵌套, 由最外层统一应用, isolated为True时不复用外层计划,
+    退出时独立应用, 适用于常驻进程(例如监听模式)中的每轮生成."""
+    global _current_plan
+    if _current_plan is not None and not isolated:
+        yield _current_plan
+        return
+    outer_plan = _current_plan
+    plan = _current_plan = FilePlan()
+    try:
+        yield plan
+    except BaseException:
+        plan.discard()
+        raise
+    finally:
+        _current_plan = outer_plan
+    if dry_run:
+        plan.discard()
+        return
+    plan.apply()
@@ -0,0 +1,116 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+
+# 环境变量SEATOOLS_CODEGEN_PROFILE=1时开启性能分析, 与--profile参数一致
+PROFILE_ENV = 'SEATOOLS_CODEGEN_PROFILE'
+# 环境变量SEATOOLS_CODEGEN_PROFILE_JSON指定JSON报告输出路径, 与--profile_json参数一致
+PROFILE_JSON_ENV = 'SEATOOLS_CODEGEN_PROFILE_JSON'
+
+# 阶段名称及说明, 按报告输出顺序排列
+PHASES = {
+    'discovery': '项目检索',
+    'render': '模板渲染',
+    'fs_write': '文件写入',
+    'edit': 'toml/yaml编辑',
+    'protoc': 'protoc编译',
+}
+# 计数项名称及说明
+COUNTERS = {
+    'dirs_created': '创建目录数',
+    'files_written': '写入文件数',
+    'bytes_written': '写入字节数',
+}
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Profiler:
+    """命令性能分析器, 记录各阶段耗时、调用次数及文件写入计数, 同名阶段嵌套时仅统计最外层"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        # key: 阶段名称, value: [耗时(秒), 调用次数]
+        self.phases: Dict[str, list] = {}
+        self.counters: Dict[str, int] = {}
+        self._active: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        if self._active.get(name):
+            yield
+            return
+        self._active[name] = 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active[name] = 0
+            stat = self.phases.setdefault(name, [0.0, 0])
+            stat[0] += time.perf_counter() - start
+            stat[1] += 1
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        """性能报告, 耗时单位为毫秒"""
+        names = [*PHASES, *(name for name in self.phases if name not in PHASES)]
+        return {
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'phases': {name: {'ms': round(self.phases.get(name, [0.0, 0])[0] * 1000, 3),
+                              'calls': self.phases.get(name, [0.0, 0])[1]} for name in names},
+            'counters': {name: self.counters.get(name, 0) for name in [*COUNTERS, *self.counters]},
+        }
+
+    def format(self) -> str:
+        """文本格式的性能报告"""
+        report = self.report()
+        lines = ['性能分析, 总耗时: {:.3f}ms'.format(report['total_ms'])]
+        for name, stat in report['phases'].items():
+            lines.append('  {:<16}{:>12.3f}ms{:>8}次'.format(PHASES.get(name, name), stat['ms'], stat['calls']))
+        for name, value in report['counters'].items():
+            lines.append('  {:<16}{:>14}'.format(COUNTERS.get(name, name), value))
+        return '\n'.join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(self.report(), ensure_ascii=False, indent=2)
+
+
+# 当前生效的性能分析器, 为None时不记录
+_current_profiler: Optional[Profiler] = None
+
+
+def current_profiler() -> Optional[Profiler]:
+    return _current_profiler
+
+
+def phase(name: str):
+    """记录阶段耗时的上下文, 未开启性能分析时为空上下文"""
+    if _current_profiler is None:
+        return _NULL_CONTEXT
+    return _current_profiler.phase(name)
+
+
+def count(name: str, value: int = 1):
+    """累加计数, 未开启性能分析时忽略"""
+    if _current_profiler is not None:
+        _current_profiler.count(name, value)
+
+
+@contextmanager
+def profiling(enabled: bool = True):
+    """性能分析上下文, 上下文内的阶段耗时与计数记录到返回的分析器中, 支持嵌套, 由最外层统一记录"""
+    global _current_profiler
+    if not enabled:
+        yield None
+        return
+    if _current_profiler is not None:
+        yield _current_profiler
+        return
+    profiler = _current_profiler = Profiler()
+    try:
+        yield profiler
+    finally:
+        _current_profiler = None
@@ -0,0 +1,122 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+from ..utils import atomic_write
+
+_SCRIPTS_HEADER_PATTERN = re.compile(r'^\s*\[\s*tool\s*\.\s*poetry\s*\.\s*scripts\s*\]\s*(#.*)?$')
+_TABLE_HEADER_PATTERN = re.compile(r'^\s*\[')
+_SCRIPT_KEY_PATTERN = re.compile(r'''^\s*(?:"([^"]+)"|'([^']+)'|([A-Za-z0-9_\-]+))\s*=''')
+
+
+def parse_script_name(script: str) -> Optional[str]:
+    """解析poetry脚本行的脚本名称, 例如: xxx = "pkg.cmd.xxx_main:main" 的名称为xxx, 无法解析返回None"""
+    match = _SCRIPT_KEY_PATTERN.match(script)
+    if not match:
+        return None
+    return next(group for group in match.groups() if group is not None)
+
+
+class PoetryScriptRegistry:
+    """pyproject.toml中[tool.poetry.scripts]的脚本注册表
+
+    加载时按行解析并建立已有脚本名称索引, 新增的脚本先缓存在内存中, 调用flush时一次性插入并原子写入,
+    插入仅新增行, 文件其余内容与格式保持不变.
+    """
+
+    def __init__(self, pyproject_toml: str, content: str):
+        self.pyproject_toml = pyproject_toml
+        self.newline = '\r\n' if '\r\n' in content else '\n'
+        self._lines: List[str] = content.splitlines(keepends=True)
+        self._header_index: Optional[int] = None
+        # key: 脚本名称, value: 脚本行内容
+        self._scripts: Dict[str, str] = {}
+        # 待写入的脚本, key: 脚本名称, value: 脚本行内容, 按新增顺序排列
+        self._pending: Dict[str, str] = {}
+        self._parse()
+
+    @classmethod
+    def load(cls, project_dir: str) -> Optional['PoetryScriptRegistry']:
+        """加载项目的pyproject.toml, 文件不存在时返回None"""
+        pyproject_toml = project_dir + os.sep + 'pyproject.toml'
+        if not os.path.exists(pyproject_toml):
+            return None
+        with open(pyproject_toml, 'r', encoding='utf-8', newline='') as f:
+            return cls(pyproject_toml, f.read())
+
+    def _parse(self):
+        in_scripts = False
+        for index, line in enumerate(self._lines):
+            if _SCRIPTS_HEADER_PATTERN.match(line):
+                if self._header_index is None:
+                    self._header_index = index
+                in_scripts = True
+                continue
+            if _TABLE_HEADER_PATTERN.match(line):
+                in_scripts = False
+                continue
+            if in_scripts:
+                name = parse_script_name(line)
+                if name:
+                    self._scripts[name] = line.strip()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._scripts or name in self._pending
+
+    def get(self, name: str) -> Optional[str]:
+        """获取已存在的脚本行内容"""
+        return self._scripts.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        """已存在的脚本名称"""
+        return list(self._scripts)
+
+    def add(self, script: str) -> bool:
+        """新增脚本, 脚本名称已存在时返回False, 新增的脚本在flush时写入"""
+        name = parse_script_name(script)
+        if not name:
+            raise ValueError('无法解析poetry脚本[{}]的名称'.format(script))
+        if name in self:
+            return False
+        self._pending[name] = script.strip()
+        return True
+
+    @property
+    def pending(self) -> List[str]:
+        """待写入的脚本名称"""
+        return list(self._pending)
+
+    def render(self) -> str:
+        """渲染包含待写入脚本的文件内容"""
+        lines = list(self._lines)
+        if self._pending:
+            # 新脚本插入在[tool.poetry.scripts]下方, 后添加的在前
+            new_lines = [script + self.newline for script in reversed(self._pending.values())]
+            if self._header_index is None:
+                if lines and not lines[-1].endswith(('\n', '\r')):
+                    lines[-1] += self.newline
+                if lines and lines[-1].strip():
+                    lines.append(self.newline)
+                lines.append('[tool.poetry.scripts]' + self.newline)
+                lines.extend(new_lines)
+            else:
+                header = lines[self._header_index]
+                if not header.endswith(('\n', '\r')):
+                    lines[self._header_index] = header + self.newline
+                lines[self._header_index + 1:self._header_index + 1] = new_lines
+        return ''.join(lines)
+
+    def flush(self) -> List[str]:
+        """原子写入待新增的脚本, 返回本次写入的脚本名称"""
+        if not self._pending:
+            return []
+        content = self.render()
+        atomic_write(self.pyproject_toml, content, newline='')
+        written = self.pending
+        self._lines = content.splitlines(keepends=True)
+        self._header_index = None
+        self._pending = {}
+        self._scripts.clear()
+        self._parse()
+        return written
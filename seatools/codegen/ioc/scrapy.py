@@ -1,7 +1,7 @@
 import os
 from typing import Optional
 
-from .common import mkdir, create_file, add_poetry_script, extract_names, str_format, unwrapper_dir_name
+from .common import mkdir, create_file, add_poetry_script, extract_names, str_format, unwrapper_dir_name, path_exists
 from .cmd import generate_cmd
 
 
@@ -338,7 +338,7 @@ def generate_scrapy_spider(project_dir: str, package_dir: str,
     package_name = unwrapper_dir_name(package_dir)
 
     scrapy_dir = package_dir + os.sep + 'scrapy'
-    if not os.path.exists(scrapy_dir):
+    if not path_exists(scrapy_dir):
         print('请先初始化scrapy项目结构后再生成爬虫')
         return
     if domain.startswith('http://'):
@@ -0,0 +1,177 @@
+import io
+import json
+import os
+import socketserver
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Callable, IO, List, Optional
+
+import click
+from loguru import logger
+
+from .plan import file_plan
+from .profile import profiling
+
+# 服务内置操作, 其余操作按子命令执行
+PING = 'ping'
+SHUTDOWN = 'shutdown'
+
+
+def build_args(args: dict) -> List[str]:
+    """将参数字典转换为命令行参数, True为开关参数, False与None忽略, 列表为多次传递的参数, 键名为参数名(不含--)"""
+    argv = []
+    for key, value in args.items():
+        option = '--' + key
+        if value is None or value is False:
+            continue
+        if value is True:
+            argv.append(option)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                argv.extend([option, str(item)])
+        else:
+            argv.extend([option, str(value)])
+    return argv
+
+
+class CodegenServer:
+    """常驻代码生成服务, 按JSON行协议接收请求并执行子命令, 进程内的子命令模块、模板编译缓存与项目检索缓存在请求间复用
+
+    请求示例: {"id": 1, "command": "task", "args": {"class": "xxx_task", "cmd": true}, "cwd": "/path/to/project"}
+    也可直接传递命令行参数: {"id": 2, "argv": ["scrapy", "genspider", "xxx", "xxx.com"]}
+    可选字段: dry_run(仅返回unified diff不写入文件), profile(返回性能分析报告)
+    响应示例: {"id": 1, "ok": true, "files": [{"action": "create", "path": "..."}], "logs": [...], "elapsed_ms": 3.2}
+    """
+
+    def __init__(self, group: click.Group):
+        self.group = group
+        self.running = True
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """处理单行请求, 返回单行响应, 空行返回None"""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('请求需为JSON对象')
+        except ValueError as e:
+            return json.dumps({'id': None, 'ok': False, 'error': '请求解析失败: {}'.format(e)}, ensure_ascii=False)
+        return json.dumps(self.handle(request), ensure_ascii=False)
+
+    def handle(self, request: dict) -> dict:
+        response = {'id': request.get('id')}
+        command = request.get('command')
+        if command == PING:
+            return {**response, 'ok': True}
+        if command == SHUTDOWN:
+            self.running = False
+            return {**response, 'ok': True}
+        if request.get('argv'):
+            argv = [str(arg) for arg in request['argv']]
+        elif command:
+            argv = [*str(command).split(), *build_args(request.get('args') or {})]
+        else:
+            return {**response, 'ok': False, 'error': '请求缺少command或argv'}
+        return {**response, **self._execute(argv, request)}
+
+    def _execute(self, argv: List[str], request: dict) -> dict:
+        logs = []
+        errors = []
+
+        def sink(message):
+            record = message.record
+            logs.append(record['level'].name + ': ' + record['message'])
+            if record['level'].no >= logger.level('ERROR').no:
+                errors.append(record['message'])
+
+        sink_id = logger.add(sink, level='INFO', format='{message}')
+        stdout = io.StringIO()
+        cwd = os.getcwd()
+        start = time.perf_counter()
+        result = {}
+        try:
+            if request.get('cwd'):
+                os.chdir(request['cwd'])
+            dry_run = bool(request.get('dry_run'))
+            with profiling(enabled=bool(request.get('profile'))) as profiler, redirect_stdout(stdout):
+                with file_plan(dry_run=dry_run, isolated=True) as plan:
+                    self._invoke(argv)
+                    if dry_run:
+                        result['diff'] = plan.diff()
+            result['ok'] = True
+            result['files'] = [{'action': action, 'path': path} for action, path in plan.applied]
+            if profiler is not None:
+                result['profile'] = profiler.report()
+        except click.ClickException as e:
+            result = {'ok': False, 'error': e.format_message()}
+        except SystemExit as e:
+            result = {'ok': False, 'error': '命令退出, 退出码: {}'.format(e.code)}
+        except Exception as e:
+            result = {'ok': False, 'error': '{}: {}'.format(type(e).__name__, e)}
+        finally:
+            os.chdir(cwd)
+            logger.remove(sink_id)
+        # 生成器通过错误日志提示参数校验等失败
+        if result['ok'] and errors:
+            result['ok'] = False
+            result['error'] = errors[0]
+        result['logs'] = logs
+        if stdout.getvalue():
+            result['stdout'] = stdout.getvalue()
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    def _invoke(self, argv: List[str]):
+        # 直接执行子命令, 由服务统一管理文件生成计划, 不经过命令组的计划与性能分析
+        ctx = self.group.make_context(self.group.name, [], resilient_parsing=True)
+        command = self.group.get_command(ctx, argv[0])
+        if command is None or argv[0] == 'serve':
+            raise click.UsageError('不支持的命令: {}'.format(argv[0]))
+        command.main(args=argv[1:], prog_name=argv[0], standalone_mode=False)
+
+    def serve_stream(self, reader: IO[str], writer: Callable[[str], None]):
+        """按行读取请求并逐行写入响应, 直到输入结束或收到shutdown请求"""
+        for line in reader:
+            response = self.handle_line(line)
+            if response is not None:
+                writer(response + '\n')
+            if not self.running:
+                break
+
+    def serve_stdio(self):
+        """基于标准输入输出提供服务, 日志输出到标准错误"""
+        stdout = sys.stdout
+
+        def write(data: str):
+            stdout.write(data)
+            stdout.flush()
+
+        self.serve_stream(sys.stdin, write)
+
+    def serve_unix(self, path: str):
+        """基于Unix socket提供服务, 连接依次处理, 单个连接内可发送多个请求"""
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = io.TextIOWrapper(self.rfile, encoding='utf-8')
+
+                def write(data: str):
+                    self.wfile.write(data.encode('utf-8'))
+                    self.wfile.flush()
+
+                server.serve_stream(reader, write)
+
+        if os.path.exists(path):
+            os.remove(path)
+        with socketserver.UnixStreamServer(path, Handler) as unix_server:
+            logger.info('代码生成服务已启动: {}', path)
+            try:
+                while self.running:
+                    unix_server.handle_request()
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
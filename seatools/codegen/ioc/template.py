@@ -0,0 +1,122 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+# 模板变量使用${}包裹
+_PLACEHOLDER_PATTERN = re.compile(r'\${([^}]*)}')
+# 编译缓存上限, 模板均为模块内常量, 正常情况下远达不到该上限
+_CACHE_MAX_SIZE = 512
+# 模板文件所在包
+TEMPLATE_PACKAGE = 'seatools.codegen.templates'
+# 模板文件后缀
+TEMPLATE_SUFFIX = '.tpl'
+# 项目内的模板覆盖目录, 相对项目目录, 其中与包内模板同名(同相对路径)的模板文件优先使用
+PROJECT_TEMPLATE_DIR = '.seatools-codegen' + os.sep + 'templates'
+
+
+class TemplateVariableError(KeyError):
+    """模板变量未定义异常"""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        super().__init__('模板变量未定义: {}'.format(', '.join(names)))
+
+    def __str__(self):
+        return self.args[0]
+
+
+class Template:
+    """预编译模板, 编译时将模板拆分为文本片段与变量名, 渲染时单次拼接"""
+
+    __slots__ = ('text', 'literals', 'names')
+
+    def __init__(self, text: str):
+        self.text = text
+        # re.split 带捕获组时结果为: [文本, 变量, 文本, 变量, ..., 文本]
+        segments = _PLACEHOLDER_PATTERN.split(text)
+        self.literals: Tuple[str, ...] = tuple(segments[0::2])
+        self.names: Tuple[str, ...] = tuple(segments[1::2])
+
+    def render(self, **kwargs) -> str:
+        """渲染模板, 存在未定义的变量时抛出TemplateVariableError"""
+        names = self.names
+        if not names:
+            return self.text
+        literals = self.literals
+        try:
+            values = [str(kwargs[name]) for name in names]
+        except KeyError:
+            raise TemplateVariableError(sorted({name for name in names if name not in kwargs})) from None
+        parts = [literals[0]]
+        for value, literal in zip(values, literals[1:]):
+            parts.append(value)
+            parts.append(literal)
+        return ''.join(parts)
+
+
+# key: id(模板文本), value: (模板文本, 编译后模板), 保存模板文本引用防止id被复用
+_template_cache: Dict[int, Tuple[str, Template]] = {}
+
+
+def compile_template(text: str) -> Template:
+    """编译模板, 按模板对象标识缓存, 同一模板仅编译一次"""
+    key = id(text)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] is text:
+        return cached[1]
+    template = Template(text)
+    if len(_template_cache) >= _CACHE_MAX_SIZE:
+        _template_cache.clear()
+    _template_cache[key] = (text, template)
+    return template
+
+
+def render(text: str, **kwargs) -> str:
+    """渲染模板文本, 变量使用${}包裹"""
+    return compile_template(text).render(**kwargs)
+
+
+# 包内模板, key: 模板名称, value: 编译后模板
+_package_templates: Dict[str, Template] = {}
+# 项目覆盖模板, key: 模板文件路径, value: (文件修改时间, 编译后模板)
+_override_templates: Dict[str, Tuple[int, Template]] = {}
+
+
+def _read_package_template(name: str) -> str:
+    from importlib.resources import files
+    resource = files(TEMPLATE_PACKAGE)
+    for part in (name + TEMPLATE_SUFFIX).split('/'):
+        resource = resource.joinpath(part)
+    return resource.read_text(encoding='utf-8')
+
+
+def _load_override_template(project_dir: str, name: str) -> Optional[Template]:
+    filepath = project_dir + os.sep + PROJECT_TEMPLATE_DIR + os.sep + (name + TEMPLATE_SUFFIX).replace('/', os.sep)
+    try:
+        mtime = os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+    cached = _override_templates.get(filepath)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(filepath, 'r', encoding='utf-8') as f:
+        template = Template(f.read())
+    _override_templates[filepath] = (mtime, template)
+    return template
+
+
+def load_template(name: str, project_dir: Optional[str] = None) -> Template:
+    """加载模板文件, 首次加载时读取并编译, 之后使用进程内缓存
+
+    Args:
+        name: 模板名称, 为相对模板包且不含.tpl后缀的路径, 例如: deploy/Dockerfile
+        project_dir: 项目目录, 传递时优先使用项目内.seatools-codegen/templates下的同名模板, 覆盖模板修改后自动重新加载
+    """
+    if project_dir:
+        template = _load_override_template(project_dir, name)
+        if template is not None:
+            return template
+    template = _package_templates.get(name)
+    if template is None:
+        template = _package_templates[name] = Template(_read_package_template(name))
+    return template
@@ -0,0 +1,244 @@
+import os
+from typing import Optional
+
+from .common import mkdir, create_file, add_poetry_script, add_application_config, merge_application_config, \
+    render_template, str_format, unwrapper_dir_name
+from .deploy import generate_bin_script, generate_dockerfile, add_web_service
+
+# web服务运行方式
+SERVERS = ('uvicorn', 'gunicorn')
+# 响应缓存, memory: 进程内TTL + LRU缓存, redis: 进程内缓存 + Redis二级缓存
+CACHE_BACKENDS = ('memory', 'redis')
+# 请求指标依赖, 需包含开头的空格
+METRICS_REQUIRES = ' prometheus-client'
+# 响应压缩可选依赖, 安装后启用br及zstd编码, 需包含开头的空格
+COMPRESSION_REQUIRES = ' brotli zstandard'
+
+
+def uvicorn_template_options(project_dir: str) -> dict:
+    """基于uvicorn运行的命令行工具模板共用的性能参数片段, 包含click参数(uvicorn_click_options)及参数处理函数(uvicorn_options)"""
+    return {
+        'uvicorn_click_options': render_template('web/uvicorn_click_options.py', project_dir),
+        'uvicorn_options': render_template('web/uvicorn_options.py', project_dir),
+    }
+
+
+def generate_response_cache(project_dir: str, package_dir: str, redis_options: str = '', override: bool = False):
+    """生成web框架共用的响应缓存(caches/response_cache.py)及config/application.yml中的response_cache配置,
+    response_cache配置由项目内的flask、fastapi共用, 已存在时仅补充缺失的Redis二级缓存配置, Redis中的缓存键按框架区分
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        redis_options: response_cache配置中Redis二级缓存的配置, 需包含开头的换行, 每个配置项为单行
+        override: 是否覆盖文件
+    """
+    caches_dir = package_dir + os.sep + 'caches'
+    mkdir(caches_dir)
+    create_file(caches_dir + os.sep + '__init__.py', override=override)
+    create_file(caches_dir + os.sep + 'response_cache.py', render_template('caches/response_cache.py', project_dir),
+                override=override)
+    merge_application_config(project_dir, 'response_cache', render_template('caches/response_cache.yml', project_dir,
+                                                                             redis_options=redis_options))
+
+
+def generate_metrics(project_dir: str, package_dir: str, override: bool = False):
+    """生成web框架共用的请求指标(metrics/prometheus.py, 基于prometheus_client多进程模式)及其微基准(metrics/benchmark.py)
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        override: 是否覆盖文件
+    """
+    package_name = unwrapper_dir_name(package_dir)
+    metrics_dir = package_dir + os.sep + 'metrics'
+    mkdir(metrics_dir)
+    create_file(metrics_dir + os.sep + '__init__.py', override=override)
+    for name in ('prometheus', 'benchmark'):
+        create_file(metrics_dir + os.sep + name + '.py', render_template(
+            'metrics/{}.py'.format(name), project_dir, package_name=package_name), override=override)
+
+
+def generate_compression(project_dir: str, package_dir: str, override: bool = False):
+    """生成web框架共用的响应压缩(compression/compressor.py)及其微基准(compression/benchmark.py),
+    config/application.yml中的compression配置及config/application-dev.yml中开发环境的压缩级别
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        override: 是否覆盖文件
+    """
+    package_name = unwrapper_dir_name(package_dir)
+    compression_dir = package_dir + os.sep + 'compression'
+    mkdir(compression_dir)
+    create_file(compression_dir + os.sep + '__init__.py', override=override)
+    for name in ('compressor', 'benchmark'):
+        create_file(compression_dir + os.sep + name + '.py', render_template(
+            'compression/{}.py'.format(name), project_dir, package_name=package_name), override=override)
+    add_application_config(project_dir, 'compression', render_template('compression/compression.yml', project_dir))
+    add_application_config(project_dir, 'compression', render_template('compression/compression-dev.yml', project_dir),
+                           profile='dev')
+
+
+def _generate_web_deploy(project_dir: str, package_dir: str, framework: str, run_args: str, install: str,
+                         override: bool = False,
+                         docker: Optional[bool] = True,
+                         docker_compose: Optional[bool] = True,
+                         app: Optional[str] = None,
+                         run_comment: str = '',
+                         run_suffix: str = ''):
+    """生成web框架的poetry脚本、部署脚本及docker相关文件
+
+    Args:
+        run_args: poetry脚本的额外运行参数, 例如: ' --workers 4'
+        install: Dockerfile安装项目依赖后额外执行的指令
+        run_comment: 部署脚本中执行命令的说明
+        run_suffix: 部署脚本中执行命令后的说明
+    """
+    package_name = unwrapper_dir_name(package_dir)
+    poetry_script_name = '{}_{}'.format(app, framework) if app else framework
+
+    add_poetry_script(project_dir, str_format(
+        '${poetry_script_name} = "${package_name}.cmd.${framework}_main:main"',
+        package_name=package_name, poetry_script_name=poetry_script_name, framework=framework,
+    ))
+
+    generate_bin_script(project_dir, framework, process_name=framework, run_command=str_format(
+        '${run_comment}nohup poetry run ${poetry_script_name} --host 0.0.0.0 --port 8000 --env pro${run_args} '
+        '>> /dev/null 2>&1 &${run_suffix}',
+        run_comment=run_comment, poetry_script_name=poetry_script_name, run_args=run_args, run_suffix=run_suffix,
+    ), override=override)
+    if docker or docker_compose:
+        command_args = ''.join(', "{}"'.format(arg) for arg in run_args.split())
+        generate_dockerfile(project_dir, framework, install=install,
+                            command=str_format('["poetry", "run", "${poetry_script_name}", "--env", "pro", '
+                                               '"--host", "0.0.0.0", "--port", "8000"${command_args}]',
+                                               poetry_script_name=poetry_script_name, command_args=command_args),
+                            override=override)
+
+    if docker_compose:
+        add_web_service(project_dir, framework, override=override)
+
+
+def generate_uvicorn_cmd(project_dir: str, package_dir: str, framework: str, title: str, app_path: str,
+                         override: bool = False,
+                         docker: Optional[bool] = True,
+                         docker_compose: Optional[bool] = True,
+                         app: Optional[str] = None,
+                         starter: Optional[bool] = False,
+                         main_template: Optional[str] = None,
+                         requires: str = ''):
+    """生成基于uvicorn运行的web框架命令行工具、部署脚本及docker相关文件, fastapi与flask共用
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        framework: web框架, 即生成的包目录名称, 例如: fastapi
+        title: 命令说明中的框架名称, 例如: FastAPI
+        app_path: uvicorn运行的应用路径, 例如: xxx.fastapi.app:app, starter模式下固定为xxx.boot:start
+        override: 是否覆盖文件
+        docker: 是否生成docker相关文件
+        docker_compose: 是否生成docker-compose相关文件
+        app: 指定应用
+        starter: 是否生成基于seatools-starter-web-*的代码
+        main_template: 命令行工具模板, 默认web/uvicorn_main.py, starter模式下忽略
+        requires: Dockerfile中额外安装的依赖, 需包含开头的空格, 例如: ' orjson'
+    """
+    package_name = unwrapper_dir_name(package_dir)
+    cmd_dir = package_dir + os.sep + 'cmd'
+    cmd_main_py = cmd_dir + os.sep + '{}_main.py'.format(framework)
+    create_file(cmd_main_py, render_template(
+        main_template if main_template and not starter else 'web/uvicorn_main.py', project_dir,
+        package_name=package_name,
+        uvicorn_import='from seatools.ioc.starters import uvicorn' if starter else 'import uvicorn',
+        app_path='{}.boot:start'.format(package_name) if starter else app_path,
+        title=title,
+        **uvicorn_template_options(project_dir),
+    ), override=override)
+
+    _generate_web_deploy(project_dir, package_dir, framework, run_args=' --workers 4',
+                         install='RUN poetry add {} uvicorn[standard]{}\n\n'.format(framework, requires),
+                         run_comment='# 执行命令 --workers 工作进程数, 正式环境可根据CPU核数设置\n',
+                         override=override, docker=docker, docker_compose=docker_compose, app=app)
+
+
+def generate_gunicorn_cmd(project_dir: str, package_dir: str, framework: str, title: str, app_path: str,
+                          worker_class: str,
+                          workers: str,
+                          install: str,
+                          override: bool = False,
+                          docker: Optional[bool] = True,
+                          docker_compose: Optional[bool] = True,
+                          app: Optional[str] = None,
+                          worker_options: str = '',
+                          prelude: str = ''):
+    """生成基于gunicorn运行的web框架配置、命令行工具、部署脚本及docker相关文件, fastapi与flask共用
+
+    gunicorn主进程预加载应用(项目依赖仅启动一次)后fork工作进程, 负责工作进程的监控重启, 并支持HUP信号平滑重启工作进程
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        framework: web框架, 即生成的包目录名称, 例如: fastapi
+        title: 命令说明中的框架名称, 例如: FastAPI
+        app_path: gunicorn运行的应用路径, 例如: xxx.fastapi.app:app
+        worker_class: gunicorn工作进程类型, 例如: uvicorn_worker.UvicornWorker, gthread
+        workers: 默认工作进程数表达式, 例如: multiprocessing.cpu_count()
+        install: Dockerfile安装项目依赖后额外执行的指令, 需包含结尾的空行
+        override: 是否覆盖文件
+        docker: 是否生成docker相关文件
+        docker_compose: 是否生成docker-compose相关文件
+        app: 指定应用
+        worker_options: 工作进程类型的额外配置, 需包含结尾的换行
+        prelude: 启动命令main函数中先于其他代码执行的代码, 例如gevent打补丁, 需包含4个空格的缩进及结尾的空行,
+                 项目依赖启动时会扫描导入启动命令模块, 不能在模块导入时执行
+    """
+    package_name = unwrapper_dir_name(package_dir)
+    # 进程名称及pid文件包含包名, pid文件另按端口区分, 同一主机上的多个项目及同一框架的多个应用互不冲突
+    proc_name = '{}_{}'.format(package_name, framework)
+    create_file(package_dir + os.sep + framework + os.sep + 'gunicorn_conf.py', render_template(
+        'web/gunicorn_conf.py', project_dir,
+        title=title, worker_class=worker_class, workers=workers, worker_options=worker_options,
+        proc_name=proc_name,
+    ), override=override)
+    create_file(package_dir + os.sep + 'cmd' + os.sep + '{}_main.py'.format(framework), render_template(
+        'web/gunicorn_main.py', project_dir,
+        package_name=package_name, framework=framework, title=title, app_path=app_path, prelude=prelude,
+        proc_name=proc_name,
+    ), override=override)
+
+    _generate_web_deploy(project_dir, package_dir, framework, run_args='', install=install,
+                         run_comment='# 执行命令, 工作进程数默认根据CPU核数计算, 可通过--workers指定\n',
+                         run_suffix=str_format(
+                             '\n# 平滑重启工作进程(重新加载gunicorn配置): kill -HUP $(cat /tmp/${proc_name}_8000.pid)',
+                             proc_name=proc_name),
+                         override=override, docker=docker, docker_compose=docker_compose, app=app)
+
+
+def generate_waitress_cmd(project_dir: str, package_dir: str, framework: str, title: str, app_path: str,
+                          install: str,
+                          override: bool = False,
+                          docker: Optional[bool] = True,
+                          docker_compose: Optional[bool] = True,
+                          app: Optional[str] = None):
+    """生成基于waitress单进程多线程运行的wsgi框架命令行工具、部署脚本及docker相关文件, 支持windows
+
+    Args:
+        project_dir: 项目目录
+        package_dir: 包目录
+        framework: web框架, 即生成的包目录名称, 例如: flask
+        title: 命令说明中的框架名称, 例如: Flask
+        app_path: waitress运行的wsgi应用路径, 例如: xxx.flask.app:app
+        install: Dockerfile安装项目依赖后额外执行的指令, 需包含结尾的空行
+        override: 是否覆盖文件
+        docker: 是否生成docker相关文件
+        docker_compose: 是否生成docker-compose相关文件
+        app: 指定应用
+    """
+    create_file(package_dir + os.sep + 'cmd' + os.sep + '{}_main.py'.format(framework), render_template(
+        'web/waitress_main.py', project_dir, title=title, app_path=app_path,
+    ), override=override)
+
+    _generate_web_deploy(project_dir, package_dir, framework, run_args=' --threads 8', install=install,
+                         run_comment='# 执行命令 --threads 工作线程数, 正式环境可根据CPU核数及IO等待设置\n',
+                         override=override, docker=docker, docker_compose=docker_compose, app=app)
@@ -0,0 +1 @@
+"""代码生成模板, 模板文件作为包数据发布, 通过seatools.codegen.ioc.template.load_template按需加载"""
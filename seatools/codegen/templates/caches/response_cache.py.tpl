@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+from seatools.ioc import Bean, ConfigurationPropertiesBean
+
+
+@ConfigurationPropertiesBean(prop='response_cache')
+class ResponseCacheConfig(BaseModel):
+    """响应缓存配置, 对应配置文件中的response_cache"""
+    enabled: bool = True
+    # 每个工作进程内存缓存的最大响应数, 超出时淘汰最久未访问的响应
+    maxsize: int = 1024
+    # 默认缓存时间(秒), 可在cached装饰器中单独指定
+    ttl: int = 60
+    # Redis二级缓存的键前缀, 多个项目共用Redis时需区分, 项目内的flask、fastapi按框架名称区分
+    key_prefix: str = 'response_cache:'
+    # Redis二级缓存地址, 仅flask使用, fastapi使用redis_pool连接池
+    redis_url: Optional[str] = None
+
+
+# 不缓存的响应头: cookie、逐跳响应头及命中缓存时重新生成的响应头
+_UNCACHED_HEADERS = frozenset((
+    'set-cookie', 'connection', 'keep-alive', 'proxy-authenticate', 'proxy-connection', 'te', 'trailer',
+    'transfer-encoding', 'upgrade', 'content-length', 'content-type', 'etag', 'x-cache', 'date', 'server',
+))
+# 按用户区分响应的请求头, 请求携带且未在vary中指定时不使用缓存, 避免将某个用户的响应返回给其他用户
+PRIVATE_REQUEST_HEADERS = ('authorization', 'cookie')
+
+
+class CachedResponse(NamedTuple):
+    """缓存的响应"""
+    body: bytes
+    status_code: int
+    media_type: Optional[str]
+    etag: str
+    # 过期时间戳(秒), 进程间共享二级缓存时保持一致
+    expires_at: float
+    # 接口设置的响应头, 例如: Cache-Control, Content-Language, 不含cookie及逐跳响应头
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+    def expired(self) -> bool:
+        return self.expires_at <= time.time()
+
+    def dumps(self) -> bytes:
+        """序列化为首行JSON元数据 + 响应体, 用于写入Redis"""
+        meta = [self.status_code, self.media_type, self.etag, self.expires_at, self.headers]
+        return json.dumps(meta).encode() + b'\n' + self.body
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'CachedResponse':
+        meta, body = data.split(b'\n', 1)
+        status_code, media_type, etag, expires_at, *headers = json.loads(meta)
+        return cls(body, status_code, media_type, etag, expires_at,
+                   tuple(tuple(header) for header in headers[0]) if headers else ())
+
+
+def cacheable_headers(headers: Iterable[Tuple[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    """需随缓存保存并在命中时返回的响应头"""
+    return tuple((name, value) for name, value in headers if name.lower() not in _UNCACHED_HEADERS)
+
+
+def is_private(headers, vary: Sequence[str]) -> bool:
+    """请求是否携带了未在vary中指定的按用户区分的请求头, headers需支持不区分大小写的查询"""
+    return any(name not in vary and headers.get(name) for name in PRIVATE_REQUEST_HEADERS)
+
+
+class TTLCache:
+    """线程安全的TTL + LRU内存缓存, 容量达到maxsize时淘汰最久未访问的条目"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.expired():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+@Bean
+class ResponseCache:
+    """响应缓存, 每个工作进程一个内存缓存实例"""
+
+    def __init__(self, config: ResponseCacheConfig):
+        self.config = config
+        self.local = TTLCache(config.maxsize)
+
+    def redis_key(self, namespace: str, key: str) -> str:
+        """Redis二级缓存键, namespace为web框架名称, 同一项目的不同框架共用response_cache配置时缓存互不影响"""
+        return '{}{}:{}'.format(self.config.key_prefix, namespace, key)
+
+
+def cache_key(method: str, path: str, query: Iterable[Tuple[str, str]], headers: Iterable[Tuple[str, str]]) -> str:
+    """基于请求方法、路径、排序后的查询参数及指定请求头计算缓存键"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (method, path, *('{}={}'.format(*item) for item in sorted(query)),
+                 *('{}:{}'.format(*item) for item in headers)):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def make_etag(body: bytes) -> str:
+    return '"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """请求头If-None-Match是否匹配ETag, 按弱比较处理"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
@@ -0,0 +1,5 @@
+# 响应缓存, 每个工作进程的内存缓存最多maxsize个响应, ttl为默认缓存时间(秒)
+response_cache:
+  enabled: true
+  maxsize: 1024
+  ttl: 60${redis_options}
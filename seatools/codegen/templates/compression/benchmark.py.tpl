@@ -0,0 +1,55 @@
+"""响应压缩的进程内微基准
+
+按可用编码及压缩级别统计JSON响应体的单次压缩耗时(毫秒)与压缩率, 用于按响应大小及网络带宽选择各环境的压缩级别:
+压缩节省的传输时间约为(原大小 - 压缩后大小) / 带宽, 大于压缩耗时即有收益.
+
+执行: poetry run python -m ${package_name}.compression.benchmark --items 1000 --bandwidth 10
+"""
+import json
+import statistics
+import time
+
+import click
+
+
+def _payload(items: int) -> bytes:
+    """生成模拟接口返回的JSON响应体"""
+    data = [{'id': i, 'name': 'item-{}'.format(i), 'price': i * 1.5, 'tags': ['tag-{}'.format(i % 10), 'common'],
+             'description': 'description of item {}'.format(i % 100)} for i in range(items)]
+    return json.dumps({'code': 200, 'message': 'success', 'data': data}).encode()
+
+
+def _per_compress(compress, body: bytes, level: int, rounds: int) -> float:
+    """返回多轮中位数的单次压缩耗时(毫秒)"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        compress(body, level)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+@click.command()
+@click.option('--items', default=1000, help='模拟响应体的数据条数, 默认: 1000')
+@click.option('--rounds', default=20, help='每个压缩级别的压缩次数, 默认: 20')
+@click.option('--bandwidth', default=10.0, help='网络带宽(Mbps), 用于估算节省的传输时间, 默认: 10')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(items: int = 1000, rounds: int = 20, bandwidth: float = 10.0):
+    """统计各编码及压缩级别的压缩耗时(ms)、压缩率及估算节省的传输时间(ms)"""
+    # 项目依赖启动时会扫描导入本模块, 压缩模块仅在执行基准时导入
+    from ${package_name}.compression.compressor import COMPRESSORS
+    levels = {'gzip': (1, 6, 9), 'br': (1, 4, 5, 11), 'zstd': (1, 3, 10, 19)}
+    body = _payload(items)
+    bytes_per_ms = bandwidth * 1000 * 1000 / 8 / 1000
+    click.echo('body: {}bytes, bandwidth: {}Mbps'.format(len(body), bandwidth))
+    click.echo('{:<8}{:>6}{:>14}{:>10}{:>12}'.format('encoding', 'level', 'compress(ms)', 'ratio', 'saved(ms)'))
+    for encoding, compress in COMPRESSORS.items():
+        for level in levels[encoding]:
+            size = len(compress(body, level))
+            cost = _per_compress(compress, body, level, rounds)
+            saved = (len(body) - size) / bytes_per_ms - cost
+            click.echo('{:<8}{:>6}{:>14.2f}{:>10.3f}{:>12.2f}'.format(encoding, level, cost, size / len(body), saved))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+# 开发环境(命令行工具--env dev, 默认)使用最低压缩级别, 减少本地调试时的压缩耗时
+compression:
+  gzip_level: 1
+  brotli_level: 1
+  zstd_level: 1
@@ -0,0 +1,16 @@
+# 响应压缩, 响应体不小于minimum_size(字节)且Content-Type匹配media_types前缀时, 按encodings顺序选择客户端支持的编码压缩,
+# br需安装brotli, zstd需安装zstandard, 未安装时跳过, 压缩级别可在application-{env}.yml中按运行环境覆盖
+compression:
+  enabled: true
+  minimum_size: 1024
+  encodings: [zstd, br, gzip]
+  gzip_level: 6
+  brotli_level: 5
+  zstd_level: 3
+  media_types:
+    - text/
+    - application/json
+    - application/javascript
+    - application/xml
+    - application/problem+json
+    - image/svg+xml
@@ -0,0 +1,151 @@
+"""响应压缩, 各web框架的压缩中间件共用
+
+gzip使用标准库, br(brotli)、zstd(zstandard)在安装对应依赖时启用, 压缩后不小于原响应体时发送原响应体.
+"""
+import gzip
+import threading
+from typing import Callable, Dict, List, Mapping, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+from seatools.ioc import Bean, ConfigurationPropertiesBean
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+@ConfigurationPropertiesBean(prop='compression')
+class CompressionConfig(BaseModel):
+    """响应压缩配置, 对应配置文件中的compression"""
+    enabled: bool = True
+    # 最小压缩大小(字节), 小响应压缩收益低于压缩耗时
+    minimum_size: int = 1024
+    # 编码优先级, 客户端Accept-Encoding权重相同时按该顺序选择
+    encodings: List[str] = ['zstd', 'br', 'gzip']
+    gzip_level: int = 6
+    brotli_level: int = 5
+    zstd_level: int = 3
+    # 可压缩的Content-Type前缀, 图片、视频、压缩包等已压缩格式不在其中
+    media_types: List[str] = ['text/', 'application/json', 'application/javascript', 'application/xml',
+                              'application/problem+json', 'image/svg+xml']
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # mtime固定为0, 相同响应体压缩结果一致
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+_zstd_local = threading.local()
+
+
+def _zstd(body: bytes, level: int) -> bytes:
+    # ZstdCompressor非线程安全, 每个线程按压缩级别复用
+    compressors = getattr(_zstd_local, 'compressors', None)
+    if compressors is None:
+        compressors = _zstd_local.compressors = {}
+    compressor = compressors.get(level)
+    if compressor is None:
+        compressor = compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressor.compress(body)
+
+
+# 可用的压缩编码, key: Content-Encoding, value: 压缩函数(响应体, 压缩级别)
+COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {'gzip': _gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = _brotli
+if zstandard is not None:
+    COMPRESSORS['zstd'] = _zstd
+# Accept-Encoding选择结果的最大缓存数, 客户端种类有限, 超出时清空
+_MAX_CHOICES = 256
+
+
+@Bean
+class Compressor:
+    """响应压缩器, 选择编码并压缩响应体"""
+
+    def __init__(self, config: CompressionConfig):
+        self.config = config
+        self.encodings = [encoding for encoding in config.encodings if encoding in COMPRESSORS]
+        missing = [encoding for encoding in config.encodings if encoding not in COMPRESSORS]
+        if missing:
+            logger.info('压缩编码[{}]未安装依赖或不支持, 已忽略, 可用编码: {}', ', '.join(missing),
+                        ', '.join(self.encodings))
+        self.levels = {'gzip': config.gzip_level, 'br': config.brotli_level, 'zstd': config.zstd_level}
+        self.media_types = tuple(media_type.lower() for media_type in config.media_types)
+        self._choices: Dict[str, Optional[str]] = {}
+
+    def choose(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """按请求头Accept-Encoding选择压缩编码, 客户端不支持任何可用编码时返回None"""
+        if not accept_encoding or not self.config.enabled:
+            return None
+        try:
+            return self._choices[accept_encoding]
+        except KeyError:
+            pass
+        if len(self._choices) >= _MAX_CHOICES:
+            self._choices.clear()
+        encoding = self._choices[accept_encoding] = self._choose(accept_encoding)
+        return encoding
+
+    def _choose(self, accept_encoding: str) -> Optional[str]:
+        weights = {}
+        for item in accept_encoding.split(','):
+            name, _, params = item.partition(';')
+            weight = 1.0
+            for param in params.split(';'):
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        weight = float(value)
+                    except ValueError:
+                        weight = 0.0
+            weights[name.strip().lower()] = weight
+        chosen, chosen_weight = None, 0.0
+        for encoding in self.encodings:
+            weight = weights.get(encoding, weights.get('*', 0.0))
+            if weight > chosen_weight:
+                chosen, chosen_weight = encoding, weight
+        return chosen
+
+    def should_compress(self, status: int, size: int, headers: Mapping[str, str]) -> bool:
+        """响应是否需要压缩, headers需支持按不区分大小写的名称获取响应头
+
+        跳过小于最小压缩大小、非2xx(不含206部分内容)、已编码、禁止转换(Cache-Control: no-transform)
+        及Content-Type不在可压缩列表中的响应
+        """
+        if size < self.config.minimum_size or status < 200 or status >= 300 or status == 206:
+            return False
+        if 'content-encoding' in headers or 'content-range' in headers:
+            return False
+        if 'no-transform' in headers.get('cache-control', ''):
+            return False
+        return headers.get('content-type', '').lower().startswith(self.media_types)
+
+    def compress(self, body: bytes, encoding: str) -> Optional[bytes]:
+        """压缩响应体, 压缩后未变小时返回None"""
+        data = COMPRESSORS[encoding](body, self.levels[encoding])
+        return data if len(data) < len(body) else None
+
+
+def add_vary(vary: Optional[str]) -> str:
+    """在响应头Vary中追加Accept-Encoding"""
+    if not vary:
+        return 'Accept-Encoding'
+    if vary.strip() == '*' or 'accept-encoding' in [item.strip().lower() for item in vary.split(',')]:
+        return vary
+    return vary + ', Accept-Encoding'
+
+
+def weak_etag(etag: str) -> str:
+    """压缩后响应体变化, 强ETag改为弱ETag"""
+    return etag if etag.startswith('W/') else 'W/' + etag
@@ -0,0 +1,18 @@
+FROM python:3.9
+
+WORKDIR /app
+
+COPY . /app
+
+# 系统时区改为上海
+RUN ln -snf /usr/share/zoneinfo/Asia/Shanghai /etc/localtime && echo "Asia/Shanghai" > /etc/timezone
+
+RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple pip
+
+RUN pip install --upgrade -i https://pypi.tuna.tsinghua.edu.cn/simple poetry
+
+RUN poetry lock
+
+RUN poetry install --only main
+
+${install}CMD ${command}
@@ -0,0 +1,8 @@
+  ${cmd_name}:
+    container_name: ${project_name}_${cmd_name}
+    build:
+      context: .
+      dockerfile: ${cmd_name}.Dockerfile
+    image: ${project_name}_${cmd_name}:latest
+    volumes:
+      - ".:/app"
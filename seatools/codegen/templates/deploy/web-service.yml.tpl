@@ -0,0 +1,12 @@
+  ${service_name}:
+    container_name: ${project_name}_${service_name}
+    build:
+      context: .
+      dockerfile: ${service_name}.Dockerfile
+    image: ${project_name}_${service_name}:latest
+    volumes:
+      - ".:/app"
+    ports:
+      - "8000:8000"
+    environment:
+      - PYTHONPATH=/app
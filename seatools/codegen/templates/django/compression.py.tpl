@@ -0,0 +1,69 @@
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.cache import patch_vary_headers
+from seatools.ioc import Autowired
+
+from ${package_name}.compression.compressor import Compressor, weak_etag
+
+_compressor = Autowired(cls=Compressor)
+# 异步模式下不小于该大小(字节)的响应体在线程池中压缩, 避免阻塞事件循环, 压缩库压缩时释放GIL
+THREADPOOL_SIZE = 64 * 1024
+
+
+class CompressionMiddleware:
+    """响应压缩中间件, 按请求头Accept-Encoding选择zstd、br或gzip压缩响应体, 替代django.middleware.gzip.GZipMiddleware
+
+    流式响应、已编码及Content-Type不在可压缩列表中的响应原样返回, 同时支持同步与异步调用
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self._encoding(request, response)
+        if encoding is not None:
+            self._apply(response, encoding, _compressor.compress(response.content, encoding))
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        response = await self.get_response(request)
+        encoding = self._encoding(request, response)
+        if encoding is None:
+            return response
+        if len(response.content) >= THREADPOOL_SIZE:
+            data = await sync_to_async(_compressor.compress, thread_sensitive=False)(response.content, encoding)
+        else:
+            data = _compressor.compress(response.content, encoding)
+        self._apply(response, encoding, data)
+        return response
+
+    @staticmethod
+    def _encoding(request: HttpRequest, response: HttpResponseBase) -> Optional[str]:
+        """可压缩的响应添加Vary: Accept-Encoding(与GZipMiddleware一致), 返回客户端支持的编码"""
+        if response.streaming or not _compressor.config.enabled:
+            return None
+        if not _compressor.should_compress(response.status_code, len(response.content), response.headers):
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return _compressor.choose(request.headers.get('Accept-Encoding'))
+
+    @staticmethod
+    def _apply(response: HttpResponseBase, encoding: str, data: Optional[bytes]):
+        if data is None:
+            return
+        response.content = data
+        response.headers['Content-Length'] = str(len(data))
+        response.headers['Content-Encoding'] = encoding
+        etag = response.headers.get('ETag')
+        if etag:
+            response.headers['ETag'] = weak_etag(etag)
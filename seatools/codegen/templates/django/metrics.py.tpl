@@ -0,0 +1,58 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+from ${package_name}.metrics.prometheus import METRICS_PATH, UNMATCHED_ROUTE, render, request_metrics
+
+
+class PrometheusMiddleware:
+    """请求指标中间件, 按路由模板记录请求耗时、状态码及处理中的请求数, 需位于MIDDLEWARE首位
+
+    同时支持同步与异步调用, 基于asgi运行时无需切换线程
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path == METRICS_PATH:
+            return self.get_response(request)
+        start = request_metrics.begin()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._end(request, start, status)
+
+    async def __acall__(self, request: HttpRequest):
+        if request.path == METRICS_PATH:
+            return await self.get_response(request)
+        start = request_metrics.begin()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._end(request, start, status)
+
+    @staticmethod
+    def _end(request: HttpRequest, start: float, status: int):
+        # 按路由模板记录避免路径参数产生大量标签
+        match = request.resolver_match
+        route = '/' + match.route if match is not None else UNMATCHED_ROUTE
+        request_metrics.end(start, request.method, route, status)
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """汇总全部工作进程的指标"""
+    content, content_type = render()
+    return HttpResponse(content, content_type=content_type)
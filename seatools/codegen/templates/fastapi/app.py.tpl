@@ -0,0 +1,18 @@
+from fastapi import FastAPI
+from seatools.models import R
+${imports}
+from ${package_name}.boot import start
+
+# 启动项目依赖
+start()
+
+# app
+app = FastAPI(
+    title='${project_name}',${app_options}
+)
+${app_setup}
+
+@app.get('/')
+${hello_decorators}def hello():
+    return ${hello_response}
+
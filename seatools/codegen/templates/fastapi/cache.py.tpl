@@ -0,0 +1,151 @@
+import asyncio
+import functools
+import inspect
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+${response_import}from loguru import logger
+from seatools.ioc import Autowired
+from starlette.concurrency import run_in_threadpool
+
+from ${package_name}.caches.response_cache import CachedResponse, ResponseCache, cache_key, cacheable_headers, \
+    etag_matches, is_private, make_etag
+${imports}
+_cache = Autowired(cls=ResponseCache)
+# 进程内单飞, key: 缓存键, value: 正在生成响应的Future, 相同请求并发未命中时仅执行一次接口函数
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _redis():
+    """Redis二级缓存客户端, 为None时仅使用内存缓存"""
+    return ${redis_client}
+
+
+def cached(ttl: Optional[int] = None, vary: Sequence[str] = ()):
+    """GET接口响应缓存装饰器, 需位于路由装饰器之下, 示例:
+
+        @app.get('/items')
+        @cached(ttl=30, vary=['accept-language'])
+        async def items(page: int = 1):
+            ...
+
+    缓存键基于请求路径、查询参数及vary指定的请求头, 仅缓存状态码200且未设置cookie的响应及接口设置的响应头,
+    请求携带Authorization或Cookie且未在vary中指定时不使用缓存, 先查询进程内TTL + LRU缓存,
+    再查询Redis二级缓存(如已启用), 均未命中时相同缓存键的并发请求仅执行一次接口函数, 响应携带ETag,
+    请求头If-None-Match匹配时返回304, 响应头X-Cache标识是否命中缓存
+
+    Args:
+        ttl: 缓存时间(秒), 默认使用配置response_cache.ttl
+        vary: 参与缓存键计算的请求头名称, 按用户缓存时可指定authorization或cookie
+    """
+    vary = tuple(name.lower() for name in vary)
+
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+        request_name = next((name for name, param in signature.parameters.items() if param.annotation is Request), None)
+        inject_request = request_name is None
+        parameters = list(signature.parameters.values())
+        if inject_request:
+            request_name = '_cache_request'
+            parameters.append(inspect.Parameter(request_name, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        async def call(args, kwargs) -> Response:
+            if inspect.iscoroutinefunction(func):
+                result = await func(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(func, *args, **kwargs)
+            return result if isinstance(result, Response) else ${response_class}(jsonable_encoder(result))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs.pop(request_name) if inject_request else kwargs[request_name]
+            if request.method != 'GET' or not _cache.config.enabled or is_private(request.headers, vary):
+                return await call(args, kwargs)
+            key = cache_key(request.method, request.url.path, request.query_params.multi_items(),
+                            [(name, request.headers.get(name, '')) for name in vary])
+            entry = await _get(key)
+            if entry is not None:
+                return _respond(request, entry, 'HIT')
+            entry, response = await _load(key, lambda: call(args, kwargs), ttl or _cache.config.ttl)
+            if entry is None:
+                return response or await call(args, kwargs)
+            return _respond(request, entry, 'MISS' if response is not None else 'HIT')
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
+
+
+async def _get(key: str) -> Optional[CachedResponse]:
+    entry = _cache.local.get(key)
+    if entry is not None:
+        return entry
+    redis = _redis()
+    if redis is None:
+        return None
+    try:
+        data = await redis.get(_cache.redis_key('fastapi', key))
+    except Exception as e:
+        logger.warning('读取Redis响应缓存失败: {}', e)
+        return None
+    if data is None:
+        return None
+    entry = CachedResponse.loads(data)
+    if entry.expired():
+        return None
+    _cache.local.set(key, entry)
+    return entry
+
+
+async def _load(key: str, call: Callable, ttl: int) -> Tuple[Optional[CachedResponse], Optional[Response]]:
+    """单飞执行接口函数, 返回(缓存的响应, 接口函数返回的响应), 等待其他请求生成时接口函数返回的响应为None,
+    响应不可缓存或生成失败时缓存的响应为None"""
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future), None
+    future = _inflight[key] = asyncio.get_running_loop().create_future()
+    entry = None
+    try:
+        response = await call()
+        entry = _to_entry(response, ttl)
+        if entry is not None:
+            _cache.local.set(key, entry)
+            await _set_redis(key, entry, ttl)
+        return entry, response
+    finally:
+        del _inflight[key]
+        future.set_result(entry)
+
+
+def _to_entry(response: Response, ttl: int) -> Optional[CachedResponse]:
+    # 流式响应、文件响应等没有body, 不缓存
+    body = getattr(response, 'body', None)
+    if response.status_code != 200 or body is None or 'set-cookie' in response.headers:
+        return None
+    return CachedResponse(bytes(body), response.status_code, response.headers.get('content-type'),
+                          make_etag(body), time.time() + ttl, cacheable_headers(response.headers.items()))
+
+
+async def _set_redis(key: str, entry: CachedResponse, ttl: int):
+    redis = _redis()
+    if redis is None:
+        return
+    try:
+        await redis.set(_cache.redis_key('fastapi', key), entry.dumps(), ex=ttl)
+    except Exception as e:
+        logger.warning('写入Redis响应缓存失败: {}', e)
+
+
+def _respond(request: Request, entry: CachedResponse, state: str) -> Response:
+    headers = {'ETag': entry.etag, 'X-Cache': state}
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        response = Response(status_code=304, headers=headers)
+    else:
+        response = Response(entry.body, status_code=entry.status_code, headers=headers, media_type=entry.media_type)
+    # 同名响应头可能有多个, 逐个追加
+    for name, value in entry.headers:
+        response.headers.append(name, value)
+    return response
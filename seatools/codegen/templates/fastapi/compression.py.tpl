@@ -0,0 +1,69 @@
+from typing import Optional
+
+from seatools.ioc import Autowired
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ${package_name}.compression.compressor import Compressor, add_vary, weak_etag
+
+_compressor = Autowired(cls=Compressor)
+# 不小于该大小(字节)的响应体在线程池中压缩, 避免阻塞事件循环, 压缩库压缩时释放GIL
+THREADPOOL_SIZE = 64 * 1024
+
+
+class CompressionMiddleware:
+    """响应压缩中间件, 按请求头Accept-Encoding选择zstd、br或gzip压缩一次性发送的响应体, 可压缩的响应均添加Vary: Accept-Encoding
+
+    基于原生ASGI实现, 流式响应(分多次发送响应体)、已编码及Content-Type不在可压缩列表中的响应原样发送
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not _compressor.config.enabled:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = next((value for name, value in scope['headers'] if name == b'accept-encoding'), None)
+        # 客户端不支持任何可用编码时为None, 可压缩的响应仍需添加Vary
+        encoding = _compressor.choose(accept_encoding.decode('latin-1') if accept_encoding else None)
+        start_message = None
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+            start, start_message = start_message, None
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                await self._compress(start, message, encoding)
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _compress(start: Message, message: Message, encoding: Optional[str]):
+        body = message.get('body', b'')
+        headers = MutableHeaders(raw=list(start.get('headers', ())))
+        if not _compressor.should_compress(start['status'], len(body), headers):
+            return
+        headers['Vary'] = add_vary(headers.get('vary'))
+        if encoding is None:
+            data = None
+        elif len(body) >= THREADPOOL_SIZE:
+            data = await run_in_threadpool(_compressor.compress, body, encoding)
+        else:
+            data = _compressor.compress(body, encoding)
+        if data is not None:
+            headers['Content-Encoding'] = encoding
+            headers['Content-Length'] = str(len(data))
+            etag = headers.get('etag')
+            if etag:
+                headers['ETag'] = weak_etag(etag)
+            message['body'] = data
+        start['headers'] = headers.raw
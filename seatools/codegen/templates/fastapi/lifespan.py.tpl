@@ -0,0 +1,20 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+from seatools.ioc import Autowired
+
+${imports}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """应用生命周期, 工作进程启动时创建连接池, 退出时按创建的相反顺序释放连接池"""
+    opened = []
+    try:
+        for pool in [${pools}]:
+            await pool.open()
+            opened.append(pool)
+        yield
+    finally:
+        for pool in reversed(opened):
+            await pool.close()
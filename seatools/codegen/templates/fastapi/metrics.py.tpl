@@ -0,0 +1,41 @@
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ${package_name}.metrics.prometheus import METRICS_PATH, UNMATCHED_ROUTE, render, request_metrics
+
+
+class PrometheusMiddleware:
+    """请求指标中间件, 按路由模板记录请求耗时、状态码及处理中的请求数
+
+    基于原生ASGI实现, 不经过BaseHTTPMiddleware的请求与响应包装
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['path'] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = request_metrics.begin()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 路由匹配后scope中包含路由, 按路由模板记录避免路径参数产生大量标签
+            route = getattr(scope.get('route'), 'path', None) or UNMATCHED_ROUTE
+            request_metrics.end(start, scope['method'], route, status)
+
+
+async def metrics(request: Request) -> Response:
+    """汇总全部工作进程的指标"""
+    content, content_type = render()
+    return Response(content, headers={'Content-Type': content_type})
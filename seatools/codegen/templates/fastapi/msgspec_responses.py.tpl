@@ -0,0 +1,25 @@
+from typing import Any
+
+import msgspec
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def default(obj: Any) -> Any:
+    """msgspec原生不支持的类型的序列化, pydantic模型(例如seatools.models.R)转为dict"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise NotImplementedError('Type is not JSON serializable: {}'.format(type(obj).__name__))
+
+
+_encoder = msgspec.json.Encoder(enc_hook=default)
+
+
+class FastJSONResponse(JSONResponse):
+    """基于msgspec序列化的JSON响应, 支持直接传入R等pydantic模型
+
+    作为应用的默认响应类时FastAPI仍会先经过jsonable_encoder, 接口直接返回FastJSONResponse(R.ok(...))可跳过jsonable_encoder
+    """
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
@@ -0,0 +1,22 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def default(obj: Any) -> Any:
+    """orjson原生不支持的类型的序列化, pydantic模型(例如seatools.models.R)转为dict"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError('Type is not JSON serializable: {}'.format(type(obj).__name__))
+
+
+class FastJSONResponse(JSONResponse):
+    """基于orjson序列化的JSON响应, 支持直接传入R等pydantic模型
+
+    作为应用的默认响应类时FastAPI仍会先经过jsonable_encoder, 接口直接返回FastJSONResponse(R.ok(...))可跳过jsonable_encoder
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import signal
+import logging
+import traceback
+import multiprocessing
+import click
+import uvicorn
+from typing import Optional
+
+logger = logging.getLogger('uvicorn.error')
+# 工作进程存活时间小于该值(秒)时视为启动失败, 连续启动失败达到上限后主进程退出, 避免启动失败的工作进程被不断重新fork
+MIN_WORKER_LIFETIME = 1.0
+MAX_STARTUP_FAILURES = 5
+# 工作进程启动失败后重新fork的等待时间(秒), 每次连续失败后翻倍, 不超过MAX_RESTART_DELAY
+RESTART_DELAY = 0.1
+MAX_RESTART_DELAY = 5.0
+
+
+def serve_prefork(config: uvicorn.Config, workers: int) -> None:
+    """主进程启动项目依赖并加载应用后fork工作进程, 工作进程以写时复制方式共享已初始化的容器, 异常退出的工作进程由主进程重新fork
+
+    注意: 项目依赖启动时若创建了数据库连接等不可跨进程共享的资源, 需在工作进程中重新创建
+    """
+    # 加载应用, 导入${package_name}.fastapi.app时启动项目依赖
+    config.load()
+    sock = config.bind_socket()
+    # key: 工作进程pid, value: fork时间
+    children = {}
+    running = True
+    failures = 0
+
+    def fork_worker():
+        pid = os.fork()
+        if pid == 0:
+            # 工作进程不能返回主进程的循环中继续fork, 异常或启动失败时以非零状态码退出
+            code = 1
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server = uvicorn.Server(config=config)
+                server.run(sockets=[sock])
+                code = 0 if server.started else 3
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        fork_worker()
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or not running:
+            continue
+        if time.monotonic() - started >= MIN_WORKER_LIFETIME:
+            failures = 0
+        else:
+            failures += 1
+            if failures >= MAX_STARTUP_FAILURES:
+                logger.error('工作进程连续%s次启动失败, 主进程退出', failures)
+                stop(None, None)
+                continue
+            time.sleep(min(RESTART_DELAY * 2 ** (failures - 1), MAX_RESTART_DELAY))
+        # 等待期间可能已收到终止信号
+        if running:
+            fork_worker()
+    sock.close()
+    if failures >= MAX_STARTUP_FAILURES:
+        sys.exit(1)
+
+
+${uvicorn_options}@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
+@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
+@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
+@click.option('--port', default=8000, help='服务端口')
+@click.option('--workers', default=1, help='工作进程数')
+@click.option('--reload', default=None, type=bool,
+              help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
+${uvicorn_click_options}@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(project_dir: Optional[str] = None,
+         host: Optional[str] = '127.0.0.1',
+         port: Optional[int] = 8000,
+         workers: Optional[int] = 1,
+         env: Optional[str] = 'dev',
+         reload: Optional[bool] = None,
+         **options) -> None:
+    """FastAPI cmd, 多进程时主进程启动项目依赖后fork工作进程."""
+    if project_dir:
+        os.environ['PROJECT_DIR'] = project_dir
+    if env:
+        os.environ['ENV'] = env
+
+    # 单进程、热重启及不支持fork的平台(windows)按uvicorn默认方式运行, 项目依赖在导入应用时启动
+    if workers <= 1 or reload or not hasattr(os, 'fork'):
+        uvicorn.run('${package_name}.fastapi.app:app', host=host, port=port, workers=workers, reload=reload,
+                    **uvicorn_options(env, **options))
+        return
+
+    # start uvicorn workers
+    serve_prefork(uvicorn.Config('${package_name}.fastapi.app:app', host=host, port=port,
+                                 **uvicorn_options(env, **options)), workers)
+
+
+if __name__ == "__main__":
+    # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
+    multiprocessing.freeze_support()
+    main()
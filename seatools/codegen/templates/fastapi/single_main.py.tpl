@@ -0,0 +1,38 @@
+import os
+import multiprocessing
+import click
+import uvicorn
+from typing import Optional
+
+
+${uvicorn_options}@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
+@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
+@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
+@click.option('--port', default=8000, help='服务端口')
+@click.option('--workers', default=1, help='工作进程数')
+@click.option('--reload', default=None, help='是否热重启服务器, 默认情况下dev环境开始热重启, test与pro环境不热重启, true: 开启, false: 不开启')
+${uvicorn_click_options}@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(project_dir: Optional[str] = None,
+         host: Optional[str] = '127.0.0.1',
+         port: Optional[int] = 8000,
+         workers: Optional[int] = 1,
+         env: Optional[str] = 'dev',
+         reload: Optional[bool] = None,
+         **options) -> None:
+    """FastAPI cmd, 项目依赖仅在导入${package_name}.fastapi.app时启动, 每个进程仅启动一次."""
+    if project_dir:
+        os.environ['PROJECT_DIR'] = project_dir
+    if env:
+        os.environ['ENV'] = env
+
+    # start uvicorn, 多进程或热重启时主进程仅管理工作进程, 不启动项目依赖
+    uvicorn.run('${package_name}.fastapi.app:app', host=host, port=port, workers=workers, reload=reload,
+                **uvicorn_options(env, **options))
+
+
+if __name__ == "__main__":
+    # windows 多进程需要执行该方法, linux 与 mac 执行无效不影响
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,19 @@
+from flask import Flask
+from seatools.models import R
+from uvicorn.middleware.wsgi import WSGIMiddleware
+${imports}
+from ${package_name}.boot import start
+
+# 启动项目依赖
+start()
+
+app = Flask(__name__)
+${app_setup}
+
+@app.get('/')
+${hello_decorators}def hello():
+    return R.ok(data='Hello ${project_name} by Flask!').model_dump()
+
+
+# wsgi 转 asgi
+asgi_app = WSGIMiddleware(app)
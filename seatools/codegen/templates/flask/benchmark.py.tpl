@@ -0,0 +1,127 @@
+"""Flask原生wsgi与wsgi转asgi(uvicorn WSGIMiddleware)的进程内微基准
+
+不经过网络与服务器, 仅对比两种调用链路处理同一请求的开销, 按请求体大小分别统计吞吐量与延迟分位数.
+wsgi转asgi需安装uvicorn, 未安装时仅统计原生wsgi.
+
+执行: poetry run python -m ${package_name}.flask.benchmark --requests 2000
+"""
+import asyncio
+import io
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+import click
+from flask import Flask, request
+
+# 基准使用的回显接口, 仅在执行基准时注册
+ECHO_PATH = '/__benchmark/echo'
+# 与uvicorn一致按64KB分块接收请求体
+CHUNK_SIZE = 64 * 1024
+
+
+def _echo():
+    return request.get_data()
+
+
+def call_wsgi(app: Flask, body: bytes) -> bytes:
+    """原生wsgi调用"""
+    environ = {
+        'REQUEST_METHOD': 'POST', 'SCRIPT_NAME': '', 'PATH_INFO': ECHO_PATH, 'QUERY_STRING': '',
+        'SERVER_NAME': 'benchmark', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'CONTENT_TYPE': 'application/octet-stream', 'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        return chunks.append
+
+    result = app(environ, start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return b''.join(chunks)
+
+
+async def call_asgi(asgi_app, body: bytes) -> bytes:
+    """wsgi转asgi调用"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+        'path': ECHO_PATH, 'raw_path': ECHO_PATH.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(b'content-type', b'application/octet-stream'), (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 0), 'server': ('benchmark', 80),
+    }
+    chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)] or [b'']
+    index = 0
+    response = []
+
+    async def receive():
+        nonlocal index
+        if index >= len(chunks):
+            return {'type': 'http.disconnect'}
+        index += 1
+        return {'type': 'http.request', 'body': chunks[index - 1], 'more_body': index < len(chunks)}
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            response.append(message.get('body', b''))
+
+    await asgi_app(scope, receive, send)
+    return b''.join(response)
+
+
+def _report(name: str, size: int, latencies: List[float]):
+    latencies.sort()
+    total = sum(latencies)
+    click.echo('{:<12}{:>10}{:>14.1f}{:>12.3f}{:>12.3f}{:>12.3f}'.format(
+        name, size, len(latencies) / total, statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000, latencies[-1] * 1000))
+
+
+def _measure(call: Callable[[bytes], bytes], body: bytes, requests: int) -> List[float]:
+    # 预热并校验回显结果
+    if call(body) != body:
+        raise RuntimeError('回显结果与请求体不一致')
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        call(body)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+@click.command()
+@click.option('--requests', default=1000, help='每种请求体大小的请求数, 默认: 1000')
+@click.option('--sizes', default='0,65536,1048576', help='请求体大小(字节)列表, 逗号分隔, 默认: 0,65536,1048576')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(requests: int = 1000, sizes: str = '0,65536,1048576'):
+    """对比原生wsgi与wsgi转asgi的吞吐量(req/s)与延迟(ms)"""
+    # 项目依赖启动时会扫描导入本模块, 应用仅在执行基准时导入, 回显接口仅在执行基准时注册
+    from ${package_name}.flask.app import app
+    app.add_url_rule(ECHO_PATH, 'benchmark_echo', _echo, methods=['POST'])
+    try:
+        from uvicorn.middleware.wsgi import WSGIMiddleware
+    except ImportError:
+        WSGIMiddleware = None
+        click.echo('未安装uvicorn, 跳过wsgi转asgi', err=True)
+    loop = asyncio.new_event_loop()
+    click.echo('{:<12}{:>10}{:>14}{:>12}{:>12}{:>12}'.format('mode', 'bytes', 'req/s', 'p50', 'p99', 'max'))
+    try:
+        for size in [int(size) for size in sizes.split(',') if size.strip()]:
+            body = b'x' * size
+            _report('wsgi', size, _measure(lambda data: call_wsgi(app, data), body, requests))
+            if WSGIMiddleware is not None:
+                asgi_app = WSGIMiddleware(app)
+                _report('wsgi->asgi', size, _measure(
+                    lambda data: loop.run_until_complete(call_asgi(asgi_app, data)), body, requests))
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
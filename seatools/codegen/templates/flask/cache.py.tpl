@@ -0,0 +1,143 @@
+import functools
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+from flask import Response, current_app, request
+from loguru import logger
+from seatools.ioc import Autowired
+
+from ${package_name}.caches.response_cache import CachedResponse, ResponseCache, cache_key, cacheable_headers, \
+    etag_matches, is_private, make_etag
+
+_cache = Autowired(cls=ResponseCache)
+
+
+class _Flight:
+    """正在生成的响应, 生成完成后唤醒等待的线程"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[CachedResponse] = None
+
+
+# 进程内单飞, key: 缓存键, value: 正在生成的响应, 相同请求并发未命中时仅执行一次视图函数
+_inflight: Dict[str, _Flight] = {}
+_inflight_lock = threading.Lock()
+# Redis二级缓存客户端, 配置response_cache.redis_url时启用
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def _redis():
+    """Redis二级缓存客户端, 每个工作进程首次使用时创建, 未配置response_cache.redis_url时为None, 仅使用内存缓存"""
+    global _redis_client
+    if _redis_client is None and _cache.config.redis_url:
+        with _redis_lock:
+            if _redis_client is None:
+                from redis import Redis
+                _redis_client = Redis.from_url(_cache.config.redis_url, socket_timeout=1, socket_connect_timeout=1)
+    return _redis_client
+
+
+def cached(ttl: Optional[int] = None, vary: Sequence[str] = ()):
+    """GET视图响应缓存装饰器, 需位于路由装饰器之下, 示例:
+
+        @app.get('/items')
+        @cached(ttl=30, vary=['Accept-Language'])
+        def items():
+            ...
+
+    缓存键基于请求路径、查询参数及vary指定的请求头, 仅缓存状态码200且未设置cookie的响应及视图设置的响应头,
+    请求携带Authorization或Cookie且未在vary中指定时不使用缓存, 先查询进程内TTL + LRU缓存,
+    再查询Redis二级缓存(如已启用), 均未命中时相同缓存键的并发请求仅执行一次视图函数, 响应携带ETag,
+    请求头If-None-Match匹配时返回304, 响应头X-Cache标识是否命中缓存
+
+    Args:
+        ttl: 缓存时间(秒), 默认使用配置response_cache.ttl
+        vary: 参与缓存键计算的请求头名称, 按用户缓存时可指定Authorization或Cookie
+    """
+    vary = tuple(name.lower() for name in vary)
+
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or not _cache.config.enabled or is_private(request.headers, vary):
+                return func(*args, **kwargs)
+            key = cache_key(request.method, request.path, request.args.items(multi=True),
+                            [(name, request.headers.get(name, '')) for name in vary])
+            entry = _get(key)
+            if entry is not None:
+                return _respond(entry, 'HIT')
+            with _inflight_lock:
+                flight = _inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _inflight[key] = _Flight()
+            if not leader:
+                flight.done.wait()
+                return _respond(flight.entry, 'HIT') if flight.entry is not None else func(*args, **kwargs)
+            try:
+                response = current_app.make_response(func(*args, **kwargs))
+                flight.entry = _to_entry(response, ttl or _cache.config.ttl)
+                if flight.entry is None:
+                    return response
+                _cache.local.set(key, flight.entry)
+                _set_redis(key, flight.entry, ttl or _cache.config.ttl)
+                return _respond(flight.entry, 'MISS')
+            finally:
+                with _inflight_lock:
+                    del _inflight[key]
+                flight.done.set()
+
+        return wrapper
+
+    return decorator
+
+
+def _get(key: str) -> Optional[CachedResponse]:
+    entry = _cache.local.get(key)
+    if entry is not None:
+        return entry
+    redis = _redis()
+    if redis is None:
+        return None
+    try:
+        data = redis.get(_cache.redis_key('flask', key))
+    except Exception as e:
+        logger.warning('读取Redis响应缓存失败: {}', e)
+        return None
+    if data is None:
+        return None
+    entry = CachedResponse.loads(data)
+    if entry.expired():
+        return None
+    _cache.local.set(key, entry)
+    return entry
+
+
+def _to_entry(response: Response, ttl: int) -> Optional[CachedResponse]:
+    # 流式响应、文件响应不缓存
+    if response.status_code != 200 or response.is_streamed or response.direct_passthrough \
+            or 'Set-Cookie' in response.headers:
+        return None
+    body = response.get_data()
+    return CachedResponse(body, response.status_code, response.content_type, make_etag(body), time.time() + ttl,
+                          cacheable_headers(response.headers.items()))
+
+
+def _set_redis(key: str, entry: CachedResponse, ttl: int):
+    redis = _redis()
+    if redis is None:
+        return
+    try:
+        redis.set(_cache.redis_key('flask', key), entry.dumps(), ex=ttl)
+    except Exception as e:
+        logger.warning('写入Redis响应缓存失败: {}', e)
+
+
+def _respond(entry: CachedResponse, state: str) -> Response:
+    headers = [('ETag', entry.etag), ('X-Cache', state), *entry.headers]
+    if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+        return Response(status=304, headers=headers)
+    return Response(entry.body, status=entry.status_code, headers=headers, content_type=entry.media_type)
@@ -0,0 +1,33 @@
+from flask import Flask, Response, request
+from seatools.ioc import Autowired
+
+from ${package_name}.compression.compressor import Compressor, add_vary, weak_etag
+
+_compressor = Autowired(cls=Compressor)
+
+
+def init_compression(app: Flask):
+    """注册响应压缩钩子, 按请求头Accept-Encoding选择zstd、br或gzip压缩响应体,
+    流式响应、文件响应、已编码及Content-Type不在可压缩列表中的响应原样返回"""
+
+    @app.after_request
+    def _compress(response: Response):
+        if response.is_streamed or response.direct_passthrough or not _compressor.config.enabled:
+            return response
+        body = response.get_data()
+        if not _compressor.should_compress(response.status_code, len(body), response.headers):
+            return response
+        # 客户端不支持任何可用编码时同样添加Vary, 避免共享缓存将未压缩的响应返回给其他客户端
+        response.headers['Vary'] = add_vary(response.headers.get('Vary'))
+        encoding = _compressor.choose(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        data = _compressor.compress(body, encoding)
+        if data is None:
+            return response
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        etag = response.headers.get('ETag')
+        if etag:
+            response.headers['ETag'] = weak_etag(etag)
+        return response
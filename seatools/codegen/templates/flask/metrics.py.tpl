@@ -0,0 +1,34 @@
+from flask import Flask, Response, g, request
+
+from ${package_name}.metrics.prometheus import METRICS_PATH, UNMATCHED_ROUTE, render, request_metrics
+
+
+def init_metrics(app: Flask):
+    """注册请求指标钩子及/metrics接口, 按路由规则记录请求耗时、状态码及处理中的请求数"""
+
+    @app.before_request
+    def _begin_metrics():
+        if request.path != METRICS_PATH:
+            g.metrics_start = request_metrics.begin()
+
+    @app.after_request
+    def _record_status(response: Response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _end_metrics(exc=None):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        # 按路由规则记录避免路径参数产生大量标签
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+        request_metrics.end(start, request.method, route, g.pop('metrics_status', 500))
+
+    app.add_url_rule(METRICS_PATH, 'metrics', metrics)
+
+
+def metrics():
+    """汇总全部工作进程的指标"""
+    content, content_type = render()
+    return Response(content, headers={'Content-Type': content_type})
@@ -0,0 +1,54 @@
+"""请求指标中间件的进程内微基准
+
+中间件每个请求仅执行request_metrics.begin与request_metrics.end, 本基准按路由数分别统计两者的单次耗时(微秒),
+并统计/metrics接口汇总全部工作进程指标的耗时. 基准使用独立的临时指标目录, 不影响运行中的服务.
+
+执行: poetry run python -m ${package_name}.metrics.benchmark --requests 100000
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import click
+
+
+def _per_request(request_metrics, requests: int, routes: int, rounds: int = 5) -> float:
+    """返回多轮中位数的单次请求指标记录耗时(微秒), 已扣除空循环耗时"""
+    names = ['/route/{}'.format(i) for i in range(routes)]
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(requests):
+            names[i % routes]
+        baseline = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(requests):
+            request_metrics.end(request_metrics.begin(), 'GET', names[i % routes], 200)
+        samples.append((time.perf_counter() - start - baseline) / requests * 1e6)
+    return statistics.median(samples)
+
+
+@click.command()
+@click.option('--requests', default=100000, help='每轮请求数, 默认: 100000')
+@click.option('--routes', default='1,10,100', help='路由数列表, 逗号分隔, 默认: 1,10,100')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(requests: int = 100000, routes: str = '1,10,100'):
+    """统计请求指标记录的单次耗时(us)及/metrics汇总耗时(ms)"""
+    # 项目依赖启动时会扫描导入本模块, 指标目录及指标模块仅在执行基准时设置与导入
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='${package_name}_metrics_benchmark_')
+    from ${package_name}.metrics.prometheus import render, request_metrics
+    try:
+        click.echo('{:<10}{:>16}'.format('routes', 'us/request'))
+        for count in [int(count) for count in routes.split(',') if count.strip()]:
+            click.echo('{:<10}{:>16.2f}'.format(count, _per_request(request_metrics, requests, count)))
+        start = time.perf_counter()
+        content, _ = render()
+        click.echo('/metrics: {:.2f}ms, {}bytes'.format((time.perf_counter() - start) * 1000, len(content)))
+    finally:
+        shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
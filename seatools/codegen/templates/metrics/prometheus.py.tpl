@@ -0,0 +1,153 @@
+"""基于prometheus_client多进程模式的请求指标
+
+各工作进程将指标写入PROMETHEUS_MULTIPROC_DIR目录下按进程区分的文件, 访问/metrics时汇总全部工作进程的指标.
+未设置PROMETHEUS_MULTIPROC_DIR时, 主进程(或单进程)导入时创建仅当前用户可访问的随机临时目录并通过该环境变量传递给工作进程,
+退出时删除该目录, gunicorn需开启preload_app(生成的gunicorn_conf默认开启), prometheus_client需在本模块设置目录后导入.
+"""
+import atexit
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+
+def _multiprocess_dir() -> str:
+    parent = multiprocessing.parent_process()
+    if parent is None:
+        # 随机目录由mkdtemp以0700权限创建, 其他用户无法预先创建或替换为符号链接
+        path = tempfile.mkdtemp(prefix='${package_name}_metrics_')
+        atexit.register(_remove_dir, path, os.getpid())
+        return path
+    # uvicorn多工作进程时主进程不导入应用, 以spawn方式启动的工作进程使用按主进程区分的目录, 已存在时需为当前用户所有且权限为0700
+    path = os.path.join(tempfile.gettempdir(), '${package_name}_metrics_{}'.format(parent.pid))
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        _check_private_dir(path)
+    return path
+
+
+def _check_private_dir(path: str):
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or (hasattr(os, 'getuid') and st.st_uid != os.getuid()) \
+            or stat.S_IMODE(st.st_mode) & 0o077:
+        raise RuntimeError('指标目录不是当前用户私有的目录: {}, 可通过环境变量PROMETHEUS_MULTIPROC_DIR指定'.format(path))
+
+
+def _remove_dir(path: str, owner: int):
+    # fork的工作进程继承退出回调, 仅主进程退出时删除
+    if os.getpid() == owner:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = _multiprocess_dir()
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# 指标接口路径, 不统计该接口的请求
+METRICS_PATH = '/metrics'
+# 未匹配路由(例如404)的route标签, 避免按原始路径产生大量标签
+UNMATCHED_ROUTE = '<unmatched>'
+# 标准请求方法, 其余请求方法的method标签记为OTHER, 避免任意请求方法产生大量标签
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'CONNECT', 'OPTIONS', 'TRACE', 'PATCH'))
+OTHER_METHOD = 'OTHER'
+# 工作进程常驻内存的更新间隔(秒)
+RSS_INTERVAL = 5
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', '请求耗时(秒)', ['method', 'route'],
+                            buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+REQUESTS = Counter('http_requests_total', '请求数', ['method', 'route', 'status'])
+IN_PROGRESS = Gauge('http_requests_in_progress', '处理中的请求数', multiprocess_mode='livesum')
+WORKER_RSS = Gauge('worker_resident_memory_bytes', '进程常驻内存(字节)', multiprocess_mode='liveall')
+
+
+def _rss() -> Optional[int]:
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # 非linux平台取峰值常驻内存, mac单位为字节, 其余为KB
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+class RequestMetrics:
+    """请求指标记录, 缓存各标签组合的指标子项, 每个请求仅执行两次字典查找与指标文件写入"""
+
+    def __init__(self):
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str, int], Counter] = {}
+        self._rss_at = 0.0
+
+    def begin(self) -> float:
+        """请求开始, 返回开始时间"""
+        IN_PROGRESS.inc()
+        return time.perf_counter()
+
+    def end(self, start: float, method: str, route: str, status: int):
+        """请求结束, 记录耗时、状态码, 并按间隔更新工作进程常驻内存"""
+        now = time.perf_counter()
+        IN_PROGRESS.dec()
+        if method not in HTTP_METHODS:
+            method = OTHER_METHOD
+        key = (method, route)
+        latency = self._latency.get(key)
+        if latency is None:
+            latency = self._latency[key] = REQUEST_LATENCY.labels(method, route)
+        latency.observe(now - start)
+        status_key = (method, route, status)
+        requests = self._requests.get(status_key)
+        if requests is None:
+            requests = self._requests[status_key] = REQUESTS.labels(method, route, str(status))
+        requests.inc()
+        if now - self._rss_at > RSS_INTERVAL:
+            self.update_rss(now)
+
+    def update_rss(self, now: Optional[float] = None):
+        self._rss_at = time.perf_counter() if now is None else now
+        rss = _rss()
+        if rss is not None:
+            WORKER_RSS.set(rss)
+
+
+request_metrics = RequestMetrics()
+# 进程启动时记录一次常驻内存, 此后按间隔在请求结束及汇总指标时更新
+request_metrics.update_rss()
+
+
+def _mark_dead_processes(path: str):
+    # 清理已退出工作进程的实时指标(处理中的请求数、常驻内存), 计数与耗时指标保留
+    if os.name != 'posix':
+        return
+    pids = set()
+    for filename in os.listdir(path):
+        if filename.startswith('gauge_live') and filename.endswith('.db'):
+            pid = filename[:-3].rsplit('_', 1)[-1]
+            if pid.isdigit():
+                pids.add(int(pid))
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            multiprocess.mark_process_dead(pid, path)
+        except PermissionError:
+            pass
+
+
+def render() -> Tuple[bytes, str]:
+    """汇总全部工作进程的指标, 返回(指标内容, Content-Type)"""
+    request_metrics.update_rss()
+    _mark_dead_processes(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,50 @@
+from typing import Optional
+
+import httpx
+from pydantic import BaseModel
+from seatools.ioc import Autowired, Bean, ConfigurationPropertiesBean
+
+
+@ConfigurationPropertiesBean(prop='httpx_pool')
+class HttpxPoolConfig(BaseModel):
+    """HTTP客户端连接池配置, 对应配置文件中的httpx_pool"""
+    base_url: str = ''
+    # 最大连接数
+    max_connections: int = 100
+    # 最大保持的空闲长连接数
+    max_keepalive_connections: int = 20
+    # 空闲长连接的保持时间(秒)
+    keepalive_expiry: float = 5
+    # 请求超时时间(秒)
+    timeout: float = 10
+
+
+@Bean
+class HttpxPool:
+    """HTTP客户端连接池, 每个工作进程在应用lifespan启动时创建一次, 退出时关闭全部连接"""
+
+    def __init__(self, config: HttpxPoolConfig):
+        self.config = config
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def open(self):
+        if self.client is not None:
+            return
+        limits = httpx.Limits(max_connections=self.config.max_connections,
+                              max_keepalive_connections=self.config.max_keepalive_connections,
+                              keepalive_expiry=self.config.keepalive_expiry)
+        self.client = httpx.AsyncClient(base_url=self.config.base_url, timeout=self.config.timeout, limits=limits)
+
+    async def close(self):
+        if self.client is None:
+            return
+        await self.client.aclose()
+        self.client = None
+
+
+_pool = Autowired(cls=HttpxPool)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """FastAPI依赖, 获取工作进程共享的HTTP客户端, 示例: client: httpx.AsyncClient = Depends(get_http_client)"""
+    return _pool.client
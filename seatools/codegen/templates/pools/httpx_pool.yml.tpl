@@ -0,0 +1,6 @@
+# HTTP客户端连接池, 每个工作进程的连接数上限为max_connections
+httpx_pool:
+  base_url: ''
+  max_connections: 100
+  max_keepalive_connections: 20
+  timeout: 10
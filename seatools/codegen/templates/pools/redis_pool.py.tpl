@@ -0,0 +1,59 @@
+from typing import Optional
+
+from pydantic import BaseModel
+from redis.asyncio import BlockingConnectionPool, Redis
+from seatools.ioc import Autowired, Bean, ConfigurationPropertiesBean
+
+
+@ConfigurationPropertiesBean(prop='redis_pool')
+class RedisPoolConfig(BaseModel):
+    """Redis连接池配置, 对应配置文件中的redis_pool"""
+    url: str = 'redis://127.0.0.1:6379/0'
+    # 最大连接数, 连接用尽时等待归还而不是新建连接
+    max_connections: int = 50
+    # 获取连接的最长等待时间(秒)
+    pool_timeout: float = 5
+    socket_timeout: float = 5
+    socket_connect_timeout: float = 5
+    # 空闲连接的健康检查间隔(秒)
+    health_check_interval: int = 30
+
+
+@Bean
+class RedisPool:
+    """Redis连接池, 每个工作进程在应用lifespan启动时创建一次, 退出时断开全部连接
+
+    测试时可在应用启动前通过set_client设置客户端(例如fakeredis.aioredis.FakeRedis()), 已设置时不再创建连接池
+    """
+
+    def __init__(self, config: RedisPoolConfig):
+        self.config = config
+        self.client: Optional[Redis] = None
+
+    def set_client(self, client: Redis):
+        self.client = client
+
+    async def open(self):
+        if self.client is not None:
+            return
+        pool = BlockingConnectionPool.from_url(self.config.url,
+                                               max_connections=self.config.max_connections,
+                                               timeout=self.config.pool_timeout,
+                                               socket_timeout=self.config.socket_timeout,
+                                               socket_connect_timeout=self.config.socket_connect_timeout,
+                                               health_check_interval=self.config.health_check_interval)
+        self.client = Redis(connection_pool=pool)
+
+    async def close(self):
+        if self.client is None:
+            return
+        await self.client.aclose(close_connection_pool=True)
+        self.client = None
+
+
+_pool = Autowired(cls=RedisPool)
+
+
+def get_redis() -> Redis:
+    """FastAPI依赖, 获取工作进程共享的Redis客户端, 示例: redis: Redis = Depends(get_redis)"""
+    return _pool.client
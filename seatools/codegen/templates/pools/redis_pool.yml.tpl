@@ -0,0 +1,5 @@
+# Redis连接池, 每个工作进程的连接数上限为max_connections
+redis_pool:
+  url: 'redis://127.0.0.1:6379/0'
+  max_connections: 50
+  pool_timeout: 5
@@ -0,0 +1,60 @@
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel
+from seatools.ioc import Autowired, Bean, ConfigurationPropertiesBean
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+
+@ConfigurationPropertiesBean(prop='sqlalchemy_pool')
+class SqlAlchemyPoolConfig(BaseModel):
+    """异步数据库连接池配置, 对应配置文件中的sqlalchemy_pool"""
+    url: str = 'sqlite+aiosqlite:///:memory:'
+    # 连接池保持的连接数
+    pool_size: int = 5
+    # 连接数达到pool_size后允许额外创建的连接数
+    max_overflow: int = 10
+    # 获取连接的最长等待时间(秒)
+    pool_timeout: float = 30
+    # 连接回收时间(秒), 需小于数据库的空闲连接超时时间
+    pool_recycle: int = 1800
+    # 获取连接时检测连接是否可用
+    pool_pre_ping: bool = True
+    echo: bool = False
+
+
+@Bean
+class SqlAlchemyPool:
+    """异步数据库连接池, 每个工作进程在应用lifespan启动时创建一次, 退出时释放全部连接"""
+
+    def __init__(self, config: SqlAlchemyPoolConfig):
+        self.config = config
+        self.engine: Optional[AsyncEngine] = None
+        self.sessionmaker: Optional[async_sessionmaker] = None
+
+    async def open(self):
+        if self.engine is not None:
+            return
+        options = {'pool_recycle': self.config.pool_recycle, 'pool_pre_ping': self.config.pool_pre_ping}
+        # sqlite不使用连接数限制的连接池
+        if make_url(self.config.url).get_backend_name() != 'sqlite':
+            options.update(pool_size=self.config.pool_size, max_overflow=self.config.max_overflow,
+                           pool_timeout=self.config.pool_timeout)
+        self.engine = create_async_engine(self.config.url, echo=self.config.echo, **options)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def close(self):
+        if self.engine is None:
+            return
+        await self.engine.dispose()
+        self.engine = None
+        self.sessionmaker = None
+
+
+_pool = Autowired(cls=SqlAlchemyPool)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI依赖, 每个请求从连接池获取一个会话, 请求结束后归还连接, 示例: session: AsyncSession = Depends(get_session)"""
+    async with _pool.sessionmaker() as session:
+        yield session
@@ -0,0 +1,7 @@
+# 异步数据库连接池, 每个工作进程的连接数上限为pool_size + max_overflow
+sqlalchemy_pool:
+  url: 'sqlite+aiosqlite:///:memory:'
+  pool_size: 5
+  max_overflow: 10
+  pool_timeout: 30
+  pool_recycle: 1800
@@ -0,0 +1,25 @@
+"""${title} gunicorn配置, 命令行参数(--host, --port, --workers)优先于该配置"""
+import multiprocessing
+
+# 进程名称, 包含包名以区分同一主机上的多个项目
+proc_name = '${proc_name}'
+# 主进程pid文件由启动命令按端口设置为/tmp/${proc_name}_<端口>.pid(可通过--pidfile指定), 同一主机上的多个项目及应用互不冲突,
+# 用于发送信号, 例如平滑重启工作进程: kill -HUP $(cat /tmp/${proc_name}_8000.pid)
+# 监听地址
+bind = '127.0.0.1:8000'
+# 工作进程数, 默认根据CPU核数计算
+workers = ${workers}
+# 工作进程类型
+worker_class = '${worker_class}'
+${worker_options}# 主进程加载应用后fork工作进程, 项目依赖仅在主进程启动一次, 工作进程以写时复制方式共享, 工作进程重启无需重新启动项目依赖
+# 注意: 开启后HUP信号仅重启工作进程及重新加载配置, 不重新加载应用代码; 数据库连接等不可跨进程共享的资源需在工作进程中创建
+preload_app = True
+# 工作进程处理的请求数达到上限后重启, 用于控制内存泄漏, 随机抖动避免工作进程同时重启
+max_requests = 10000
+max_requests_jitter = 1000
+# 长连接保持时间(秒), 位于负载均衡之后时需大于负载均衡的空闲超时时间
+keepalive = 5
+# 工作进程无响应超时时间(秒), 超时后由主进程重启
+timeout = 30
+# 工作进程收到重启或终止信号后处理完当前请求的最长等待时间(秒)
+graceful_timeout = 30
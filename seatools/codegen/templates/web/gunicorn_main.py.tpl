@@ -0,0 +1,54 @@
+import os
+import click
+from typing import Optional
+
+from gunicorn.app.base import Application
+from gunicorn.util import import_app
+
+
+class ${title}Application(Application):
+    """基于${package_name}.${framework}.gunicorn_conf配置运行gunicorn"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        self.load_config_from_module_name_or_filename('python:${package_name}.${framework}.gunicorn_conf')
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        # 导入应用时启动项目依赖, 开启preload_app时仅在主进程启动一次
+        return import_app('${app_path}')
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
+@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
+@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
+@click.option('--port', default=8000, help='服务端口')
+@click.option('--workers', default=None, type=int, help='工作进程数, 默认根据CPU核数计算')
+@click.option('--pidfile', default=None, help='主进程pid文件, 用于发送信号, 默认: /tmp/${proc_name}_<端口>.pid')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(project_dir: Optional[str] = None,
+         host: Optional[str] = '127.0.0.1',
+         port: Optional[int] = 8000,
+         workers: Optional[int] = None,
+         pidfile: Optional[str] = None,
+         env: Optional[str] = 'dev') -> None:
+    """${title} cmd, 基于gunicorn运行, 支持kill -HUP平滑重启工作进程."""
+${prelude}    if project_dir:
+        os.environ['PROJECT_DIR'] = project_dir
+    if env:
+        os.environ['ENV'] = env
+
+    # start gunicorn
+    ${title}Application({'bind': '{}:{}'.format(host, port), 'workers': workers,
+                         'pidfile': pidfile or '/tmp/${proc_name}_{}.pid'.format(port)}).run()
+
+
+if __name__ == "__main__":
+    main()
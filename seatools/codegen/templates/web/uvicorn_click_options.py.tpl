@@ -0,0 +1,9 @@
+@click.option('--loop', default=None, type=click.Choice(['auto', 'asyncio', 'uvloop']),
+              help='事件循环实现, 默认: pro环境已安装uvloop时使用uvloop, 其余情况auto')
+@click.option('--http', default=None, type=click.Choice(['auto', 'h11', 'httptools']),
+              help='HTTP协议实现, 默认: pro环境已安装httptools时使用httptools, 其余情况auto')
+@click.option('--backlog', default=None, type=int, help='等待连接队列的最大长度, 默认: 2048')
+@click.option('--limit_concurrency', default=None, type=int, help='最大并发连接数与任务数, 超过后返回503, 默认不限制')
+@click.option('--timeout_keep_alive', default=None, type=int, help='长连接无请求时的关闭超时时间(秒), 默认: 5')
+@click.option('--h11_max_incomplete_event_size', default=None, type=int,
+              help='h11协议未完成请求事件的最大字节数, 默认: 16384')
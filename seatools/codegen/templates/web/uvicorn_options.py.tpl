@@ -0,0 +1,11 @@
+def uvicorn_options(env: Optional[str] = None, **options) -> dict:
+    """uvicorn性能参数, 未指定的参数使用uvicorn默认值, pro环境默认使用已安装的uvloop与httptools, 未安装时回退为auto"""
+    import importlib.util
+    if env == 'pro':
+        if options.get('loop') is None and importlib.util.find_spec('uvloop') is not None:
+            options['loop'] = 'uvloop'
+        if options.get('http') is None and importlib.util.find_spec('httptools') is not None:
+            options['http'] = 'httptools'
+    return {key: value for key, value in options.items() if value is not None}
+
+
@@ -0,0 +1,33 @@
+import os
+import pkgutil
+import click
+from typing import Optional
+
+from waitress import serve
+
+
+@click.command()
+@click.option('--project_dir', default=None, help='项目目录, 未打包无需传该参数, 自动基于项目树检索')
+@click.option('--env', default='dev', help='运行环境, dev=测试环境, test=测试环境, pro=正式环境, 默认: dev')
+@click.option('--host', default='127.0.0.1', help='服务允许访问的ip, 若允许所有ip访问可设置0.0.0.0')
+@click.option('--port', default=8000, help='服务端口')
+@click.option('--threads', default=4, help='工作线程数, 默认: 4')
+@click.version_option(version="1.0.0", help='查看命令版本')
+@click.help_option('-h', '--help', help='查看命令帮助')
+def main(project_dir: Optional[str] = None,
+         host: Optional[str] = '127.0.0.1',
+         port: Optional[int] = 8000,
+         threads: Optional[int] = 4,
+         env: Optional[str] = 'dev') -> None:
+    """${title} cmd, 基于waitress原生wsgi运行."""
+    if project_dir:
+        os.environ['PROJECT_DIR'] = project_dir
+    if env:
+        os.environ['ENV'] = env
+
+    # start waitress, 导入应用时启动项目依赖
+    serve(pkgutil.resolve_name('${app_path}'), host=host, port=port, threads=threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,247 @@
+import json
 import os
-from typing import Optional
+from contextlib import contextmanager
+from typing import List, Optional
 
 
-def _dfs_find_project_dir(place: str):
-    check_files = [place + os.sep + 'pyproject.toml', place + os.sep + 'requirements.txt']
-    if any([file for file in check_files if os.path.exists(file)]):
-        return place
-    parent = os.path.dirname(place)
-    if place == parent:
+# 项目检索缓存目录, 默认~/.cache/seatools-codegen, 可通过环境变量SEATOOLS_CODEGEN_CACHE_DIR指定
+CACHE_DIR_ENV = 'SEATOOLS_CODEGEN_CACHE_DIR'
+# 环境变量SEATOOLS_CODEGEN_CACHE=0时禁用项目检索缓存
+CACHE_ENABLED_ENV = 'SEATOOLS_CODEGEN_CACHE'
+_DISCOVERY_CACHE_FILE = 'discovery.json'
+_DISCOVERY_CACHE_VERSION = 1
+# 缓存的检索路径数量上限, 超出时淘汰最早写入的记录
+_DISCOVERY_CACHE_MAX_PLACES = 256
+_PROJECT_FILES = ('pyproject.toml', 'requirements.txt')
+
+
+def _dfs_find_project_dir(place: str, stop: Optional[str] = None):
+    """从place向上查找包含项目标识文件的目录, 到达stop目录(不含)时停止"""
+    while place != stop:
+        if any(os.path.exists(place + os.sep + file) for file in _PROJECT_FILES):
+            return place
+        parent = os.path.dirname(place)
+        if place == parent:
+            return None
+        place = parent
+    return None
+
+
+def cache_dir() -> str:
+    """seatools-codegen缓存目录"""
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path:
+        return path
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                        'seatools-codegen')
+
+
+def _project_stamp(project_dir: str) -> Optional[List]:
+    """项目标识文件与src目录的修改时间, 用于判断缓存是否失效, 项目标识文件不存在返回None"""
+    for file in _PROJECT_FILES:
+        try:
+            stamp = [file, os.stat(project_dir + os.sep + file).st_mtime_ns]
+        except OSError:
+            continue
+        try:
+            # src目录下新增或删除应用包时目录修改时间变化
+            stamp.append(os.stat(project_dir + os.sep + 'src').st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+        return stamp
+    return None
+
+
+class _DiscoveryCache:
+    """项目检索缓存, 记录检索路径对应的项目目录, 以及项目目录对应的包目录与应用目录, 以pyproject.toml修改时间判断是否失效"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[dict] = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = {'version': _DISCOVERY_CACHE_VERSION, 'places': {}, 'projects': {}}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == _DISCOVERY_CACHE_VERSION:
+                    self._data['places'].update(data.get('places') or {})
+                    self._data['projects'].update(data.get('projects') or {})
+            except (OSError, ValueError, AttributeError):
+                pass
+        return self._data
+
+    def project_dir(self, place: str) -> Optional[str]:
+        """获取检索路径缓存的项目目录, 项目标识文件修改时间变化或检索路径与项目目录之间新增了项目标识文件时返回None"""
+        project_dir = self.data['places'].get(place)
+        if project_dir and self.project(project_dir) is not None and _dfs_find_project_dir(place, project_dir) is None:
+            return project_dir
+        return None
+
+    def project(self, project_dir: str) -> Optional[dict]:
+        """获取项目的缓存记录, 项目标识文件修改时间变化时返回None"""
+        project = self.data['projects'].get(project_dir)
+        if project is None or project.get('stamp') != _project_stamp(project_dir):
+            return None
+        return project
+
+    def save_place(self, place: str, project_dir: str):
+        places = self.data['places']
+        places.pop(place, None)
+        places[place] = project_dir
+        while len(places) > _DISCOVERY_CACHE_MAX_PLACES:
+            places.pop(next(iter(places)))
+        if self.project(project_dir) is None:
+            self.data['projects'][project_dir] = {'stamp': _project_stamp(project_dir)}
+        self._flush()
+
+    def save_project(self, project_dir: str, project: dict):
+        self.data['projects'][project_dir] = {'stamp': _project_stamp(project_dir), **project}
+        # 仅保留仍被检索路径引用的项目
+        referenced = set(self.data['places'].values())
+        referenced.add(project_dir)
+        for key in [key for key in self.data['projects'] if key not in referenced]:
+            self.data['projects'].pop(key)
+        self._flush()
+
+    def _flush(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, json.dumps(self.data, ensure_ascii=False))
+        except OSError:
+            # 缓存目录不可写时不影响检索
+            pass
+
+
+_discovery_cache: Optional[_DiscoveryCache] = None
+
+
+def _get_discovery_cache() -> Optional[_DiscoveryCache]:
+    global _discovery_cache
+    if os.environ.get(CACHE_ENABLED_ENV, '1').lower() in ('0', 'false', 'no', 'off'):
         return None
-    return _dfs_find_project_dir(parent)
+    path = os.path.join(cache_dir(), _DISCOVERY_CACHE_FILE)
+    if _discovery_cache is None or _discovery_cache.path != path:
+        _discovery_cache = _DiscoveryCache(path)
+    return _discovery_cache
 
 
 def find_project_dir(place: str) -> Optional[str]:
-    """查找项目目录的绝对路径, 若找不到则返回None."""
+    """查找项目目录的绝对路径, 若找不到则返回None, 检索结果按路径缓存, 项目标识文件修改后重新检索."""
     assert place, '当前路径未识别'
-    return _dfs_find_project_dir(place)
+    cache = _get_discovery_cache()
+    if cache is not None:
+        project_dir = cache.project_dir(place)
+        if project_dir:
+            return project_dir
+    project_dir = _dfs_find_project_dir(place)
+    if project_dir and cache is not None:
+        cache.save_place(place, project_dir)
+    return project_dir
+
+
+def _load_package_dirs(project_dir: str) -> List[str]:
+    """从pyproject.toml解析项目包目录, 依次使用[tool.coverage.run] source, [tool.poetry] packages, [tool.poetry] name,
+    返回存在的包目录, 首个为主包目录"""
+    pyproject_toml = project_dir + os.sep + 'pyproject.toml'
+    if not os.path.exists(pyproject_toml):
+        return []
+    import toml
+    try:
+        with open(pyproject_toml, 'r', encoding='utf-8') as f:
+            config = toml.load(f)
+    except (OSError, ValueError):
+        return []
+    tool = config.get('tool') or {}
+    poetry = tool.get('poetry') or {}
+    candidates = []
+    for source in ((tool.get('coverage') or {}).get('run') or {}).get('source') or []:
+        candidates.append(project_dir + os.sep + 'src' + os.sep + source)
+    for package in poetry.get('packages') or []:
+        if not isinstance(package, dict) or not package.get('include'):
+            continue
+        include = package['include'].replace('/', os.sep)
+        if package.get('from'):
+            candidates.append(project_dir + os.sep + package['from'].replace('/', os.sep) + os.sep + include)
+        else:
+            candidates.append(project_dir + os.sep + include)
+    if poetry.get('name'):
+        candidates.append(project_dir + os.sep + 'src' + os.sep + poetry['name'].replace('-', '_').replace('.', '_'))
+    return [package_dir for package_dir in dict.fromkeys(candidates) if os.path.isdir(package_dir)]
+
+
+def _load_app_dirs(project_dir: str, package_dirs: List[str]) -> List[str]:
+    """src目录下除主包外的应用包目录, 应用包需包含boot包, 即startapp命令创建的应用"""
+    app_dirs = list(package_dirs[1:])
+    src_dir = project_dir + os.sep + 'src'
+    if os.path.isdir(src_dir):
+        with os.scandir(src_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir() and os.path.exists(entry.path + os.sep + 'boot' + os.sep + '__init__.py'):
+                    app_dirs.append(entry.path)
+    main_package_dir = package_dirs[0] if package_dirs else None
+    return [app_dir for app_dir in dict.fromkeys(app_dirs) if app_dir != main_package_dir]
+
+
+def _discover_project(project_dir: str) -> dict:
+    cache = _get_discovery_cache()
+    if cache is not None:
+        project = cache.project(project_dir)
+        if project is not None and 'app_dirs' in project:
+            return project
+    package_dirs = _load_package_dirs(project_dir)
+    project = {'package_dirs': package_dirs, 'app_dirs': _load_app_dirs(project_dir, package_dirs)}
+    if cache is not None:
+        cache.save_project(project_dir, project)
+    return project
 
 
 def find_package_dir(project_dir: str) -> Optional[str]:
-    """查询项目的包路径, 若找不到则返回None."""
+    """查询项目的包路径, 若找不到则返回None, 检索结果按项目缓存, pyproject.toml修改后重新解析."""
     assert project_dir, '项目路径无法识别'
-    import toml
-    with open(project_dir + os.sep + 'pyproject.toml', 'r', encoding='utf-8') as f:
-        config = toml.load(f)
-    package_name = config['tool']['coverage']['run']['source'][0]
-    package_dir = project_dir + os.sep + 'src' + os.sep + package_name
-    if os.path.exists(package_dir):
-        return package_dir
-    return None
+    package_dirs = _discover_project(project_dir)['package_dirs']
+    return package_dirs[0] if package_dirs else None
+
+
+def find_app_dirs(project_dir: str) -> List[str]:
+    """查询项目除主包外的应用包目录, 包含[tool.poetry] packages中声明的包及src目录下startapp创建的应用"""
+    assert project_dir, '项目路径无法识别'
+    return _discover_project(project_dir)['app_dirs']
+
+
+@contextmanager
+def atomic_writer(filepath: str, encoding: str = 'utf-8', newline: Optional[str] = None):
+    """原子写入文件的上下文, 写入同目录临时文件, 上下文正常退出时重命名替换目标文件, 异常时删除临时文件不影响原文件,
+    已存在文件保留原文件权限
+
+    Args:
+        filepath: 文件路径
+        encoding: 文件编码
+        newline: 换行符转换方式, 与open参数一致, 默认None按平台转换, 传''则原样写入
+    """
+    import tempfile
+    dir_path = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp', dir=dir_path)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline=newline) as f:
+            yield f
+        if os.path.exists(filepath):
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+        else:
+            # mkstemp创建的文件权限为0600, 新文件使用与open一致的默认权限
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
+def atomic_write(filepath: str, content: str, encoding: str = 'utf-8', newline: Optional[str] = None):
+    """原子写入文件, 先写入同目录临时文件再重命名替换, 写入失败不会破坏原文件, 参数说明见atomic_writer"""
+    with atomic_writer(filepath, encoding=encoding, newline=newline) as f:
+        f.write(content)
@@ -15,7 +15,7 @@ with open('requirements.txt', encoding='utf-8') as f:
         if require:
             requirements.append(require)
 
-test_requirements = []
+test_requirements = ['pytest']
 
 setup(
     author="dragons96",
@@ -34,6 +34,7 @@ setup(
     license="MIT license",
     long_description='',
     include_package_data=True,
+    package_data={'seatools.codegen.templates': ['*.tpl', '*/*.tpl', '*/*/*.tpl']},
     keywords=['seatools', 'codegen'],
     name='seatools-codegen',
     packages=find_packages(include=['seatools.codegen', 'seatools.codegen.*']),
@@ -0,0 +1,126 @@
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Iterator, NamedTuple
+
+import pytest
+
+from seatools.codegen.ioc.plan import file_plan
+
+_PYPROJECT_TOML = '''[tool.poetry]
+name = "demo"
+version = "0.1.0"
+description = ""
+authors = ["demo"]
+packages = [{ include = "demo", from = "src" }]
+
+[tool.poetry.dependencies]
+python = "^3.9"
+
+[tool.poetry.scripts]
+demo = "demo.cmd.main:main"
+
+[build-system]
+requires = ["poetry-core"]
+build-backend = "poetry.core.masonry.api"
+'''
+
+_CONFIG = '''def get_project_dir():
+    return {project_dir!r}
+'''
+
+_BOOT = '''def start():
+    from seatools import ioc
+    ioc.run(scan_package_names=['demo'], config_dir={config_dir!r}, exclude_modules=[])
+'''
+
+
+class Project(NamedTuple):
+    """cookiecutter-seatools-python结构的临时项目, 项目依赖启动时扫描整个demo包"""
+    project_dir: str
+    package_dir: str
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.project_dir, *parts)
+
+    def read(self, *parts: str) -> str:
+        with open(self.path(*parts), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def generate(self, generator: Callable, **kwargs):
+        """与命令行一致, 在文件生成计划中执行生成器"""
+        with file_plan():
+            generator(self.project_dir, self.package_dir, **kwargs)
+
+    def run_python(self, code: str) -> subprocess.CompletedProcess:
+        """在独立进程中执行项目代码"""
+        env = dict(os.environ, PYTHONPATH=self.path('src'))
+        return subprocess.run([sys.executable, '-c', code], cwd=self.project_dir, env=env, capture_output=True,
+                              text=True, timeout=120)
+
+    @contextlib.contextmanager
+    def serve(self, module: str, *args: str, timeout: float = 60) -> Iterator[subprocess.Popen]:
+        """在独立进程中运行项目启动命令并等待端口可连接, 退出时终止进程, 端口通过free_port获取后以--port传入"""
+        port = int(args[args.index('--port') + 1])
+        env = dict(os.environ, PYTHONPATH=self.path('src'))
+        # 输出写入文件, 避免管道写满阻塞服务
+        log = open(self.path('serve.log'), 'w', encoding='utf-8')
+        process = subprocess.Popen([sys.executable, '-m', module, *args], cwd=self.project_dir, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT, text=True)
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                assert process.poll() is None, self.read('serve.log')
+                assert time.monotonic() < deadline, '启动超时'
+                with contextlib.suppress(OSError), socket.create_connection(('127.0.0.1', port), timeout=1):
+                    break
+                time.sleep(0.1)
+            yield process
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            log.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def discovery_cache_dir(tmp_path_factory, monkeypatch) -> str:
+    """项目检索缓存写入临时目录, 不读写开发者的~/.cache/seatools-codegen"""
+    path = str(tmp_path_factory.mktemp('seatools-codegen-cache'))
+    monkeypatch.setenv('SEATOOLS_CODEGEN_CACHE_DIR', path)
+    return path
+
+
+@pytest.fixture
+def port() -> int:
+    return free_port()
+
+
+@pytest.fixture
+def project(tmp_path) -> Project:
+    project_dir = tmp_path / 'demo_project'
+    package_dir = project_dir / 'src' / 'demo'
+    config_dir = project_dir / 'config'
+    for name in ('boot', 'cmd', 'config'):
+        (package_dir / name).mkdir(parents=True)
+    (package_dir / 'cmd' / '__init__.py').write_text('', encoding='utf-8')
+    (package_dir / 'config' / '__init__.py').write_text(_CONFIG.format(project_dir=str(project_dir)),
+                                                        encoding='utf-8')
+    config_dir.mkdir()
+    (project_dir / 'pyproject.toml').write_text(_PYPROJECT_TOML, encoding='utf-8')
+    (package_dir / '__init__.py').write_text('', encoding='utf-8')
+    (package_dir / 'boot' / '__init__.py').write_text(_BOOT.format(config_dir=str(config_dir)), encoding='utf-8')
+    (config_dir / 'application.yml').write_text('seatools:\n  app: demo\n', encoding='utf-8')
+    return Project(str(project_dir), str(package_dir))
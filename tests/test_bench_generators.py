@@ -0,0 +1,42 @@
+import importlib.util
+import os
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location('bench_generators', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'bench_generators.py'))
+bench_generators = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench_generators)
+
+META = {'python': '3.11', 'platform': 'linux', 'cpu_count': 4, 'repeat': 5}
+
+
+def _result(**timings) -> dict:
+    return {'version': bench_generators._BASELINE_VERSION, 'meta': META,
+            'results': {name: {'1': {'seconds': seconds}} for name, seconds in timings.items()}}
+
+
+@pytest.mark.parametrize('base, current, regressed', [
+    # 比例超过阈值但增长量低于绝对阈值, 视为噪声
+    (0.001, 0.002, False),
+    (0.004, 0.0085, False),
+    # 比例与增长量均超过阈值
+    (0.010, 0.020, True),
+    # 增长量超过绝对阈值但比例未超过阈值
+    (1.0, 1.1, False),
+])
+def test_compare_requires_ratio_and_delta(base, current, regressed):
+    regressions = bench_generators.compare(_result(generate_app=current), _result(generate_app=base),
+                                           threshold=0.2, min_delta_ms=5)
+    assert bool(regressions) is regressed
+
+
+def test_compare_skips_missing_baseline():
+    assert bench_generators.compare(_result(generate_app=1.0), _result(generate_cmd=0.1), threshold=0.2) == []
+
+
+def test_compare_warns_on_different_machine(capsys):
+    baseline = _result(generate_app=0.01)
+    baseline['meta'] = dict(META, cpu_count=1)
+    bench_generators.compare(_result(generate_app=0.01), baseline, threshold=0.2)
+    assert 'cpu_count' in capsys.readouterr().err
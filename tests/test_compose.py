@@ -0,0 +1,98 @@
+import pytest
+
+from seatools.codegen.ioc.compose import DockerComposeServices, parse_service
+
+SERVICE = '''  fastapi:
+    build: .
+    ports:
+      - "8000:8000"
+'''
+
+
+def _services(content: str) -> DockerComposeServices:
+    return DockerComposeServices('docker-compose.yml', content)
+
+
+@pytest.mark.parametrize('script, expected', [
+    ('  fastapi:\n    build: .', ('fastapi', 2)),
+    ('\n    "my-app":  # 注释\n', ('my-app', 4)),
+    ('  redis: {image: redis}', ('redis', 2)),
+])
+def test_parse_service(script, expected):
+    assert parse_service(script) == expected
+
+
+def test_parse_service_invalid():
+    with pytest.raises(ValueError):
+        parse_service('fastapi:')
+
+
+def test_merge_adds_service():
+    services = _services("version: '3'\nservices:\n  redis:\n    image: redis\n\nvolumes:\n  data:\n")
+    assert services.names == ['redis']
+    assert services.merge(SERVICE) == 'added'
+    assert services.merge(SERVICE) == 'unchanged'
+    assert services.render() == ("version: '3'\nservices:\n" + SERVICE + '\n'
+                                 '  redis:\n    image: redis\n\nvolumes:\n  data:\n')
+
+
+def test_merge_reindents_to_file_style():
+    services = _services('services:\n    redis:\n        image: redis\n')
+    services.merge(SERVICE)
+    assert services.render() == ('services:\n    fastapi:\n        build: .\n        ports:\n'
+                                 '            - "8000:8000"\n\n    redis:\n        image: redis\n')
+
+
+def test_merge_existing_service_without_update():
+    content = 'services:\n  fastapi:\n    build: ./app\n'
+    services = _services(content)
+    assert services.merge(SERVICE) == 'unchanged'
+    assert not services.dirty
+    assert services.render() == content
+
+
+def test_merge_updates_service_in_place():
+    services = _services('services:\n  fastapi:\n    build: ./app\n\n  redis:\n    image: redis\n')
+    assert services.merge(SERVICE, update=True) == 'updated'
+    assert services.pending == ([], ['fastapi'])
+    assert services.render() == 'services:\n' + SERVICE + '\n  redis:\n    image: redis\n'
+
+
+def test_merge_update_with_same_content_is_unchanged():
+    services = _services('services:\n' + SERVICE + '\n')
+    assert services.merge(SERVICE, update=True) == 'unchanged'
+    assert not services.dirty
+
+
+def test_merge_indexes_flow_style_services():
+    content = 'services:\n  redis: {image: redis}  # 缓存\n  db: {image: postgres}\n'
+    services = _services(content)
+    assert services.names == ['redis', 'db']
+    assert services.get('redis') == '  redis: {image: redis}  # 缓存\n'
+    assert services.merge('  redis:\n    image: redis:7\n') == 'unchanged'
+    assert services.render() == content
+    assert services.merge('  redis:\n    image: redis:7\n', update=True) == 'updated'
+    assert services.render() == 'services:\n  redis:\n    image: redis:7\n  db: {image: postgres}\n'
+
+
+def test_merge_creates_services_key():
+    services = _services("version: '3'")
+    services.merge(SERVICE)
+    assert services.render() == "version: '3'\nservices:\n" + SERVICE + '\n'
+
+
+def test_merge_keeps_crlf_newlines():
+    services = _services('services:\r\n  redis:\r\n    image: redis\r\n')
+    services.merge(SERVICE)
+    content = services.render()
+    assert content.startswith('services:\r\n  fastapi:\r\n    build: .\r\n')
+    assert '\n' not in content.replace('\r\n', '')
+
+
+def test_flush_writes_file(tmp_path):
+    services = DockerComposeServices.load(str(tmp_path))
+    assert not services.exists
+    services.merge(SERVICE)
+    assert services.flush() == (['fastapi'], [])
+    assert (tmp_path / 'docker-compose.yml').read_text(encoding='utf-8') == "version: '3'\nservices:\n" + SERVICE + '\n'
+    assert DockerComposeServices.load(str(tmp_path)).names == ['fastapi']
@@ -0,0 +1,103 @@
+import gzip
+import json
+import urllib.request
+
+import pytest
+
+from seatools.codegen.ioc.django import generate_django
+from seatools.codegen.ioc.fastapi import generate_fastapi
+from seatools.codegen.ioc.flask import generate_flask
+
+brotli = pytest.importorskip('brotli')
+zstandard = pytest.importorskip('zstandard')
+
+_DECOMPRESSORS = {
+    'gzip': gzip.decompress,
+    'br': brotli.decompress,
+    'zstd': lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+# Accept-Encoding及期望选择的编码, 权重相同时按配置encodings的顺序(zstd, br, gzip)选择
+_NEGOTIATIONS = [
+    ('gzip, deflate, br, zstd', 'zstd'),
+    ('gzip;q=1, br;q=0.5', 'gzip'),
+    ('br', 'br'),
+    ('*', 'zstd'),
+    ('identity', None),
+    ('gzip;q=0', None),
+]
+# 不小于默认最小压缩大小(1024字节)的JSON响应
+_LARGE = {'data': 'x' * 4096}
+
+_FASTAPI_ROUTE = '''
+
+@app.get('/large')
+def large():
+    return {large!r}
+'''
+
+_FLASK_ROUTE = '''
+
+@app.get('/large')
+def large():
+    return {large!r}
+'''
+
+_DJANGO_URLS = '''
+from django.http import JsonResponse
+
+urlpatterns += [
+    path('', lambda request: JsonResponse({{'data': 'hello'}})),
+    path('large', lambda request: JsonResponse({large!r})),
+]
+'''
+
+
+def _append(project, parts, text: str):
+    with open(project.path('src', 'demo', *parts), 'a', encoding='utf-8') as f:
+        f.write(text.format(large=_LARGE))
+
+
+def _get(port: int, path: str, accept_encoding: str):
+    request = urllib.request.Request('http://127.0.0.1:{}{}'.format(port, path),
+                                     headers={'Accept-Encoding': accept_encoding})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.headers, response.read()
+
+
+def _assert_negotiated(port: int):
+    for accept_encoding, encoding in _NEGOTIATIONS:
+        headers, body = _get(port, '/large', accept_encoding)
+        assert headers.get('Content-Encoding') == encoding, accept_encoding
+        assert 'Accept-Encoding' in headers.get('Vary', '')
+        if encoding:
+            assert int(headers['Content-Length']) == len(body) < len(json.dumps(_LARGE))
+            body = _DECOMPRESSORS[encoding](body)
+        assert json.loads(body) == _LARGE
+    # 小于最小压缩大小的响应原样返回
+    headers, body = _get(port, '/', 'gzip, br, zstd')
+    assert 'Content-Encoding' not in headers
+    assert json.loads(body)
+
+
+def test_fastapi_compression(project, port):
+    pytest.importorskip('fastapi')
+    project.generate(generate_fastapi, boot='single', compress=True, docker=False, docker_compose=False)
+    _append(project, ('fastapi', 'app.py'), _FASTAPI_ROUTE)
+    with project.serve('demo.cmd.fastapi_main', '--port', str(port)):
+        _assert_negotiated(port)
+
+
+def test_flask_compression(project, port):
+    pytest.importorskip('flask')
+    project.generate(generate_flask, compress=True, docker=False, docker_compose=False)
+    _append(project, ('flask', 'app.py'), _FLASK_ROUTE)
+    with project.serve('demo.cmd.flask_main', '--port', str(port)):
+        _assert_negotiated(port)
+
+
+def test_django_compression(project, port):
+    pytest.importorskip('django')
+    project.generate(generate_django, compress=True, docker=False, docker_compose=False)
+    _append(project, ('django', 'urls.py'), _DJANGO_URLS)
+    with project.serve('demo.cmd.django_main', '--port', str(port), '--env', 'test'):
+        _assert_negotiated(port)
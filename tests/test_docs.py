@@ -0,0 +1,86 @@
+"""文档中的命令示例需能被命令行工具解析, 仅解析参数, 不执行命令"""
+import json
+import os
+import re
+import shlex
+from typing import List
+
+import click
+import pytest
+
+from seatools.codegen.ioc.main import main
+from seatools.codegen.ioc.server import CodegenServer, build_args
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_CLI_PATTERN = re.compile(r'^seatools-codegen(?:\.exe)?\s+(.*)$')
+# 请求示例, 响应示例不含command与argv字段
+_REQUEST_PATTERN = re.compile(r'(\{"id".*"(?:command|argv)".*\})')
+
+
+def _readme() -> str:
+    with open(os.path.join(ROOT, 'README.md'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _cli_examples() -> List[List[str]]:
+    examples = []
+    for line in _readme().splitlines():
+        match = _CLI_PATTERN.match(line.strip())
+        # 跳过含[参数说明]占位符的用法说明
+        if match and '[' not in match.group(1):
+            examples.append(shlex.split(match.group(1)))
+    return examples
+
+
+def _request_examples() -> List[dict]:
+    texts = _readme().splitlines() + (CodegenServer.__doc__ or '').splitlines()
+    return [json.loads(match.group(1)) for match in map(_REQUEST_PATTERN.search, texts) if match]
+
+
+def _request_argv(request: dict) -> List[str]:
+    if request.get('argv'):
+        return request['argv']
+    return [*request['command'].split(), *build_args(request.get('args') or {})]
+
+
+def _parse(argv: List[str]):
+    """逐级解析命令组及子命令的参数, 参数无法解析时抛出click.UsageError"""
+    command, name, args, parent = main, 'seatools-codegen', list(argv), None
+    while True:
+        try:
+            ctx = command.make_context(name, args, parent=parent)
+        except click.exceptions.Exit:
+            # --help、--version
+            return
+        if not isinstance(command, click.Group):
+            return
+        args = [*ctx._protected_args, *ctx.args]
+        if not args:
+            return
+        name, command, args = command.resolve_command(ctx, args)
+        parent = ctx
+
+
+def test_readme_has_examples():
+    assert len(_cli_examples()) > 30
+    assert len(_request_examples()) >= 4
+
+
+@pytest.mark.parametrize('argv', _cli_examples(), ids=' '.join)
+def test_readme_cli_example_parses(argv, tmp_path, monkeypatch):
+    # apply的清单文件参数需为已存在的文件
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'codegen.toml').write_text('')
+    _parse(argv)
+
+
+@pytest.mark.parametrize('request_', [request for request in _request_examples()
+                                      if request.get('command') not in ('ping', 'shutdown')],
+                         ids=lambda request: ' '.join(_request_argv(request)))
+def test_serve_request_example_parses(request_):
+    _parse(_request_argv(request_))
+
+
+def test_parse_rejects_unknown_option():
+    with pytest.raises(click.UsageError):
+        _parse(['scrapy', 'genspider', '--name', 'xxx', '--domain', 'xxx.com'])
@@ -0,0 +1,220 @@
+import json
+import os
+import signal
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from seatools.codegen.ioc.fastapi import generate_fastapi
+
+prefork_only = pytest.mark.skipif(not hasattr(os, 'fork') or not sys.platform.startswith('linux'),
+                                  reason='prefork基于fork, 工作进程通过/proc查找')
+
+# 工作进程启动时(lifespan)失败的应用, 主进程加载应用时不执行lifespan
+_FAILING_APP = '''from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+
+@asynccontextmanager
+async def lifespan(app):
+    raise RuntimeError('worker startup failed')
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+'''
+
+
+def _children(pid: int) -> set:
+    with open('/proc/{}/task/{}/children'.format(pid, pid), 'r', encoding='utf-8') as f:
+        return {int(child) for child in f.read().split()}
+
+
+def _wait_for(predicate, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, '等待超时'
+        time.sleep(0.1)
+
+
+@pytest.fixture
+def prefork_project(project):
+    pytest.importorskip('uvicorn')
+    pytest.importorskip('fastapi')
+    project.generate(generate_fastapi, boot='prefork', docker=False, docker_compose=False)
+    return project
+
+
+@pytest.fixture
+def generate(project):
+    """生成fastapi项目, 不生成docker相关文件"""
+    pytest.importorskip('uvicorn')
+    pytest.importorskip('fastapi')
+
+    def _generate(**kwargs):
+        project.generate(generate_fastapi, docker=False, docker_compose=False, **kwargs)
+        return project
+
+    return _generate
+
+
+def _get(port: int, path: str = '/', headers: dict = None):
+    request = urllib.request.Request('http://127.0.0.1:{}{}'.format(port, path), headers=headers or {})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, dict(response.headers), response.read()
+
+
+@prefork_only
+def test_prefork_restarts_crashed_worker(prefork_project, port):
+    # --reload false为字符串时曾被视为开启热重启而不使用prefork
+    with prefork_project.serve('demo.cmd.fastapi_main', '--port', str(port), '--workers', '2',
+                               '--reload', 'false') as server:
+        _wait_for(lambda: len(_children(server.pid)) == 2)
+        workers = _children(server.pid)
+        crashed = workers.pop()
+        os.kill(crashed, signal.SIGKILL)
+        _wait_for(lambda: len(_children(server.pid)) == 2 and crashed not in _children(server.pid))
+        assert workers < _children(server.pid)
+        with urllib.request.urlopen('http://127.0.0.1:{}/'.format(port), timeout=10) as response:
+            assert response.status == 200
+    assert 'Started parent process' not in prefork_project.read('serve.log')
+
+
+@prefork_only
+def test_prefork_stops_after_repeated_startup_failures(prefork_project, port):
+    with open(prefork_project.path('src', 'demo', 'fastapi', 'app.py'), 'w', encoding='utf-8') as f:
+        f.write(_FAILING_APP)
+    started = time.monotonic()
+    result = prefork_project.run_python(
+        'from demo.cmd.fastapi_main import main\n'
+        'main(["--port", "{}", "--workers", "2", "--reload", "false"])\n'.format(port))
+    assert result.returncode == 1, result.stderr
+    assert '工作进程连续5次启动失败, 主进程退出' in result.stderr
+    # 工作进程异常时不返回主进程的循环, 不会由工作进程再fork工作进程
+    assert result.stderr.count('工作进程连续') == 1
+    assert time.monotonic() - started < 60
+
+
+# 替换uvicorn.run输出传入的参数, 不启动服务
+_CAPTURE_UVICORN_RUN = '''import json
+import uvicorn
+uvicorn.run = lambda app, **kwargs: print(json.dumps(kwargs, sort_keys=True))
+from demo.cmd.fastapi_main import main
+main({args!r}, standalone_mode=False)
+'''
+
+
+@pytest.mark.parametrize('boot', ['default', 'single', 'prefork'])
+def test_uvicorn_options_passed_to_run(generate, boot):
+    project = generate(boot=boot)
+
+    def run(*args):
+        result = project.run_python(_CAPTURE_UVICORN_RUN.format(args=list(args)))
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout.splitlines()[-1])
+
+    # 未指定的参数不传递, 使用uvicorn默认值
+    options = run('--env', 'test')
+    assert not {'loop', 'http', 'backlog', 'limit_concurrency', 'timeout_keep_alive'} & set(options)
+    assert run('--env', 'pro')['loop'] == 'uvloop'
+    assert run('--env', 'pro')['http'] == 'httptools'
+    options = run('--env', 'pro', '--loop', 'asyncio', '--http', 'h11', '--backlog', '128', '--limit_concurrency', '8',
+                  '--timeout_keep_alive', '2', '--h11_max_incomplete_event_size', '1024')
+    assert {key: options[key] for key in ('loop', 'http', 'backlog', 'limit_concurrency', 'timeout_keep_alive',
+                                          'h11_max_incomplete_event_size')} == {
+        'loop': 'asyncio', 'http': 'h11', 'backlog': 128, 'limit_concurrency': 8, 'timeout_keep_alive': 2,
+        'h11_max_incomplete_event_size': 1024}
+
+
+@pytest.mark.parametrize('args', [['--loop', 'asyncio', '--http', 'h11', '--limit_concurrency', '8'],
+                                  ['--env', 'pro', '--timeout_keep_alive', '1']])
+def test_serve_with_uvicorn_options(generate, port, args):
+    project = generate(boot='single')
+    with project.serve('demo.cmd.fastapi_main', '--port', str(port), *args):
+        status, _, _ = _get(port)
+        assert status == 200
+
+
+@pytest.mark.parametrize('json_library', ['orjson', 'msgspec'])
+def test_serve_fast_json_response(generate, port, json_library):
+    pytest.importorskip(json_library)
+    project = generate(boot='single', json_library=json_library)
+    with project.serve('demo.cmd.fastapi_main', '--port', str(port)):
+        status, headers, body = _get(port)
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    response = json.loads(body)
+    assert response['data'] == 'Hello demo_project by FastAPI!'
+
+
+@pytest.mark.parametrize('json_library', ['orjson', 'msgspec'])
+def test_fast_json_response_as_default_response_class(generate, json_library):
+    pytest.importorskip(json_library)
+    project = generate(boot='single', json_library=json_library, cache='memory')
+    result = project.run_python(
+        'import datetime, json\n'
+        'from fastapi.testclient import TestClient\n'
+        'from demo.fastapi.app import app\n'
+        '@app.get("/items")\n'
+        'def items():\n'
+        '    return {"at": datetime.datetime(2024, 1, 2, 3, 4, 5), "ids": [1, 2]}\n'
+        'client = TestClient(app)\n'
+        '# 缓存命中时同样使用FastJSONResponse\n'
+        'print(json.dumps([client.get(path).json() for path in ("/items", "/", "/")]))\n')
+    assert result.returncode == 0, result.stderr
+    items, hello, cached = json.loads(result.stdout.splitlines()[-1])
+    assert items == {'at': '2024-01-02T03:04:05', 'ids': [1, 2]}
+    assert hello['data'] == 'Hello demo_project by FastAPI!'
+    assert cached == hello
+
+
+# 接口使用连接池依赖, redis使用fakeredis替换, 不连接外部服务
+_POOLS_APP = '''import json
+import fakeredis.aioredis
+import httpx
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from redis.asyncio import Redis
+from seatools.ioc import Autowired
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from demo.fastapi.app import app
+from demo.pools.httpx_pool import HttpxPool, get_http_client
+from demo.pools.redis_pool import RedisPool, get_redis
+from demo.pools.sqlalchemy_pool import SqlAlchemyPool, get_session
+
+
+@app.get('/pools')
+async def pools(session: AsyncSession = Depends(get_session), redis: Redis = Depends(get_redis),
+                client: httpx.AsyncClient = Depends(get_http_client)):
+    await redis.incr('hits')
+    return {'db': (await session.execute(text('select 1'))).scalar(), 'hits': int(await redis.get('hits')),
+            'client': id(client), 'closed': client.is_closed}
+
+
+pool_beans = [Autowired(cls=cls) for cls in (SqlAlchemyPool, RedisPool, HttpxPool)]
+pool_beans[1].set_client(fakeredis.aioredis.FakeRedis())
+with TestClient(app) as client:
+    responses = [client.get('/pools').json() for _ in range(2)]
+closed = [pool_beans[0].engine is None, pool_beans[1].client is None, pool_beans[2].client is None]
+print(json.dumps({'responses': responses, 'closed': closed}))
+'''
+
+
+def test_pools_opened_and_closed_by_lifespan(generate):
+    for module in ('sqlalchemy', 'aiosqlite', 'redis', 'fakeredis', 'httpx'):
+        pytest.importorskip(module)
+    project = generate(boot='single', pools=['sqlalchemy-async', 'redis', 'httpx'])
+    result = project.run_python(_POOLS_APP)
+    assert result.returncode == 0, result.stderr
+    output = json.loads(result.stdout.splitlines()[-1])
+    first, second = output['responses']
+    assert first['db'] == 1 and not first['closed']
+    # 同一工作进程内的请求共享连接池
+    assert (first['hits'], second['hits']) == (1, 2)
+    assert first['client'] == second['client']
+    # 应用退出时释放全部连接池
+    assert output['closed'] == [True, True, True]
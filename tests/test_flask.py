@@ -0,0 +1,39 @@
+import pytest
+
+from seatools.codegen.ioc.flask import generate_flask
+
+
+@pytest.fixture
+def gevent_project(project):
+    for module in ('flask', 'gunicorn', 'gevent'):
+        pytest.importorskip(module)
+    project.generate(generate_flask, server='gunicorn', worker_class='gevent', cache='memory', docker=False,
+                     docker_compose=False)
+    return project
+
+
+def test_gevent_patch_only_in_entry_point(gevent_project):
+    main = gevent_project.read('src', 'demo', 'cmd', 'flask_main.py')
+    assert main.index('monkey.patch_all()') > main.index('def main(')
+
+
+def test_gevent_app_imports_without_patching(gevent_project):
+    # 项目依赖启动时扫描导入cmd.flask_main, 导入应用(测试客户端、gunicorn demo.flask.app:app)时不应打补丁
+    result = gevent_project.run_python(
+        'from gevent import monkey\n'
+        'from demo.flask.app import app\n'
+        'response = app.test_client().get("/")\n'
+        'assert response.status_code == 200, response.status_code\n'
+        'assert response.headers["X-Cache"] == "MISS"\n'
+        'assert not monkey.is_anything_patched()\n'
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_gevent_benchmark_runs(gevent_project):
+    result = gevent_project.run_python(
+        'import sys\n'
+        'from demo.flask.benchmark import main\n'
+        'main(["--requests", "5", "--sizes", "0"], standalone_mode=False)\n'
+    )
+    assert result.returncode == 0, result.stderr
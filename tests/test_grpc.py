@@ -0,0 +1,100 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from seatools.codegen.ioc.grpc import parse_proto_imports, rewrite_proto_import, rewrite_proto_imports
+from seatools.codegen.ioc.plan import file_plan
+
+
+@pytest.mark.parametrize('package_parts, line, expected', [
+    (['proto'], 'from proto import common_pb2 as proto_dot_common__pb2\n',
+     'from . import common_pb2 as proto_dot_common__pb2\n'),
+    (['proto', 'a'], 'from proto import common_pb2 as proto_dot_common__pb2\n',
+     'from .. import common_pb2 as proto_dot_common__pb2\n'),
+    (['proto', 'a', 'b'], 'from proto import common_pb2\n', 'from ... import common_pb2\n'),
+    (['proto', 'a'], 'from proto.a import b_pb2 as proto_dot_a_dot_b__pb2\n',
+     'from . import b_pb2 as proto_dot_a_dot_b__pb2\n'),
+    (['proto', 'a'], 'from proto.c.d import e_pb2\n', 'from ..c.d import e_pb2\n'),
+    (['proto'], 'from proto.a import b_pb2\r\n', 'from .a import b_pb2\r\n'),
+    (['proto'], '    from proto import common_pb2\n', '    from . import common_pb2\n'),
+])
+def test_rewrite_proto_import(package_parts, line, expected):
+    assert rewrite_proto_import(line, package_parts) == expected
+
+
+@pytest.mark.parametrize('line', [
+    'from google.protobuf import descriptor as _descriptor\n',
+    'from protocol import common_pb2\n',
+    'import grpc\n',
+    '# from proto import common_pb2\n',
+])
+def test_rewrite_proto_import_keeps_other_lines(line):
+    assert rewrite_proto_import(line, ['proto', 'a']) == line
+
+
+def test_rewrite_proto_imports_file(tmp_path):
+    filepath = tmp_path / 'b_pb2_grpc.py'
+    filepath.write_bytes(b'import grpc\r\n\r\nfrom proto import common_pb2 as proto_dot_common__pb2\r\n'
+                         b'from proto.a import b_pb2 as proto_dot_a_dot_b__pb2\r\n')
+    assert rewrite_proto_imports(str(filepath), ['proto', 'a'])
+    assert filepath.read_bytes() == (b'import grpc\r\n\r\nfrom .. import common_pb2 as proto_dot_common__pb2\r\n'
+                                     b'from . import b_pb2 as proto_dot_a_dot_b__pb2\r\n')
+    mtime = os.stat(filepath).st_mtime_ns
+    assert not rewrite_proto_imports(str(filepath), ['proto', 'a'])
+    assert os.stat(filepath).st_mtime_ns == mtime
+
+
+def test_parse_proto_imports():
+    content = 'syntax = "proto3";\nimport "proto/common.proto";\nimport public \'proto/a/b.proto\';\n'
+    assert parse_proto_imports(content) == ['proto/common.proto', 'proto/a/b.proto']
+
+
+def test_generate_nested_proto_imports(tmp_path):
+    pytest.importorskip('grpc_tools')
+    from seatools.codegen.ioc.grpc import generate_grpc_batch
+
+    proto_dir = tmp_path / 'src' / 'proto'
+    (proto_dir / 'a').mkdir(parents=True)
+    (proto_dir / 'common.proto').write_text('syntax = "proto3";\npackage common;\nmessage Empty {}\n')
+    (proto_dir / 'a' / 'b.proto').write_text(
+        'syntax = "proto3";\npackage a;\nimport "proto/common.proto";\n'
+        'message Request {\n  common.Empty empty = 1;\n}\n'
+        'service B {\n  rpc Call (Request) returns (common.Empty);\n}\n')
+    package_dir = tmp_path / 'src' / 'demo'
+    package_dir.mkdir()
+    (package_dir / '__init__.py').write_text('')
+    generate_grpc_batch(str(tmp_path), str(package_dir), names=['common', 'a/b'], jobs=1)
+
+    generated = package_dir / 'grpc' / 'proto' / 'a'
+    assert 'from .. import common_pb2 as proto_dot_common__pb2' in (generated / 'b_pb2.py').read_text()
+    grpc_content = (generated / 'b_pb2_grpc.py').read_text()
+    assert 'from . import b_pb2 as proto_dot_a_dot_b__pb2' in grpc_content
+    assert 'from .. import common_pb2 as proto_dot_common__pb2' in grpc_content
+    # 生成的包可直接导入, 无需将proto目录加入sys.path
+    subprocess.run([sys.executable, '-c', 'import demo.grpc.proto.a.b_pb2_grpc'], check=True,
+                   cwd=str(tmp_path / 'src'))
+
+
+def test_codegen_dir_is_git_ignored(tmp_path):
+    pytest.importorskip('grpc_tools')
+    git = shutil.which('git')
+    if git is None:
+        pytest.skip('git未安装')
+    from seatools.codegen.ioc.grpc import generate_grpc_batch
+
+    proto_dir = tmp_path / 'src' / 'proto'
+    proto_dir.mkdir(parents=True)
+    (proto_dir / 'common.proto').write_text('syntax = "proto3";\npackage common;\nmessage Empty {}\n')
+    package_dir = tmp_path / 'src' / 'demo'
+    package_dir.mkdir()
+    with file_plan():
+        generate_grpc_batch(str(tmp_path), str(package_dir), names=['common'], jobs=1)
+    assert (tmp_path / '.seatools-codegen' / 'grpc.lock').exists()
+    subprocess.run([git, 'init', '-q'], check=True, cwd=str(tmp_path))
+    status = subprocess.run([git, 'status', '--porcelain', '--untracked-files=all'], check=True, cwd=str(tmp_path),
+                            capture_output=True, text=True).stdout
+    assert 'src/demo/grpc/proto/common_pb2.py' in status
+    assert '.seatools-codegen' not in status
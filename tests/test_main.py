@@ -0,0 +1,55 @@
+"""命令行启动导入开销回归测试, 每个用例在独立子进程中执行, 避免受其他用例已导入模块的影响"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+# 子进程中执行命令并输出执行命令新增导入的模块
+_SCRIPT = '''
+import json
+import sys
+
+before = set(sys.modules)
+from seatools.codegen.ioc.main import main
+try:
+    main({argv!r})
+except SystemExit:
+    pass
+print(json.dumps(sorted(set(sys.modules) - before)))
+'''
+# 生成器模块, 调用单个子命令时仅允许导入该子命令依赖的生成器
+GENERATOR_MODULES = {'app', 'task', 'cmd', 'fastapi', 'flask', 'django', 'scrapy', 'grpc', 'web', 'manifest', 'server'}
+# 重量级依赖, 仅grpc、apply等子命令执行时导入
+HEAVY_MODULES = {'toml', 'grpc_tools', 'grpc'}
+
+
+def _imported_modules(argv) -> list:
+    output = subprocess.run([sys.executable, '-c', _SCRIPT.format(argv=argv)], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _loaded(modules: list, package: str) -> set:
+    return {module[len(package):] for module in modules if module.startswith(package)}
+
+
+def test_help_imports_no_subcommand():
+    modules = _imported_modules(['--help'])
+    assert len(modules) < 60, modules
+    assert _loaded(modules, 'seatools.codegen.ioc.') == {'main'}
+    assert 'loguru' not in modules
+    assert not {module.split('.')[0] for module in modules} & HEAVY_MODULES
+
+
+@pytest.mark.parametrize('command, generators', [
+    ('cmd', {'cmd'}),
+    ('task', {'task', 'cmd'}),
+    ('fastapi', {'fastapi', 'web'}),
+])
+def test_subcommand_imports_only_its_generator(command, generators):
+    modules = _imported_modules([command, '--help'])
+    assert len(modules) < 200, modules
+    assert _loaded(modules, 'seatools.codegen.ioc.commands.') == {command}
+    assert _loaded(modules, 'seatools.codegen.ioc.') & GENERATOR_MODULES == generators
+    assert not {module.split('.')[0] for module in modules} & HEAVY_MODULES
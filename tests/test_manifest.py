@@ -0,0 +1,77 @@
+import builtins
+import os
+import re
+
+import pytest
+
+from seatools.codegen.ioc.manifest import apply_manifest, load_manifest
+
+README = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'README.md')
+
+
+def _write_manifest(tmp_path, content: str) -> str:
+    path = tmp_path / 'codegen.toml'
+    path.write_text(content, encoding='utf-8')
+    return str(path)
+
+
+def test_readme_manifest_example_is_valid(tmp_path):
+    with open(README, 'r', encoding='utf-8') as f:
+        example = re.search(r'```toml\n(.*?)```', f.read(), re.S).group(1)
+    manifest = load_manifest(_write_manifest(tmp_path, example))
+    assert manifest['task'] == [{'task_class': 'xxx_task', 'task_name': 'Xxx任务', 'cmd': True}]
+
+
+@pytest.mark.parametrize('content, message', [
+    ('[[cmd]]\nname = "a"\n\n[[cmd]]\nname = "b"\ndockercompose = false\n',
+     '配置项[cmd]第2项存在不支持的字段: dockercompose'),
+    ('[flask]\nworker = "gevent"\n', '配置项[flask]第1项存在不支持的字段: worker'),
+    ('[[grpc]]\nname = "a"\napp = "other"\n', '配置项[grpc]第1项存在不支持的字段: app'),
+])
+def test_unknown_entry_fields_are_rejected(tmp_path, content, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        load_manifest(_write_manifest(tmp_path, content))
+
+
+def test_apply_writes_shared_files_once(project, tmp_path, monkeypatch):
+    manifest = load_manifest(_write_manifest(tmp_path, '''
+[[task]]
+class = "hello_task"
+name = "Hello任务"
+cmd = true
+docker_compose = true
+
+[[cmd]]
+name = "first"
+docker_compose = true
+
+[[cmd]]
+name = "second"
+docker_compose = true
+'''))
+    shared = {project.path('pyproject.toml'), project.path('docker-compose.yml')}
+    writes = []
+    real_open, real_replace = builtins.open, os.replace
+
+    # 文件经open直接写入或写入临时文件后经os.replace原子替换
+    def counting_open(file, mode='r', *args, **kwargs):
+        if isinstance(file, str) and os.path.abspath(file) in shared and set(mode) & set('wax'):
+            writes.append(os.path.basename(file))
+        return real_open(file, mode, *args, **kwargs)
+
+    def counting_replace(src, dst, *args, **kwargs):
+        if os.path.abspath(dst) in shared:
+            writes.append(os.path.basename(dst))
+        return real_replace(src, dst, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', counting_open)
+    monkeypatch.setattr(os, 'replace', counting_replace)
+    assert apply_manifest(manifest, project.project_dir, project.package_dir) == 3
+    monkeypatch.undo()
+    assert sorted(writes) == ['docker-compose.yml', 'pyproject.toml']
+    pyproject = project.read('pyproject.toml')
+    for script in ('hello_task = ', 'first = ', 'second = '):
+        assert script in pyproject
+    compose = project.read('docker-compose.yml')
+    for service in ('hello_task:', 'first:', 'second:'):
+        assert service in compose
@@ -0,0 +1,93 @@
+import os
+import re
+import stat
+import sys
+import tempfile
+import time
+import urllib.request
+
+import pytest
+
+from seatools.codegen.ioc.fastapi import generate_fastapi
+
+
+@pytest.fixture
+def metrics_project(project):
+    for module in ('fastapi', 'uvicorn', 'prometheus_client'):
+        pytest.importorskip(module)
+    project.generate(generate_fastapi, metrics=True, docker=False, docker_compose=False)
+    return project
+
+
+def _request(port: int, path: str, method: str = 'GET') -> bytes:
+    request = urllib.request.Request('http://127.0.0.1:{}{}'.format(port, path), method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        return e.read()
+
+
+def _sample(metrics: str, name: str, **labels) -> float:
+    for line in metrics.splitlines():
+        match = re.match(r'^{}(?:\{{(.*)\}})? (\S+)$'.format(name), line)
+        if match and dict(re.findall(r'(\w+)="([^"]*)"', match.group(1) or '')) == labels:
+            return float(match.group(2))
+    return 0.0
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='工作进程目录权限基于posix')
+@pytest.mark.parametrize('boot', ['default', 'single'])
+def test_metrics_aggregates_spawned_workers(project, port, boot):
+    for module in ('fastapi', 'uvicorn', 'prometheus_client'):
+        pytest.importorskip(module)
+    project.generate(generate_fastapi, boot=boot, metrics=True, docker=False, docker_compose=False)
+    with project.serve('demo.cmd.fastapi_main', '--port', str(port), '--workers', '2', '--reload', '') as server:
+        # 两个工作进程均启动后才能汇总全部工作进程的指标
+        deadline = time.monotonic() + 30
+        while project.read('serve.log').count('Application startup complete') < 2:
+            assert time.monotonic() < deadline, project.read('serve.log')
+            time.sleep(0.1)
+        for _ in range(20):
+            _request(port, '/')
+        _request(port, '/', method='PROPFIND')
+        expected = [
+            (20, dict(method='GET', route='/', status='200')),
+            (1, dict(method='OTHER', route='/', status='405')),
+        ]
+        # 响应发送后中间件才记录指标, 另一工作进程汇总时可能尚未记录完成
+        deadline = time.monotonic() + 10
+        while True:
+            metrics = _request(port, '/metrics').decode()
+            actual = [_sample(metrics, 'http_requests_total', **labels) for _, labels in expected]
+            if actual == [value for value, _ in expected] or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        assert actual == [value for value, _ in expected], metrics
+        assert 'method="PROPFIND"' not in metrics
+        if boot == 'single':
+            # 主进程不导入应用, spawn的工作进程使用按主进程区分的目录
+            path = os.path.join(tempfile.gettempdir(), 'demo_metrics_{}'.format(server.pid))
+            assert stat.S_IMODE(os.lstat(path).st_mode) == 0o700
+
+
+def test_metrics_dir_is_private(metrics_project, tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir(mode=0o755)
+    os.chmod(shared, 0o755)
+    result = metrics_project.run_python(
+        'import os, stat\n'
+        'os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)\n'
+        'from demo.metrics import prometheus\n'
+        'path = os.environ["PROMETHEUS_MULTIPROC_DIR"]\n'
+        'assert stat.S_IMODE(os.stat(path).st_mode) == 0o700, oct(os.stat(path).st_mode)\n'
+        'try:\n'
+        '    prometheus._check_private_dir({!r})\n'
+        'except RuntimeError:\n'
+        '    pass\n'
+        'else:\n'
+        '    raise AssertionError("共享目录未被拒绝")\n'
+        'print(path)\n'.format(str(shared)))
+    assert result.returncode == 0, result.stderr
+    # 退出时删除随机目录
+    assert not os.path.exists(result.stdout.strip().splitlines()[-1])
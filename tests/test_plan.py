@@ -0,0 +1,180 @@
+import os
+
+import pytest
+
+from seatools.codegen.ioc.common import add_poetry_script, create_file, mkdir
+from loguru import logger
+
+from seatools.codegen.ioc.plan import FilePlan, PlannedFile, current_plan, file_plan, log_applied
+
+
+def _files(root) -> dict:
+    """目录下全部文件的相对路径及内容"""
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            filepath = os.path.join(dirpath, filename)
+            with open(filepath, 'r', encoding='utf-8', newline='') as f:
+                files[os.path.relpath(filepath, root).replace(os.sep, '/')] = f.read()
+    return files
+
+
+@pytest.fixture
+def logs():
+    messages = []
+    handler_id = logger.add(lambda message: messages.append(message.record['message']), level='INFO')
+    yield messages
+    logger.remove(handler_id)
+
+
+def test_plan_writes_on_exit(tmp_path):
+    with file_plan() as plan:
+        mkdir(str(tmp_path / 'pkg'))
+        create_file(str(tmp_path / 'pkg' / '__init__.py'), 'a = 1\n')
+        assert current_plan() is plan
+        assert not (tmp_path / 'pkg').exists()
+    assert current_plan() is None
+    assert _files(tmp_path) == {'pkg/__init__.py': 'a = 1\n'}
+    assert plan.applied == [('mkdir', str(tmp_path / 'pkg')), ('create', str(tmp_path / 'pkg' / '__init__.py'))]
+
+
+def test_plan_discarded_on_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        with file_plan():
+            create_file(str(tmp_path / 'a.py'), 'a = 1\n')
+            raise RuntimeError('生成失败')
+    assert _files(tmp_path) == {}
+
+
+def test_nested_plan_applied_by_outer(tmp_path):
+    with file_plan() as outer:
+        with file_plan() as inner:
+            create_file(str(tmp_path / 'a.py'), 'a = 1\n')
+        assert inner is outer
+        assert not (tmp_path / 'a.py').exists()
+    assert _files(tmp_path) == {'a.py': 'a = 1\n'}
+
+
+def test_add_file_without_override_keeps_first(tmp_path):
+    plan = FilePlan()
+    assert plan.add_file(PlannedFile(str(tmp_path / 'a.py'), 'first\n'))
+    assert not plan.add_file(PlannedFile(str(tmp_path / 'a.py'), 'second\n'))
+    assert plan.add_file(PlannedFile(str(tmp_path / 'a.py'), 'third\n', override=True))
+    plan.apply()
+    assert _files(tmp_path) == {'a.py': 'third\n'}
+
+
+def test_unchanged_file_is_not_written(tmp_path):
+    (tmp_path / 'a.py').write_text('a = 1\n')
+    os.utime(tmp_path / 'a.py', ns=(1, 1))
+    with file_plan() as plan:
+        create_file(str(tmp_path / 'a.py'), 'a = 1\n', override=True)
+    assert plan.applied == []
+    assert os.stat(tmp_path / 'a.py').st_mtime_ns == 1
+
+
+def test_apply_rolls_back_when_write_fails(tmp_path, monkeypatch):
+    (tmp_path / 'pyproject.toml').write_text('[tool.poetry.scripts]\nold = "demo.old:main"\n')
+    (tmp_path / 'existing.py').write_text('old\n')
+    write = PlannedFile.write
+
+    def failing_write(self):
+        if self.path.endswith('broken.py'):
+            raise OSError('磁盘已满')
+        write(self)
+
+    monkeypatch.setattr(PlannedFile, 'write', failing_write)
+    plan = FilePlan()
+    plan.add_dir(str(tmp_path / 'pkg' / 'sub'))
+    plan.add_file(PlannedFile(str(tmp_path / 'pkg' / 'sub' / 'a.py'), 'a\n'))
+    plan.add_file(PlannedFile(str(tmp_path / 'existing.py'), 'new\n', override=True))
+    plan.add_file(PlannedFile(str(tmp_path / 'nested' / 'b.py'), 'b\n'))
+    plan.add_file(PlannedFile(str(tmp_path / 'broken.py'), 'broken\n'))
+    plan.poetry_script_registry(str(tmp_path)).add('new = "demo.new:main"')
+    with pytest.raises(OSError):
+        plan.apply()
+    assert _files(tmp_path) == {'pyproject.toml': '[tool.poetry.scripts]\nold = "demo.old:main"\n',
+                                'existing.py': 'old\n'}
+    assert sorted(os.listdir(tmp_path)) == ['existing.py', 'pyproject.toml']
+
+
+def test_apply_rolls_back_edit_files(tmp_path, monkeypatch):
+    (tmp_path / 'pyproject.toml').write_text('[tool.poetry.scripts]\nold = "demo.old:main"\n')
+    write = PlannedFile.write
+
+    def failing_write(self):
+        if self.path.endswith('docker-compose.yml'):
+            raise OSError('磁盘已满')
+        write(self)
+
+    monkeypatch.setattr(PlannedFile, 'write', failing_write)
+    plan = FilePlan()
+    plan.add_file(PlannedFile(str(tmp_path / 'a.py'), 'a\n'))
+    plan.poetry_script_registry(str(tmp_path)).add('new = "demo.new:main"')
+    plan.docker_compose(str(tmp_path)).merge('  web:\n    build: .\n')
+    with pytest.raises(OSError):
+        plan.apply()
+    assert _files(tmp_path) == {'pyproject.toml': '[tool.poetry.scripts]\nold = "demo.old:main"\n'}
+
+
+def test_dry_run_diff(tmp_path):
+    (tmp_path / 'pyproject.toml').write_text('[tool.poetry.scripts]\n')
+    (tmp_path / 'existing.py').write_text('a = 1\n')
+    with file_plan(dry_run=True) as plan:
+        mkdir(str(tmp_path / 'pkg'))
+        create_file(str(tmp_path / 'pkg' / 'new.py'), 'b = 2\n')
+        create_file(str(tmp_path / 'existing.py'), 'a = 2\n', override=True)
+        add_poetry_script(str(tmp_path), 'demo = "demo.cmd.demo_main:main"')
+    assert _files(tmp_path) == {'pyproject.toml': '[tool.poetry.scripts]\n', 'existing.py': 'a = 1\n'}
+    diff = plan.diff()
+    assert '创建目录: {}\n'.format(tmp_path / 'pkg') in diff
+    assert '--- /dev/null\n+++ {}\n@@ -0,0 +1 @@\n+b = 2\n'.format(tmp_path / 'pkg' / 'new.py') in diff
+    assert '--- {0}\n+++ {0}\n@@ -1 +1 @@\n-a = 1\n+a = 2\n'.format(tmp_path / 'existing.py') in diff
+    assert '+demo = "demo.cmd.demo_main:main"\n' in diff
+    assert plan.applied == []
+
+
+def test_completion_logged_after_apply(tmp_path, logs):
+    with file_plan():
+        create_file(str(tmp_path / 'a.py'), 'a = 1\n')
+        log_applied('生成完成')
+        assert '生成完成' not in logs
+    assert logs.index('生成完成') > logs.index('创建文件: {}'.format(tmp_path / 'a.py'))
+
+
+def test_failed_apply_names_file_and_skips_completion(tmp_path, monkeypatch, logs):
+    write = PlannedFile.write
+
+    def failing_write(self):
+        if self.path.endswith('broken.py'):
+            raise OSError('磁盘已满')
+        write(self)
+
+    monkeypatch.setattr(PlannedFile, 'write', failing_write)
+    with pytest.raises(OSError):
+        with file_plan():
+            create_file(str(tmp_path / 'a.py'), 'a = 1\n')
+            create_file(str(tmp_path / 'broken.py'), 'b = 1\n')
+            log_applied('生成完成')
+    assert '生成完成' not in logs
+    assert any(message.startswith('写入失败: {}'.format(tmp_path / 'broken.py')) and '磁盘已满' in message
+               for message in logs), logs
+    assert not os.path.exists(tmp_path / 'a.py')
+
+
+def test_command_completion_not_logged_on_rollback(project, monkeypatch, logs):
+    from seatools.codegen.ioc.main import main
+
+    def failing_write(self):
+        raise OSError('磁盘已满')
+
+    monkeypatch.setattr(PlannedFile, 'write', failing_write)
+    with pytest.raises(OSError):
+        main(['fastapi', '--project_dir', project.project_dir, '--package_dir', project.package_dir],
+             standalone_mode=False)
+    assert '生成[fastapi]模板代码完成' not in logs
+    assert any(message.startswith('写入失败: ') for message in logs), logs
+    monkeypatch.undo()
+    main(['fastapi', '--project_dir', project.project_dir, '--package_dir', project.package_dir],
+         standalone_mode=False)
+    assert logs[-1] == '生成[fastapi]模板代码完成'
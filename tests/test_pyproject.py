@@ -0,0 +1,92 @@
+import pytest
+
+from seatools.codegen.ioc.pyproject import PoetryScriptRegistry, parse_script_name
+
+PYPROJECT = '''[tool.poetry]
+name = "demo"
+
+[tool.poetry.scripts]
+task_two = "demo.cmd.task_two_main:main"
+
+[build-system]
+requires = ["poetry-core"]
+'''
+
+
+def _write(tmp_path, content: str):
+    with open(tmp_path / 'pyproject.toml', 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+
+
+def _read(tmp_path) -> str:
+    with open(tmp_path / 'pyproject.toml', 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('script, name', [
+    ('task = "demo.cmd.task_main:main"', 'task'),
+    ('  "my-task" = "demo.cmd.task_main:main"', 'my-task'),
+    ("'my.task' = 'demo.cmd.task_main:main'", 'my.task'),
+    ('# task = "demo.cmd.task_main:main"', None),
+])
+def test_parse_script_name(script, name):
+    assert parse_script_name(script) == name
+
+
+def test_add_prefix_name_is_not_existing_script(tmp_path):
+    _write(tmp_path, PYPROJECT)
+    registry = PoetryScriptRegistry.load(str(tmp_path))
+    assert 'task_two' in registry
+    assert 'task' not in registry
+    assert registry.add('task = "demo.cmd.task_main:main"')
+    assert not registry.add('task_two = "demo.cmd.other_main:main"')
+    assert registry.flush() == ['task']
+    assert _read(tmp_path) == PYPROJECT.replace(
+        '[tool.poetry.scripts]\n', '[tool.poetry.scripts]\ntask = "demo.cmd.task_main:main"\n')
+
+
+def test_add_duplicate_pending_script(tmp_path):
+    _write(tmp_path, PYPROJECT)
+    registry = PoetryScriptRegistry.load(str(tmp_path))
+    assert registry.add('task = "demo.cmd.task_main:main"')
+    assert not registry.add('task = "demo.cmd.task_main:main"')
+    assert registry.pending == ['task']
+
+
+def test_flush_without_pending_keeps_file(tmp_path):
+    _write(tmp_path, PYPROJECT)
+    registry = PoetryScriptRegistry.load(str(tmp_path))
+    assert registry.flush() == []
+    assert _read(tmp_path) == PYPROJECT
+
+
+def test_flush_creates_missing_scripts_table(tmp_path):
+    _write(tmp_path, '[tool.poetry]\nname = "demo"')
+    registry = PoetryScriptRegistry.load(str(tmp_path))
+    registry.add('task = "demo.cmd.task_main:main"')
+    registry.add('fastapi = "demo.cmd.fastapi_main:main"')
+    assert registry.flush() == ['task', 'fastapi']
+    assert _read(tmp_path) == ('[tool.poetry]\nname = "demo"\n\n[tool.poetry.scripts]\n'
+                               'fastapi = "demo.cmd.fastapi_main:main"\ntask = "demo.cmd.task_main:main"\n')
+    reloaded = PoetryScriptRegistry.load(str(tmp_path))
+    assert reloaded.names == ['fastapi', 'task']
+
+
+def test_flush_keeps_crlf_newlines(tmp_path):
+    _write(tmp_path, PYPROJECT.replace('\n', '\r\n'))
+    registry = PoetryScriptRegistry.load(str(tmp_path))
+    registry.add('task = "demo.cmd.task_main:main"')
+    registry.flush()
+    content = _read(tmp_path)
+    assert '\r\n[tool.poetry.scripts]\r\ntask = "demo.cmd.task_main:main"\r\ntask_two' in content
+    assert '\n' not in content.replace('\r\n', '')
+
+
+def test_scripts_outside_table_are_ignored(tmp_path):
+    _write(tmp_path, PYPROJECT + '\n[tool.other]\ntask = "x"\n')
+    registry = PoetryScriptRegistry.load(str(tmp_path))
+    assert registry.names == ['task_two']
+
+
+def test_load_missing_pyproject(tmp_path):
+    assert PoetryScriptRegistry.load(str(tmp_path)) is None
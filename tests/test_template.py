@@ -0,0 +1,47 @@
+import pytest
+
+from seatools.codegen.ioc import template
+from seatools.codegen.ioc.common import str_format
+from seatools.codegen.ioc.template import Template, TemplateVariableError, compile_template
+
+
+def test_render_variables():
+    assert Template('${a}-${b}-${a}').render(a=1, b='x') == '1-x-1'
+    assert Template('${a}').render(a=None) == 'None'
+    # 多余变量忽略
+    assert Template('a=${a}').render(a=1, b=2) == 'a=1'
+
+
+def test_undefined_variables_raise():
+    with pytest.raises(TemplateVariableError) as e:
+        str_format('${b} ${a} ${c} ${b}', c=1)
+    assert e.value.names == ['a', 'b']
+    assert str(e.value) == '模板变量未定义: a, b'
+    # 保持KeyError兼容
+    assert isinstance(e.value, KeyError)
+
+
+def test_literal_dollar_kept():
+    text = 'kill -HUP $(cat /tmp/${name}.pid); echo $HOME $1 $ {x} $${name}'
+    assert str_format(text, name='demo') == 'kill -HUP $(cat /tmp/demo.pid); echo $HOME $1 $ {x} $demo'
+    # 无变量时原样返回
+    assert Template('cost: $5 ${').render() == 'cost: $5 ${'
+
+
+def test_compile_cached_by_identity():
+    text = ''.join(['${', 'a}'])
+    assert compile_template(text) is compile_template(text)
+    # 内容相同但对象不同时重新编译, 不依赖id复用
+    other = ''.join(['${', 'a}'])
+    assert compile_template(other) is not compile_template(text)
+
+
+def test_compile_cache_limit(monkeypatch):
+    monkeypatch.setattr(template, '_CACHE_MAX_SIZE', 4)
+    monkeypatch.setattr(template, '_template_cache', {})
+    texts = ['${{v{}}}'.format(i) for i in range(10)]
+    for i, text in enumerate(texts):
+        assert compile_template(text).render(**{'v{}'.format(i): i}) == str(i)
+        assert len(template._template_cache) <= 4
+    # 达到上限清空后仍可正常编译渲染
+    assert compile_template(texts[0]).render(v0='ok') == 'ok'
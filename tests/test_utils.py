@@ -0,0 +1,45 @@
+import os
+
+from seatools.codegen.utils import find_package_dir, find_project_dir
+
+
+def _make_project(path, name: str = 'demo'):
+    (path / 'src' / name).mkdir(parents=True)
+    (path / 'pyproject.toml').write_text('[tool.poetry]\nname = "{}"\n'.format(name), encoding='utf-8')
+    return str(path)
+
+
+def test_discovery_cache_written_to_configured_dir(tmp_path, discovery_cache_dir):
+    project_dir = _make_project(tmp_path / 'outer')
+    place = tmp_path / 'outer' / 'src' / 'demo'
+    assert find_project_dir(str(place)) == project_dir
+    assert find_package_dir(project_dir) == os.path.join(project_dir, 'src', 'demo')
+    assert os.listdir(discovery_cache_dir) == ['discovery.json']
+
+
+def test_discovery_cache_disabled(tmp_path, discovery_cache_dir, monkeypatch):
+    monkeypatch.setenv('SEATOOLS_CODEGEN_CACHE', '0')
+    project_dir = _make_project(tmp_path / 'outer')
+    assert find_project_dir(project_dir) == project_dir
+    assert os.listdir(discovery_cache_dir) == []
+
+
+def test_nearer_project_invalidates_cached_place(tmp_path):
+    outer = _make_project(tmp_path / 'outer')
+    place = tmp_path / 'outer' / 'libs' / 'inner' / 'src'
+    place.mkdir(parents=True)
+    assert find_project_dir(str(place)) == outer
+    # 缓存命中
+    assert find_project_dir(str(place)) == outer
+    for marker in ('requirements.txt', 'pyproject.toml'):
+        inner = tmp_path / 'outer' / 'libs' / 'inner'
+        (inner / marker).write_text('', encoding='utf-8')
+        assert find_project_dir(str(place)) == str(inner)
+        (inner / marker).unlink()
+        assert find_project_dir(str(place)) == outer
+
+
+def test_place_is_project_dir(tmp_path):
+    project_dir = _make_project(tmp_path / 'outer')
+    assert find_project_dir(project_dir) == project_dir
+    assert find_project_dir(project_dir) == project_dir
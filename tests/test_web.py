@@ -0,0 +1,158 @@
+import urllib.request
+
+import pytest
+
+from seatools.codegen.ioc.common import merge_application_config
+from seatools.codegen.ioc.fastapi import generate_fastapi
+from seatools.codegen.ioc.flask import generate_flask
+from seatools.codegen.ioc.plan import file_plan
+
+
+def test_fastapi_gunicorn_uses_uvicorn_worker_package(project):
+    project.generate(generate_fastapi, server='gunicorn', docker=True, docker_compose=False)
+    conf = project.read('src', 'demo', 'fastapi', 'gunicorn_conf.py')
+    assert "worker_class = 'uvicorn_worker.UvicornWorker'" in conf
+    assert 'uvicorn.workers' not in conf
+    assert 'RUN poetry add fastapi gunicorn uvicorn[standard] uvicorn-worker\n' in project.read('fastapi.Dockerfile')
+
+
+def _response_cache_config(project) -> str:
+    content = project.read('config', 'application.yml')
+    return content[content.index('response_cache:'):]
+
+
+def test_flask_redis_cache_merges_into_existing_response_cache(project):
+    project.generate(generate_flask, cache='memory', docker=False)
+    assert 'redis_url' not in _response_cache_config(project)
+    project.generate(generate_flask, cache='redis', docker=False, override=True)
+    config = _response_cache_config(project)
+    assert config.count('response_cache:\n') == 1
+    assert "  ttl: 60\n  key_prefix: 'response_cache:demo:'\n  redis_url: 'redis://127.0.0.1:6379/0'" in config
+
+
+def test_flask_redis_cache_keeps_existing_response_cache_values(project):
+    with open(project.path('config', 'application.yml'), 'a', encoding='utf-8') as f:
+        f.write('\nresponse_cache:\n    ttl: 30\n    key_prefix: custom\n\n# 其他配置\nother: 1\n')
+    project.generate(generate_flask, cache='redis', docker=False)
+    assert project.read('config', 'application.yml').endswith(
+        "response_cache:\n    ttl: 30\n    key_prefix: custom\n    enabled: true\n    maxsize: 1024\n"
+        "    redis_url: 'redis://127.0.0.1:6379/0'\n\n"
+        "# 其他配置\nother: 1\n")
+
+
+def test_merge_application_config_rejects_inline_block(project):
+    with open(project.path('config', 'application.yml'), 'a', encoding='utf-8') as f:
+        f.write('response_cache: {ttl: 30}\n')
+    with file_plan():
+        assert not merge_application_config(project.project_dir, 'response_cache',
+                                            "response_cache:\n  redis_url: 'redis://127.0.0.1:6379/0'")
+    assert project.read('config', 'application.yml').endswith('response_cache: {ttl: 30}\n')
+
+
+def test_redis_cache_keys_are_namespaced_per_framework(project):
+    project.generate(generate_fastapi, cache='redis', docker=False, docker_compose=False)
+    project.generate(generate_flask, cache='redis', docker=False)
+    assert "_cache.redis_key('fastapi', key)" in project.read('src', 'demo', 'fastapi', 'cache.py')
+    assert "_cache.redis_key('flask', key)" in project.read('src', 'demo', 'flask', 'cache.py')
+    result = project.run_python(
+        'from demo.caches.response_cache import ResponseCache, ResponseCacheConfig\n'
+        "print(ResponseCache(ResponseCacheConfig(key_prefix='response_cache:demo:')).redis_key('flask', 'k'))")
+    assert result.stdout.strip() == 'response_cache:demo:flask:k', result.stderr
+
+
+def test_gunicorn_pidfile_is_namespaced_per_project_and_port(project, port):
+    pytest.importorskip('uvicorn_worker')
+    project.generate(generate_fastapi, server='gunicorn', docker=False, docker_compose=False)
+    assert "proc_name = 'demo_fastapi'" in project.read('src', 'demo', 'fastapi', 'gunicorn_conf.py')
+    assert 'kill -HUP $(cat /tmp/demo_fastapi_8000.pid)' in project.read('bin', 'fastapi.sh')
+    pidfile = project.path('gunicorn.pid')
+    with project.serve('demo.cmd.fastapi_main', '--port', str(port), '--workers', '1', '--pidfile', pidfile) as server:
+        with urllib.request.urlopen('http://127.0.0.1:{}/'.format(port), timeout=10) as response:
+            assert response.status == 200
+        with open(pidfile, 'r', encoding='utf-8') as f:
+            assert int(f.read()) == server.pid
+
+
+_FASTAPI_CACHE_CHECK = '''from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from demo.fastapi.app import app
+from demo.fastapi.cache import cached
+
+calls = []
+
+
+@app.get('/headers')
+@cached()
+def headers():
+    calls.append(1)
+    return JSONResponse({'calls': len(calls)}, headers={'Cache-Control': 'max-age=30', 'Content-Language': 'zh',
+                                                        'X-Custom': 'v'})
+
+
+client = TestClient(app)
+
+
+def get_with_cookie():
+    return client.get('/headers', headers={'Cookie': 'session=user'})
+'''
+
+_FLASK_CACHE_CHECK = '''from flask import jsonify
+from demo.flask.app import app
+from demo.flask.cache import cached
+
+calls = []
+
+
+@app.get('/headers')
+@cached()
+def headers():
+    calls.append(1)
+    response = jsonify(calls=len(calls))
+    response.headers.update({'Cache-Control': 'max-age=30', 'Content-Language': 'zh', 'X-Custom': 'v'})
+    return response
+
+
+client = app.test_client()
+
+
+def get_with_cookie():
+    # 测试客户端忽略请求头中的Cookie, 通过set_cookie设置
+    client.set_cookie('session', 'user')
+    return client.get('/headers')
+'''
+
+_CACHE_ASSERTS = '''
+for state in ('MISS', 'HIT'):
+    response = client.get('/headers')
+    assert response.headers['X-Cache'] == state, response.headers
+    assert response.headers['Cache-Control'] == 'max-age=30', response.headers
+    assert response.headers['Content-Language'] == 'zh', response.headers
+    assert response.headers['X-Custom'] == 'v', response.headers
+    assert response.headers['Content-Type'] == 'application/json', response.headers
+not_modified = client.get('/headers', headers={'If-None-Match': response.headers['ETag']})
+assert not_modified.status_code == 304 and not_modified.headers['Cache-Control'] == 'max-age=30'
+# 携带Authorization或Cookie的请求不使用缓存
+for response in (client.get('/headers', headers={'Authorization': 'Bearer user'}), get_with_cookie()):
+    assert 'X-Cache' not in response.headers, response.headers
+assert len(calls) == 3, calls
+'''
+
+
+@pytest.mark.parametrize('generator, check', [
+    pytest.param(generate_fastapi, _FASTAPI_CACHE_CHECK, id='fastapi'),
+    pytest.param(generate_flask, _FLASK_CACHE_CHECK, id='flask'),
+])
+def test_cached_response_keeps_headers_and_skips_private_requests(project, generator, check):
+    project.generate(generator, cache='memory', docker=False, docker_compose=False)
+    result = project.run_python(check + _CACHE_ASSERTS)
+    assert result.returncode == 0, result.stderr
+
+
+def test_cached_response_headers_roundtrip_redis_format(project):
+    project.generate(generate_flask, cache='memory', docker=False)
+    result = project.run_python(
+        'from demo.caches.response_cache import CachedResponse\n'
+        "entry = CachedResponse(b'{}', 200, 'application/json', 'e', 1.0, (('Link', 'a'), ('Link', 'b')))\n"
+        'assert CachedResponse.loads(entry.dumps()) == entry\n'
+        "assert CachedResponse.loads(b'[200, null, \"e\", 1.0]\\n{}').headers == ()\n")
+    assert result.returncode == 0, result.stderr